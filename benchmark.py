@@ -0,0 +1,172 @@
+import argparse
+import sys
+import time
+from typing import Optional
+
+from colorama import init, Fore
+
+from config_manager import ConfigManager
+from connectivity_client import PATH_DEFAULT, PATH_TUNNEL
+from kill_switch import KillSwitch
+from logger_manager import LoggerManager
+from throughput_benchmark import BenchmarkRunner, LocalSink
+from vpn_manager import VPNManager
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line of the benchmark.
+    
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Measure connect time, RTT, jitter and throughput per VPN server")
+    parser.add_argument("servers", nargs="*", help="OpenVPN configuration files to measure (default: all)")
+    parser.add_argument("--limit", type=int, default=0, help="Measure at most this many servers")
+    parser.add_argument("--output", help="JSON results file (default: benchmark.output_file)")
+    parser.add_argument("--csv", help="Also write the results to this CSV file")
+    parser.add_argument("--local", action="store_true",
+                        help="Measure a loopback sink instead of real servers, to check the measurement itself")
+    return parser.parse_args()
+
+
+class BenchmarkApplication:
+    """
+    Command line front end of the throughput benchmark.
+    """
+    
+    def __init__(self, arguments: argparse.Namespace):
+        """
+        Initialize the benchmark application.
+        
+        Args:
+            arguments: Parsed command line arguments
+        """
+        init(autoreset=True)
+        
+        self.arguments = arguments
+        self.config_manager = ConfigManager()
+        self.logger_manager = LoggerManager(self.config_manager)
+        self.kill_switch = KillSwitch(self.config_manager, self.logger_manager)
+        self.vpn_manager = VPNManager(self.config_manager, self.logger_manager, self.kill_switch)
+        self.runner = BenchmarkRunner(self.config_manager, self.logger_manager, self.kill_switch.connectivity)
+    
+    def select_servers(self) -> list:
+        """
+        Get the servers to measure from the command line or the OpenVPN directory.
+        
+        Returns:
+            List of OpenVPN configuration file names
+        """
+        servers = self.arguments.servers or self.vpn_manager.discover_ovpn_files()
+        if self.arguments.limit > 0:
+            servers = servers[:self.arguments.limit]
+        return servers
+    
+    def connect(self, ovpn_file: str, username: str, password: str) -> Optional[float]:
+        """
+        Connect to a server and time it.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            Connect time in seconds, or None if the connection failed
+        """
+        started_at = time.monotonic()
+        if not self.vpn_manager.connect_to_vpn(ovpn_file, username, password):
+            return None
+        return time.monotonic() - started_at
+    
+    def run_local(self, servers: list) -> list:
+        """
+        Measure the loopback sink, once per server name, without any tunnel.
+        
+        Args:
+            servers: Labels of the results
+        
+        Returns:
+            List of result dictionaries
+        """
+        sink = LocalSink().start()
+        try:
+            self.runner.use_base_url(sink.get_base_url())
+            return self.runner.run(servers, lambda server: 0.0, lambda: None, PATH_DEFAULT)
+        finally:
+            sink.stop()
+    
+    def run_servers(self, servers: list) -> list:
+        """
+        Connect to each server in turn and measure it through the tunnel.
+        
+        Args:
+            servers: OpenVPN configuration file names
+        
+        Returns:
+            List of result dictionaries
+        """
+        username, password = self.vpn_manager.get_user_credentials()
+        
+        self.vpn_manager.bind_underlay_checks()
+        self.kill_switch.store_initial_ip()
+        self.kill_switch.engage_firewall()
+        try:
+            return self.runner.run(
+                servers,
+                lambda server: self.connect(server, username, password),
+                self.vpn_manager.disconnect_vpn,
+                PATH_TUNNEL
+            )
+        finally:
+            self.vpn_manager.disconnect_vpn()
+            self.kill_switch.release_firewall()
+            self.vpn_manager.secure_cleanup_credentials()
+    
+    def run(self) -> bool:
+        """
+        Run the benchmark and write the results.
+        
+        Returns:
+            True if at least one server was measured, False otherwise
+        """
+        if self.arguments.local:
+            servers = self.arguments.servers or ["loopback"]
+        else:
+            servers = self.select_servers()
+        if not servers:
+            self.logger_manager.error("No OpenVPN configuration files found")
+            return False
+        
+        self.logger_manager.info(f"Benchmarking {len(servers)} servers")
+        results = self.run_local(servers) if self.arguments.local else self.run_servers(servers)
+        
+        output_file = self.arguments.output or self.config_manager.get_benchmark_config().get(
+            'output_file', 'benchmark_results.json'
+        )
+        self.runner.save_json(results, output_file)
+        if self.arguments.csv:
+            self.runner.save_csv(results, self.arguments.csv)
+        
+        return any(result['connected'] for result in results)
+
+
+def main():
+    """
+    Entry point of the CycleVPN benchmark.
+    """
+    try:
+        app = BenchmarkApplication(parse_arguments())
+        if not app.run():
+            sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"{Fore.YELLOW}Benchmark interrupted")
+        sys.exit(1)
+    except Exception as e:
+        print(f"{Fore.RED}Benchmark failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
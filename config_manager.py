@@ -1,15 +1,81 @@
 import json
 import os
+import threading
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
+from typing import Callable
 from loguru import logger
 
+from config_schema import find_restart_changes, freeze, validate_config
+
+
+EMPTY_SECTION = MappingProxyType({})
+
+
+class ConfigSection(Mapping):
+    """
+    Read-only view of one configuration section.
+    
+    Components keep the section they were given at construction; every
+    lookup goes to the current snapshot, so a reloaded value is seen on
+    the next access without rebuilding the component.
+    """
+    
+    def __init__(self, config_manager, name: str):
+        """
+        Initialize the view.
+        
+        Args:
+            config_manager: ConfigManager holding the snapshot
+            name: Section name
+        """
+        self.config_manager = config_manager
+        self.name = name
+    
+    def current(self) -> Mapping:
+        """
+        Get the section in the current snapshot.
+        
+        Returns:
+            Read-only mapping of the section values
+        """
+        return self.config_manager.config_data.get(self.name, EMPTY_SECTION)
+    
+    def __getitem__(self, key):
+        """
+        Get a value of the section in the current snapshot.
+        """
+        return self.current()[key]
+    
+    def __iter__(self):
+        """
+        Iterate over the keys of the section in the current snapshot.
+        """
+        return iter(self.current())
+    
+    def __len__(self) -> int:
+        """
+        Count the keys of the section in the current snapshot.
+        """
+        return len(self.current())
+    
+    def __repr__(self) -> str:
+        """
+        Show the section name and its current values.
+        """
+        return f"ConfigSection({self.name}, {dict(self.current())})"
+
 
 class ConfigManager:
     """
     Manages configuration loading and validation for CycleVPN.
     
     This class handles reading configuration from JSON files and provides
-    validated access to configuration parameters.
+    validated access to configuration parameters. The configuration is
+    held as an immutable snapshot. A reload validates the file and stages
+    a new snapshot, which the rotation loops swap in between sessions
+    through apply_pending_changes.
     """
     
     def __init__(self, config_path: str = "config.json"):
@@ -20,7 +86,11 @@ class ConfigManager:
             config_path: Path to the configuration file
         """
         self.config_path = Path(config_path)
-        self.config_data = {}
+        self.config_data = EMPTY_SECTION
+        self.version = 0
+        self.pending_data = None
+        self.reload_listeners = []
+        self.lock = threading.Lock()
         self.load_configuration()
     
     def load_configuration(self):
@@ -30,11 +100,11 @@ class ConfigManager:
         Raises:
             FileNotFoundError: If configuration file doesn't exist
             json.JSONDecodeError: If configuration file is malformed
+            ValueError: If the configuration does not match the schema
         """
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as file:
-                self.config_data = json.load(file)
-            self.validate_configuration()
+            self.config_data = self.read_configuration()
+            self.ensure_directories_exist()
             logger.info(f"Configuration loaded from {self.config_path}")
         except FileNotFoundError:
             logger.error(f"Configuration file not found: {self.config_path}")
@@ -43,6 +113,92 @@ class ConfigManager:
             logger.error(f"Invalid JSON in configuration file: {e}")
             raise
     
+    def read_configuration(self) -> Mapping:
+        """
+        Read and validate the configuration file.
+        
+        Returns:
+            Immutable configuration snapshot
+        
+        Raises:
+            FileNotFoundError: If configuration file doesn't exist
+            json.JSONDecodeError: If configuration file is malformed
+            ValueError: If the configuration does not match the schema
+        """
+        with open(self.config_path, 'r', encoding='utf-8') as file:
+            config_data = json.load(file)
+        
+        errors = validate_config(config_data)
+        if errors:
+            raise ValueError("Invalid configuration: " + "; ".join(errors))
+        return freeze(config_data)
+    
+    def request_reload(self) -> bool:
+        """
+        Read the configuration file again and stage it for the next safe point.
+        
+        An invalid file is rejected and the running configuration is kept.
+        
+        Returns:
+            True if a new configuration was staged, False otherwise
+        """
+        try:
+            config_data = self.read_configuration()
+        except (OSError, ValueError) as e:
+            logger.error(f"Configuration reload rejected, keeping the running configuration: {e}")
+            return False
+        
+        with self.lock:
+            if config_data == (self.pending_data or self.config_data):
+                return False
+            self.pending_data = config_data
+        
+        logger.info("Configuration reload staged, applying it at the next rotation")
+        return True
+    
+    def apply_pending_changes(self) -> bool:
+        """
+        Swap in the staged configuration, if any.
+        
+        Called by the rotation loops between sessions, where no operation
+        is halfway through reading its settings.
+        
+        Returns:
+            True if a new configuration was applied, False otherwise
+        """
+        with self.lock:
+            config_data = self.pending_data
+            if config_data is None:
+                return False
+            self.pending_data = None
+            previous = self.config_data
+            self.config_data = config_data
+            self.version += 1
+        
+        logger.info(f"Configuration reloaded (version {self.version})")
+        restart_changes = find_restart_changes(previous, config_data)
+        if restart_changes:
+            logger.warning(f"Restart CycleVPN to apply: {', '.join(restart_changes)}")
+        
+        for listener in list(self.reload_listeners):
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Configuration reload listener failed: {e}")
+        return True
+    
+    def add_reload_listener(self, listener: Callable[[], None]):
+        """
+        Register a callback run after a new configuration is applied.
+        
+        Only needed by components deriving state from values at construction;
+        values read through the configuration sections update by themselves.
+        
+        Args:
+            listener: Callable without arguments
+        """
+        self.reload_listeners.append(listener)
+    
     def create_default_configuration(self):
         """
         Create a default configuration file if none exists.
@@ -52,56 +208,164 @@ class ConfigManager:
                 "connection_timeout": 10,
                 "vpn_establish_wait": 5,
                 "ip_check_retries": 3,
-                "ip_check_timeout": 5
+                "ip_check_timeout": 5,
+                "ip_check_quorum": 1,
+                "ip_check_hedge_delay": 0.25,
+                "ip_check_retry_delay": 2,
+                "ip_check_providers": [
+                    "https://ifconfig.io/ip",
+                    "https://ipinfo.io/ip",
+                    "https://httpbin.org/ip",
+                    "https://api.ipify.org"
+                ],
+                "management_interface": True,
+                "management_connect_timeout": 5,
+                "tun_device_prefix": "cvpn",
+                "underlay_interface": "",
+                "http_pool_size": 8,
+                "process_stop_timeout": 5,
+                "connect_deadline": 120
             },
             "session": {
                 "cooldown_seconds": 20,
                 "max_connection_failures": 3,
-                "kill_switch_enabled": True
+                "kill_switch_enabled": True,
+                "rotation_mode": "break-before-make",
+                "supervisor": "asyncio"
             },
             "services": {
                 "transmission_service": "transmission",
-                "openvpn_service": "openvpn"
+                "openvpn_service": "openvpn",
+                "control_backend": "auto",
+                "control_timeout": 30
+            },
+            "transmission": {
+                "control": "service",
+                "rpc_url": "http://127.0.0.1:9091/transmission/rpc",
+                "rpc_username": "",
+                "rpc_password": "",
+                "pause_mode": "stop",
+                "bind_to_tunnel": True,
+                "peer_port": None,
+                "timeout": 10
             },
             "paths": {
                 "ovpn_directory": "./openvpn",
                 "log_file": "cyclevpn.log",
-                "temp_directory": "/tmp"
+                "temp_directory": "/tmp",
+                "catalog_cache": ".cyclevpn_catalog.json",
+                "dns_cache": ".cyclevpn_dns.json",
+                "state_file": ".cyclevpn_state.json",
+                "history_database": "cyclevpn_history.db"
             },
             "logging": {
                 "level": "INFO",
                 "rotation": "10 MB",
                 "retention": "7 days",
-                "format": "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
+                "format": "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+                "file_format": "json"
             },
             "security": {
                 "clear_credentials_on_exit": True,
                 "secure_temp_files": True,
-                "verify_ip_change": True
+                "verify_ip_change": True,
+                "verification_mode": "local",
+                "external_ip_check_interval": 900,
+                "route_probe_address": "1.1.1.1"
+            },
+            "health": {
+                "interval": 1.0,
+                "state_interval": 5,
+                "failure_grace": 5,
+                "stall_seconds": 60,
+                "ip_check_interval": 0,
+                "on_failure": "rotate"
+            },
+            "multi_tunnel": {
+                "exits": 1,
+                "namespace_prefix": "cyclevpn",
+                "subnet": "10.231",
+                "nameservers": ["1.1.1.1"],
+                "worker_command": [
+                    "transmission-daemon", "--foreground",
+                    "--config-dir", "/var/lib/cyclevpn/exit{index}"
+                ],
+                "stagger": True
+            },
+            "firewall": {
+                "backend": "none",
+                "table": "cyclevpn",
+                "allow_lan": True,
+                "allow_dns": False,
+                "allow_dhcp": True,
+                "remove_on_exit": True
+            },
+            "selection": {
+                "strategy": "latency",
+                "latency_exponent": 2.0,
+                "ucb_exploration": 1.0,
+                "probe_timeout": 2.0,
+                "probe_samples": 2,
+                "probe_workers": 32,
+                "probe_max_age": 900,
+                "skip_unreachable": True
+            },
+            "benchmark": {
+                "download_url": "https://speed.cloudflare.com/__down",
+                "upload_url": "https://speed.cloudflare.com/__up",
+                "rtt_samples": 10,
+                "download_bytes": 25000000,
+                "upload_bytes": 10000000,
+                "timeout": 30,
+                "output_file": "benchmark_results.json"
+            },
+            "metrics": {
+                "enabled": False,
+                "listen_address": "127.0.0.1",
+                "port": 9469
+            },
+            "rotation": {
+                "policy": "fixed",
+                "jitter_seconds": 0,
+                "max_bytes": 5000000000,
+                "min_throughput": 0,
+                "max_rtt": 0,
+                "degraded_window": 60,
+                "rtt_url": "https://speed.cloudflare.com/__down?bytes=0",
+                "rtt_interval": 15,
+                "rtt_timeout": 5,
+                "idle_threshold": 2048,
+                "idle_seconds": 30,
+                "max_session_seconds": 0
+            },
+            "daemon": {
+                "enabled": False,
+                "credentials_fd": None,
+                "credentials_file": "",
+                "control_socket": "/run/cyclevpn/control.sock",
+                "control_interactive": False
+            },
+            "dns": {
+                "pre_resolve": True,
+                "default_ttl": 300,
+                "min_ttl": 30,
+                "max_ttl": 3600,
+                "timeout": 2.0,
+                "workers": 16
+            },
+            "warm_start": {
+                "enabled": True,
+                "resume_max_age": 86400,
+                "initial_ip_max_age": 3600
             }
         }
         
         with open(self.config_path, 'w', encoding='utf-8') as file:
             json.dump(default_config, file, indent=2)
         
-        self.config_data = default_config
+        self.config_data = freeze(default_config)
         logger.info(f"Default configuration created at {self.config_path}")
     
-    def validate_configuration(self):
-        """
-        Validate that all required configuration sections exist.
-        
-        Raises:
-            ValueError: If required configuration sections are missing
-        """
-        required_sections = ['network', 'session', 'services', 'paths', 'logging', 'security']
-        
-        for section in required_sections:
-            if section not in self.config_data:
-                raise ValueError(f"Missing required configuration section: {section}")
-        
-        self.ensure_directories_exist()
-    
     def ensure_directories_exist(self):
         """
         Create necessary directories if they don't exist.
@@ -119,7 +383,7 @@ class ConfigManager:
         Returns:
             Dictionary containing network configuration
         """
-        return self.config_data['network']
+        return ConfigSection(self, 'network')
     
     def get_session_config(self) -> dict:
         """
@@ -128,7 +392,7 @@ class ConfigManager:
         Returns:
             Dictionary containing session configuration
         """
-        return self.config_data['session']
+        return ConfigSection(self, 'session')
     
     def get_services_config(self) -> dict:
         """
@@ -137,7 +401,16 @@ class ConfigManager:
         Returns:
             Dictionary containing services configuration
         """
-        return self.config_data['services']
+        return ConfigSection(self, 'services')
+    
+    def get_transmission_config(self) -> dict:
+        """
+        Get Transmission RPC configuration parameters.
+        
+        Returns:
+            Dictionary containing Transmission configuration
+        """
+        return ConfigSection(self, 'transmission')
     
     def get_paths_config(self) -> dict:
         """
@@ -146,7 +419,7 @@ class ConfigManager:
         Returns:
             Dictionary containing paths configuration
         """
-        return self.config_data['paths']
+        return ConfigSection(self, 'paths')
     
     def get_logging_config(self) -> dict:
         """
@@ -155,7 +428,7 @@ class ConfigManager:
         Returns:
             Dictionary containing logging configuration
         """
-        return self.config_data['logging']
+        return ConfigSection(self, 'logging')
     
     def get_security_config(self) -> dict:
         """
@@ -164,7 +437,97 @@ class ConfigManager:
         Returns:
             Dictionary containing security configuration
         """
-        return self.config_data['security']
+        return ConfigSection(self, 'security')
+    
+    def get_firewall_config(self) -> dict:
+        """
+        Get firewall kill switch configuration parameters.
+        
+        Returns:
+            Dictionary containing firewall configuration
+        """
+        return ConfigSection(self, 'firewall')
+    
+    def get_health_config(self) -> dict:
+        """
+        Get in-session health monitoring parameters.
+        
+        Returns:
+            Dictionary containing health monitor configuration
+        """
+        return ConfigSection(self, 'health')
+    
+    def get_multi_tunnel_config(self) -> dict:
+        """
+        Get multi-tunnel (network namespace) configuration parameters.
+        
+        Returns:
+            Dictionary containing multi-tunnel configuration
+        """
+        return ConfigSection(self, 'multi_tunnel')
+    
+    def get_selection_config(self) -> dict:
+        """
+        Get server selection configuration parameters.
+        
+        Returns:
+            Dictionary containing server selection configuration
+        """
+        return ConfigSection(self, 'selection')
+    
+    def get_benchmark_config(self) -> dict:
+        """
+        Get throughput benchmark configuration parameters.
+        
+        Returns:
+            Dictionary containing benchmark configuration
+        """
+        return ConfigSection(self, 'benchmark')
+    
+    def get_metrics_config(self) -> dict:
+        """
+        Get metrics endpoint configuration parameters.
+        
+        Returns:
+            Dictionary containing metrics configuration
+        """
+        return ConfigSection(self, 'metrics')
+    
+    def get_rotation_config(self) -> dict:
+        """
+        Get rotation policy configuration parameters.
+        
+        Returns:
+            Dictionary containing rotation policy configuration
+        """
+        return ConfigSection(self, 'rotation')
+    
+    def get_daemon_config(self) -> dict:
+        """
+        Get daemon mode and control socket configuration parameters.
+        
+        Returns:
+            Dictionary containing daemon configuration
+        """
+        return ConfigSection(self, 'daemon')
+    
+    def get_dns_config(self) -> dict:
+        """
+        Get remote pre-resolution configuration parameters.
+        
+        Returns:
+            Dictionary containing DNS configuration
+        """
+        return ConfigSection(self, 'dns')
+    
+    def get_warm_start_config(self) -> dict:
+        """
+        Get rotation state persistence configuration parameters.
+        
+        Returns:
+            Dictionary containing warm start configuration
+        """
+        return ConfigSection(self, 'warm_start')
     
     def get_cooldown_seconds(self) -> int:
         """
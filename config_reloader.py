@@ -0,0 +1,172 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import threading
+import time
+from typing import Optional
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+EVENT_HEADER = struct.Struct("iIII")
+
+SETTLE_DELAY = 0.2
+
+
+def open_inotify(directory: str) -> Optional[int]:
+    """
+    Watch a directory for files being written or renamed into place.
+    
+    Args:
+        directory: Directory to watch
+    
+    Returns:
+        inotify file descriptor, or None if inotify is unavailable
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    
+    mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def read_event_names(fd: int) -> set:
+    """
+    Read the pending inotify events.
+    
+    Args:
+        fd: inotify file descriptor
+    
+    Returns:
+        Names of the files the events refer to
+    """
+    names = set()
+    while True:
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            names.add(data[offset:offset + length].rstrip(b"\0").decode(errors="replace"))
+            offset += length
+
+
+class ConfigReloader:
+    """
+    Reloads the configuration file when it changes or on SIGHUP.
+    
+    A background thread watches the configuration directory with inotify
+    (or polls the file's modification time where inotify is unavailable)
+    and asks ConfigManager to validate and stage the new file. The
+    running components switch to it at the next safe point, so a reload
+    never interrupts the active tunnel.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the reloader.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.config_path = config_manager.config_path.resolve()
+        self.requested = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.inotify_fd = None
+    
+    def start(self):
+        """
+        Install the SIGHUP handler and start watching the configuration file.
+        """
+        if threading.current_thread() is threading.main_thread() and hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.requested.set())
+        
+        self.inotify_fd = open_inotify(str(self.config_path.parent))
+        if self.inotify_fd is None:
+            self.logger.debug("inotify unavailable, polling the configuration file")
+        
+        self.thread = threading.Thread(target=self.run, name="config-reloader", daemon=True)
+        self.thread.start()
+        self.logger.debug(f"Watching {self.config_path} for changes")
+    
+    def stop(self):
+        """
+        Stop watching the configuration file.
+        """
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
+    
+    def get_mtime(self) -> Optional[int]:
+        """
+        Get the modification time of the configuration file.
+        
+        Returns:
+            Modification time in nanoseconds, or None if the file is missing
+        """
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+    
+    def wait_for_change(self, last_mtime: Optional[int]) -> bool:
+        """
+        Wait up to one second for the configuration file to change.
+        
+        Args:
+            last_mtime: Modification time seen by the previous poll
+        
+        Returns:
+            True if the file changed, False otherwise
+        """
+        if self.inotify_fd is None:
+            self.stop_event.wait(1)
+            return self.get_mtime() != last_mtime
+        
+        readable, _, _ = select.select([self.inotify_fd], [], [], 1)
+        return bool(readable) and self.config_path.name in read_event_names(self.inotify_fd)
+    
+    def run(self):
+        """
+        Stage a reload whenever the file changes or SIGHUP is received.
+        """
+        last_mtime = self.get_mtime()
+        
+        while not self.stop_event.is_set():
+            changed = self.wait_for_change(last_mtime)
+            if not changed and not self.requested.is_set():
+                continue
+            
+            # Editors write in several steps; let the file settle before reading it
+            time.sleep(SETTLE_DELAY)
+            if self.inotify_fd is not None:
+                read_event_names(self.inotify_fd)
+            
+            self.requested.clear()
+            last_mtime = self.get_mtime()
+            self.config_manager.request_reload()
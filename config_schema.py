@@ -0,0 +1,324 @@
+from types import MappingProxyType
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+
+NUMBER = (int, float)
+
+
+class Field(NamedTuple):
+    """
+    Expected type and bounds of a configuration value.
+    """
+    types: Tuple[type, ...]
+    required: bool = False
+    minimum: Optional[float] = None
+    choices: Optional[Tuple[Any, ...]] = None
+    nullable: bool = False
+
+
+REQUIRED_SECTIONS = ['network', 'session', 'services', 'paths', 'logging', 'security']
+
+SCHEMA = {
+    "network": {
+        "connection_timeout": Field(NUMBER, minimum=0),
+        "vpn_establish_wait": Field(NUMBER, required=True, minimum=0),
+        "ip_check_retries": Field((int,), minimum=1),
+        "ip_check_timeout": Field(NUMBER, minimum=0),
+        "ip_check_quorum": Field((int,), minimum=1),
+        "ip_check_hedge_delay": Field(NUMBER, minimum=0),
+        "ip_check_retry_delay": Field(NUMBER, minimum=0),
+        "ip_check_providers": Field((list,), nullable=True),
+        "management_interface": Field((bool,)),
+        "management_connect_timeout": Field(NUMBER, minimum=0),
+        "tun_device_prefix": Field((str,)),
+        "underlay_interface": Field((str,)),
+        "http_pool_size": Field((int,), minimum=1),
+        "process_stop_timeout": Field(NUMBER, minimum=0),
+        "connect_deadline": Field(NUMBER, minimum=0),
+    },
+    "session": {
+        "cooldown_seconds": Field(NUMBER, required=True, minimum=0),
+        "max_connection_failures": Field((int,), required=True, minimum=1),
+        "kill_switch_enabled": Field((bool,), required=True),
+        "rotation_mode": Field((str,), choices=("break-before-make", "make-before-break")),
+        "supervisor": Field((str,)),
+    },
+    "services": {
+        "transmission_service": Field((str,), required=True),
+        "openvpn_service": Field((str,)),
+        "control_backend": Field((str,), choices=("auto", "systemd", "command")),
+        "control_timeout": Field(NUMBER, minimum=0),
+    },
+    "transmission": {
+        "control": Field((str,), choices=("service", "rpc")),
+        "rpc_url": Field((str,)),
+        "rpc_username": Field((str,)),
+        "rpc_password": Field((str,)),
+        "pause_mode": Field((str,), choices=("stop", "alt-speed")),
+        "bind_to_tunnel": Field((bool,)),
+        "peer_port": Field((int,), minimum=1, nullable=True),
+        "timeout": Field(NUMBER, minimum=0),
+    },
+    "paths": {
+        "ovpn_directory": Field((str,), required=True),
+        "log_file": Field((str,), required=True),
+        "temp_directory": Field((str,), required=True),
+        "catalog_cache": Field((str,)),
+        "dns_cache": Field((str,)),
+        "state_file": Field((str,)),
+        "history_database": Field((str,)),
+    },
+    "logging": {
+        "level": Field((str,), required=True),
+        "rotation": Field((str,), required=True),
+        "retention": Field((str,), required=True),
+        "format": Field((str,), required=True),
+        "file_format": Field((str,), choices=("json", "text")),
+    },
+    "security": {
+        "clear_credentials_on_exit": Field((bool,), required=True),
+        "secure_temp_files": Field((bool,)),
+        "verify_ip_change": Field((bool,)),
+        "verification_mode": Field((str,), choices=("local", "external", "both")),
+        "external_ip_check_interval": Field(NUMBER, minimum=0),
+        "route_probe_address": Field((str,)),
+    },
+    "health": {
+        "interval": Field(NUMBER, minimum=0),
+        "state_interval": Field(NUMBER, minimum=0),
+        "failure_grace": Field(NUMBER, minimum=0),
+        "stall_seconds": Field(NUMBER, minimum=0),
+        "ip_check_interval": Field(NUMBER, minimum=0),
+        "on_failure": Field((str,), choices=("rotate", "kill_switch")),
+    },
+    "multi_tunnel": {
+        "exits": Field((int,), minimum=1),
+        "namespace_prefix": Field((str,)),
+        "subnet": Field((str,)),
+        "nameservers": Field((list,)),
+        "worker_command": Field((list,)),
+        "stagger": Field((bool,)),
+    },
+    "firewall": {
+        "backend": Field((str,), choices=("none", "nftables")),
+        "table": Field((str,)),
+        "allow_lan": Field((bool,)),
+        "allow_dns": Field((bool,)),
+        "allow_dhcp": Field((bool,)),
+        "remove_on_exit": Field((bool,)),
+    },
+    "selection": {
+        "strategy": Field((str,), choices=("latency", "random", "thompson", "ucb")),
+        "latency_exponent": Field(NUMBER, minimum=0),
+        "ucb_exploration": Field(NUMBER, minimum=0),
+        "probe_timeout": Field(NUMBER, minimum=0),
+        "probe_samples": Field((int,), minimum=1),
+        "probe_workers": Field((int,), minimum=1),
+        "probe_max_age": Field(NUMBER, minimum=0),
+        "skip_unreachable": Field((bool,)),
+    },
+    "benchmark": {
+        "download_url": Field((str,)),
+        "upload_url": Field((str,)),
+        "rtt_samples": Field((int,), minimum=1),
+        "download_bytes": Field((int,), minimum=1),
+        "upload_bytes": Field((int,), minimum=1),
+        "timeout": Field(NUMBER, minimum=0),
+        "output_file": Field((str,)),
+    },
+    "metrics": {
+        "enabled": Field((bool,)),
+        "listen_address": Field((str,)),
+        "port": Field((int,), minimum=1),
+    },
+    "rotation": {
+        "policy": Field((str,), choices=("fixed", "bytes", "degraded", "idle")),
+        "jitter_seconds": Field(NUMBER, minimum=0),
+        "max_bytes": Field((int,), minimum=1),
+        "min_throughput": Field(NUMBER, minimum=0),
+        "max_rtt": Field(NUMBER, minimum=0),
+        "degraded_window": Field(NUMBER, minimum=0),
+        "rtt_url": Field((str,)),
+        "rtt_interval": Field(NUMBER, minimum=0),
+        "rtt_timeout": Field(NUMBER, minimum=0),
+        "idle_threshold": Field(NUMBER, minimum=0),
+        "idle_seconds": Field(NUMBER, minimum=0),
+        "max_session_seconds": Field(NUMBER, minimum=0),
+    },
+    "daemon": {
+        "enabled": Field((bool,)),
+        "credentials_fd": Field((int,), minimum=0, nullable=True),
+        "credentials_file": Field((str,)),
+        "control_socket": Field((str,)),
+        "control_interactive": Field((bool,)),
+    },
+    "dns": {
+        "pre_resolve": Field((bool,)),
+        "default_ttl": Field((int,), minimum=0),
+        "min_ttl": Field((int,), minimum=0),
+        "max_ttl": Field((int,), minimum=0),
+        "timeout": Field(NUMBER, minimum=0),
+        "workers": Field((int,), minimum=1),
+    },
+    "warm_start": {
+        "enabled": Field((bool,)),
+        "resume_max_age": Field(NUMBER, minimum=0),
+        "initial_ip_max_age": Field(NUMBER, minimum=0),
+    },
+}
+
+# Values read once at startup: a change is only applied after a restart
+RESTART_REQUIRED = {
+    "paths": None,
+    "logging": ("rotation", "retention", "format", "file_format"),
+    "metrics": None,
+    "daemon": None,
+    "warm_start": ("enabled",),
+    "multi_tunnel": None,
+    "firewall": ("backend", "table"),
+    "session": ("rotation_mode", "supervisor"),
+    "network": ("tun_device_prefix", "http_pool_size", "ip_check_providers"),
+    "services": ("control_backend",),
+    "transmission": ("rpc_url", "rpc_username", "rpc_password"),
+}
+
+
+def check_value(field: Field, value: Any) -> Optional[str]:
+    """
+    Check one value against its field.
+    
+    Args:
+        field: Expected type and bounds
+        value: Configured value
+    
+    Returns:
+        Description of the problem, or None if the value is valid
+    """
+    if value is None:
+        return None if field.nullable else "must not be null"
+    
+    # bool is a subclass of int, but true is never a valid timeout
+    if isinstance(value, bool) and bool not in field.types:
+        return f"expected {'/'.join(t.__name__ for t in field.types)}, got bool"
+    if not isinstance(value, field.types):
+        return f"expected {'/'.join(t.__name__ for t in field.types)}, got {type(value).__name__}"
+    
+    if field.minimum is not None and value < field.minimum:
+        return f"must be at least {field.minimum}"
+    if field.choices is not None and value not in field.choices:
+        return f"must be one of {', '.join(map(str, field.choices))}"
+    return None
+
+
+def validate_config(data: dict) -> List[str]:
+    """
+    Validate configuration data against the schema.
+    
+    Unknown sections and keys are accepted, so newer configuration files
+    keep working with older code.
+    
+    Args:
+        data: Parsed configuration file
+    
+    Returns:
+        List of problems, empty if the configuration is valid
+    """
+    if not isinstance(data, dict):
+        return ["configuration must be a JSON object"]
+    
+    errors = [f"missing required section: {section}" for section in REQUIRED_SECTIONS if section not in data]
+    
+    for section, fields in SCHEMA.items():
+        values = data.get(section)
+        if values is None:
+            continue
+        if not isinstance(values, dict):
+            errors.append(f"{section}: expected an object")
+            continue
+        
+        for key, field in fields.items():
+            if key not in values:
+                if field.required:
+                    errors.append(f"{section}.{key}: missing required value")
+                continue
+            problem = check_value(field, values[key])
+            if problem:
+                errors.append(f"{section}.{key}: {problem}")
+    
+    if not errors:
+        errors.extend(check_combinations(data))
+    return errors
+
+
+def check_combinations(data: dict) -> List[str]:
+    """
+    Check the values that depend on each other, once every value is valid on its own.
+    
+    Args:
+        data: Parsed configuration file
+    
+    Returns:
+        List of problems, empty if the values are consistent
+    """
+    errors = []
+    
+    network = data.get("network", {})
+    providers = network.get("ip_check_providers")
+    if providers is not None:
+        if not providers:
+            errors.append("network.ip_check_providers: needs at least one provider")
+        elif not all(isinstance(url, str) and url.startswith(("http://", "https://")) for url in providers):
+            errors.append("network.ip_check_providers: expected a list of http(s) URLs")
+        elif network.get("ip_check_quorum", 1) > len(providers):
+            errors.append(f"network.ip_check_quorum: cannot exceed the {len(providers)} ip_check_providers")
+    
+    transmission = data.get("transmission", {})
+    firewall = data.get("firewall", {})
+    if transmission.get("control", "service") == "rpc" and firewall.get("backend", "none") != "nftables":
+        # The daemon stays up between tunnels; only the firewall keeps it off the underlay
+        errors.append('transmission.control: "rpc" requires firewall.backend "nftables"')
+    
+    rotation = data.get("rotation", {})
+    if rotation.get("policy", "fixed") == "degraded" and not (
+            rotation.get("min_throughput", 0) or rotation.get("max_rtt", 0)):
+        errors.append('rotation.policy: "degraded" requires min_throughput or max_rtt above 0')
+    
+    return errors
+
+
+def freeze(value: Any) -> Any:
+    """
+    Make a parsed JSON value immutable.
+    
+    Args:
+        value: Parsed JSON value
+    
+    Returns:
+        The value with objects as read-only mappings and arrays as tuples
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def find_restart_changes(old: dict, new: dict) -> List[str]:
+    """
+    List the changed values that only take effect after a restart.
+    
+    Args:
+        old: Current configuration snapshot
+        new: Reloaded configuration snapshot
+    
+    Returns:
+        Dotted names of the changed restart-only values
+    """
+    changes = []
+    for section, keys in RESTART_REQUIRED.items():
+        old_values = old.get(section, {})
+        new_values = new.get(section, {})
+        for key in keys or set(old_values) | set(new_values):
+            if old_values.get(key) != new_values.get(key):
+                changes.append(f"{section}.{key}")
+    return sorted(changes)
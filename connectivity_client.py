@@ -0,0 +1,396 @@
+import base64
+import json
+import socket
+import subprocess
+import sys
+import threading
+from typing import List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+
+PATH_DEFAULT = "default"
+PATH_TUNNEL = "tunnel"
+PATH_UNDERLAY = "underlay"
+
+SO_BINDTODEVICE = getattr(socket, "SO_BINDTODEVICE", 25)
+
+
+class InterfaceBoundAdapter(HTTPAdapter):
+    """
+    HTTP adapter whose pooled connections are bound to a device or source address.
+    """
+    
+    def __init__(self, interface: Optional[str] = None, source_address: Optional[str] = None, **kwargs):
+        """
+        Initialize the adapter.
+        
+        Args:
+            interface: Network device the sockets are bound to
+            source_address: Local address the sockets are bound to
+            **kwargs: Pool sizing arguments passed to HTTPAdapter
+        """
+        self.interface = interface
+        self.source_address = source_address
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        """
+        Create the pool manager with the binding socket options.
+        """
+        if self.interface:
+            pool_kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, SO_BINDTODEVICE, self.interface.encode())
+            ]
+        if self.source_address:
+            pool_kwargs['source_address'] = (self.source_address, 0)
+        
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+
+class ConnectivityClient:
+    """
+    Shared keep-alive HTTP client for connectivity checks.
+    
+    Each network path (default route, tunnel, underlay) has its own pooled
+    session so a check always measures the path it asks for. Sessions are
+    created lazily and dropped whenever a binding changes, so no pooled
+    connection outlives the route it was opened on.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the connectivity client.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.network_config = config_manager.get_network_config()
+        self.bindings = {
+            PATH_DEFAULT: (None, None),
+            PATH_TUNNEL: (None, None),
+            PATH_UNDERLAY: (self.network_config.get('underlay_interface') or None, None),
+        }
+        self.sessions = {}
+        self.lock = threading.Lock()
+    
+    def create_session(self, path: str) -> requests.Session:
+        """
+        Create a pooled session bound according to the given path.
+        
+        Args:
+            path: One of PATH_DEFAULT, PATH_TUNNEL or PATH_UNDERLAY
+        
+        Returns:
+            New requests session
+        """
+        interface, source_address = self.bindings[path]
+        pool_size = self.network_config.get('http_pool_size', 8)
+        
+        adapter = InterfaceBoundAdapter(
+            interface=interface,
+            source_address=source_address,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size
+        )
+        
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def get_session(self, path: str) -> requests.Session:
+        """
+        Get the pooled session for a path, creating it if needed.
+        
+        Args:
+            path: One of PATH_DEFAULT, PATH_TUNNEL or PATH_UNDERLAY
+        
+        Returns:
+            Pooled requests session
+        
+        Raises:
+            ValueError: If the tunnel path is requested while no tunnel is bound
+        """
+        if path == PATH_TUNNEL and self.bindings[PATH_TUNNEL] == (None, None):
+            raise ValueError("No tunnel interface bound for connectivity checks")
+        
+        with self.lock:
+            session = self.sessions.get(path)
+            if session is None:
+                session = self.create_session(path)
+                self.sessions[path] = session
+            return session
+    
+    def get(self, url: str, timeout: float, path: str = PATH_DEFAULT) -> requests.Response:
+        """
+        Perform a GET request through the given network path.
+        
+        Args:
+            url: URL to fetch
+            timeout: Request timeout in seconds
+            path: One of PATH_DEFAULT, PATH_TUNNEL or PATH_UNDERLAY
+        
+        Returns:
+            The HTTP response
+        """
+        return self.get_session(path).get(url, timeout=timeout)
+    
+    def bind_tunnel(self, interface: str, source_address: Optional[str] = None):
+        """
+        Bind tunnel checks to a tun device and drop every pooled connection.
+        
+        Args:
+            interface: Name of the tun device
+            source_address: Address assigned to the tun device
+        """
+        self.bindings[PATH_TUNNEL] = (interface, source_address or None)
+        self.logger.debug(f"Connectivity checks via tunnel bound to {interface}")
+        self.reset()
+    
+    def unbind_tunnel(self):
+        """
+        Forget the tunnel binding and drop every pooled connection.
+        """
+        self.bindings[PATH_TUNNEL] = (None, None)
+        self.reset()
+    
+    def bind_underlay(self, interface: str, source_address: Optional[str] = None):
+        """
+        Bind underlay checks to the physical interface.
+        
+        Args:
+            interface: Name of the underlay device
+            source_address: Address assigned to the underlay device
+        """
+        if self.bindings[PATH_UNDERLAY] == (interface, source_address):
+            return
+        
+        self.bindings[PATH_UNDERLAY] = (interface, source_address)
+        self.logger.debug(f"Connectivity checks via underlay bound to {interface}")
+        with self.lock:
+            session = self.sessions.pop(PATH_UNDERLAY, None)
+        if session:
+            session.close()
+    
+    def get_interface(self, path: str) -> Optional[str]:
+        """
+        Get the network device a path is bound to.
+        
+        Args:
+            path: One of PATH_DEFAULT, PATH_TUNNEL or PATH_UNDERLAY
+        
+        Returns:
+            Device name, or None if the path follows the routing table
+        """
+        return self.bindings[path][0]
+    
+    def has_tunnel(self) -> bool:
+        """
+        Check whether a tunnel binding is set.
+        
+        Returns:
+            True if tunnel checks are possible, False otherwise
+        """
+        return self.bindings[PATH_TUNNEL] != (None, None)
+    
+    def reset(self):
+        """
+        Close every pooled session; they are rebuilt on next use.
+        """
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        
+        for session in sessions:
+            session.close()
+
+
+# Long-lived helper run by NamespaceClient inside the namespace. It reads one JSON
+# request per line and answers each from its own thread through a pooled session.
+NAMESPACE_HELPER_SCRIPT = """
+import base64
+import json
+import sys
+import threading
+
+import requests
+
+session = requests.Session()
+output_lock = threading.Lock()
+
+
+def fetch(request):
+    try:
+        response = session.get(request["url"], timeout=request["timeout"])
+        reply = {"id": request["id"], "status": response.status_code,
+                 "body": base64.b64encode(response.content).decode()}
+    except Exception as e:
+        reply = {"id": request["id"], "error": str(e)}
+    with output_lock:
+        sys.stdout.write(json.dumps(reply) + "\\n")
+        sys.stdout.flush()
+
+
+for line in sys.stdin:
+    threading.Thread(target=fetch, args=(json.loads(line),), daemon=True).start()
+"""
+
+
+class NamespaceClient:
+    """
+    HTTP client whose requests are made from inside a network namespace.
+    
+    Requests are handed to one long-lived Python helper started with
+    "ip netns exec", which keeps a pooled session, so both the connections
+    and the name resolution (with the namespace's own resolv.conf) use the
+    namespace's routes. Requests run concurrently in the helper. Like the
+    sessions of ConnectivityClient, the helper is dropped by reset() when
+    the namespace's tunnel changes, and restarted on next use. It offers
+    the get() of ConnectivityClient; the path argument is ignored, since
+    the namespace has a single route out.
+    """
+    
+    def __init__(self, namespace: str):
+        """
+        Initialize the client.
+        
+        Args:
+            namespace: Network namespace name
+        """
+        self.namespace = namespace
+        self.process = None
+        self.pending = {}
+        self.next_id = 0
+        self.lock = threading.Lock()
+    
+    def get_helper_command(self) -> List[str]:
+        """
+        Get the command starting the helper inside the namespace.
+        
+        Returns:
+            Command as a list of arguments
+        """
+        return ["ip", "netns", "exec", self.namespace, sys.executable, "-c", NAMESPACE_HELPER_SCRIPT]
+    
+    def start_helper(self):
+        """
+        Start the helper and the thread reading its answers, unless it is running.
+        
+        Must be called with the lock held.
+        
+        Raises:
+            OSError: If the helper cannot be started
+        """
+        if self.process and self.process.poll() is None:
+            return
+        
+        self.process = subprocess.Popen(
+            self.get_helper_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+        threading.Thread(
+            target=self.read_replies, args=(self.process,), name=f"netns-http-{self.namespace}", daemon=True
+        ).start()
+    
+    def read_replies(self, process: subprocess.Popen):
+        """
+        Hand each answer of the helper to the request waiting for it, until the helper exits.
+        
+        Args:
+            process: Helper process
+        """
+        for line in process.stdout:
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                continue
+            with self.lock:
+                waiter = self.pending.pop(reply.get("id"), None)
+            if waiter:
+                waiter[1] = reply
+                waiter[0].set()
+        
+        with self.lock:
+            if self.process is not process:
+                return
+            waiters = list(self.pending.values())
+            self.pending.clear()
+        for waiter in waiters:
+            waiter[1] = {"error": "namespace helper exited"}
+            waiter[0].set()
+    
+    def get(self, url: str, timeout: float, path: str = PATH_DEFAULT) -> requests.Response:
+        """
+        Perform a GET request from inside the namespace.
+        
+        Args:
+            url: URL to fetch
+            timeout: Request timeout in seconds
+            path: Ignored
+        
+        Returns:
+            The HTTP response
+        
+        Raises:
+            requests.ConnectionError: If the request failed or the helper could not run
+        """
+        waiter = [threading.Event(), None]
+        with self.lock:
+            try:
+                self.start_helper()
+                self.next_id += 1
+                request_id = self.next_id
+                self.pending[request_id] = waiter
+                self.process.stdin.write(json.dumps({"id": request_id, "url": url, "timeout": timeout}) + "\n")
+                self.process.stdin.flush()
+            except OSError as e:
+                self.pending.pop(self.next_id, None)
+                raise requests.ConnectionError(f"{url} from {self.namespace}: {e}") from e
+        
+        if not waiter[0].wait(timeout + 5):
+            with self.lock:
+                self.pending.pop(request_id, None)
+            raise requests.ConnectionError(f"{url} from {self.namespace}: no answer from the namespace helper")
+        
+        reply = waiter[1]
+        if "error" in reply:
+            raise requests.ConnectionError(f"{url} from {self.namespace}: {reply['error']}")
+        
+        response = requests.Response()
+        response.status_code = reply["status"]
+        response.url = url
+        response._content = base64.b64decode(reply["body"])
+        response.encoding = "utf-8"
+        return response
+    
+    def reset(self):
+        """
+        Stop the helper, dropping its pooled connections; it is restarted on next use.
+        """
+        with self.lock:
+            process = self.process
+            self.process = None
+            waiters = list(self.pending.values())
+            self.pending.clear()
+        
+        for waiter in waiters:
+            waiter[1] = {"error": "namespace helper stopped"}
+            waiter[0].set()
+        
+        if process and process.poll() is None:
+            process.stdin.close()
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
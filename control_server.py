@@ -0,0 +1,273 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+DEFAULT_CONTROL_SOCKET = "/run/cyclevpn/control.sock"
+
+COMMANDS = ("status", "rotate-now", "pin", "unpin", "pause", "resume")
+
+PEER_CREDENTIALS = struct.Struct("3i")
+SO_PEERCRED = getattr(socket, "SO_PEERCRED", 17)
+
+
+class ControlRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Answers one command line with one JSON line.
+    """
+    
+    control_server = None
+    
+    def handle(self):
+        """
+        Read the command, run it and send the result.
+        """
+        if not self.control_server.is_peer_allowed(self.request):
+            self.send({"ok": False, "error": "permission denied"})
+            return
+        
+        line = self.rfile.readline(4096).decode(errors="replace").strip()
+        if line:
+            self.send(self.control_server.execute(line))
+    
+    def send(self, response: dict):
+        """
+        Write a JSON response line.
+        
+        Args:
+            response: Response object
+        """
+        try:
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class ControlServer:
+    """
+    Local control API of a running CycleVPN, on a Unix socket.
+    
+    Each connection sends one command line and receives one JSON object
+    with an "ok" field:
+        
+        status            current server, tunnel, traffic and control state
+        rotate-now        end the current session and connect to the next server
+        pin <server>      connect to a server now and stay on it
+        unpin             rotate normally again
+        pause             keep the current server until resumed
+        resume            let the rotation policy end sessions again
+    
+    The socket is created with mode 0600 and only root or the user
+    running CycleVPN may connect, checked with SO_PEERCRED.
+    """
+    
+    def __init__(self, config_manager, logger_manager, vpn_manager):
+        """
+        Initialize the control server.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            vpn_manager: Instance of VPNManager
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.vpn_manager = vpn_manager
+        self.control = vpn_manager.control
+        self.daemon_config = config_manager.get_daemon_config()
+        self.socket_path = Path(self.daemon_config.get('control_socket', DEFAULT_CONTROL_SOCKET))
+        self.multi_tunnel = None
+        self.server = None
+        self.thread = None
+    
+    def start(self) -> bool:
+        """
+        Listen on the control socket in a background thread, if configured.
+        
+        Returns:
+            True if the socket is listening or disabled, False if it failed to start
+        """
+        if not self.daemon_config.get('control_socket', DEFAULT_CONTROL_SOCKET) or self.server:
+            return True
+        
+        handler = type("BoundControlRequestHandler", (ControlRequestHandler,), {"control_server": self})
+        try:
+            self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            self.remove_stale_socket()
+            self.server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), handler)
+            os.chmod(self.socket_path, 0o600)
+        except OSError as e:
+            self.logger.error(f"Failed to open control socket {self.socket_path}: {e}")
+            if self.server:
+                self.server.server_close()
+                self.server = None
+            return False
+        
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="control", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Control socket listening on {self.socket_path}")
+        return True
+    
+    def stop(self):
+        """
+        Stop serving and remove the socket file.
+        """
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+    
+    def remove_stale_socket(self):
+        """
+        Remove a socket file left by a process that is no longer running.
+        
+        Raises:
+            OSError: If another instance is listening on the socket
+        """
+        try:
+            mode = os.lstat(self.socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{self.socket_path} exists and is not a socket")
+        
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.socket_path))
+        except (ConnectionRefusedError, FileNotFoundError):
+            self.socket_path.unlink()
+            return
+        finally:
+            probe.close()
+        raise OSError(f"another CycleVPN instance is listening on {self.socket_path}")
+    
+    def is_peer_allowed(self, connection: socket.socket) -> bool:
+        """
+        Check that the connecting process runs as root or as our own user.
+        
+        Args:
+            connection: Accepted Unix socket
+        
+        Returns:
+            True if the peer may send commands, False otherwise
+        """
+        try:
+            _, uid, _ = PEER_CREDENTIALS.unpack(
+                connection.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, PEER_CREDENTIALS.size)
+            )
+        except OSError as e:
+            self.logger.warning(f"Rejected control connection without peer credentials: {e}")
+            return False
+        return uid in (0, os.getuid())
+    
+    def execute(self, line: str) -> dict:
+        """
+        Run a command line.
+        
+        Args:
+            line: Command name and arguments, separated by spaces
+        
+        Returns:
+            Response object with "ok" and either the result or an "error"
+        """
+        parts = line.split()
+        if not parts or parts[0] not in COMMANDS:
+            return {"ok": False, "error": f"unknown command, expected one of: {', '.join(COMMANDS)}"}
+        
+        command, arguments = parts[0], parts[1:]
+        if command != "status":
+            self.logger.info(f"Control command received: {line}", phase="control")
+        
+        if command == "status":
+            return {"ok": True, **self.get_status()}
+        if command == "rotate-now":
+            return {"ok": True, "rotated": self.control.request_rotation()}
+        if command == "pin":
+            return self.pin(arguments[0] if arguments else None)
+        if command == "unpin":
+            self.control.pin(None)
+            return {"ok": True}
+        if command == "pause":
+            self.control.pause()
+            return {"ok": True}
+        
+        self.control.resume()
+        return {"ok": True}
+    
+    def pin(self, ovpn_file: Optional[str]) -> dict:
+        """
+        Pin a server and switch to it unless it is already in use.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+        
+        Returns:
+            Response object
+        """
+        if not ovpn_file:
+            return {"ok": False, "error": "usage: pin <server>"}
+        if self.multi_tunnel:
+            return {"ok": False, "error": "pin is not available with multiple exits"}
+        if not self.vpn_manager.catalog.get(ovpn_file):
+            return {"ok": False, "error": f"unknown server: {ovpn_file}"}
+        
+        self.control.pin(ovpn_file)
+        rotated = 0
+        if self.vpn_manager.current_ovpn_file != ovpn_file:
+            rotated = self.control.request_rotation()
+        return {"ok": True, "pinned": ovpn_file, "rotated": rotated}
+    
+    def get_status(self) -> dict:
+        """
+        Collect the state reported by the status command.
+        
+        Returns:
+            Status object
+        """
+        status = {
+            "paused": self.control.paused,
+            "pinned": self.control.pinned,
+            "policy": self.config_manager.get_rotation_config().get('policy', 'fixed'),
+            "firewall_active": self.vpn_manager.kill_switch.firewall.active,
+        }
+        if self.multi_tunnel:
+            status["exits"] = self.multi_tunnel.get_status()
+        else:
+            status.update(self.vpn_manager.get_status())
+        return status
+
+
+def send_command(socket_path: str, command: str, timeout: float = 60) -> dict:
+    """
+    Send a command to a running CycleVPN and wait for its answer.
+    
+    Args:
+        socket_path: Path of the control socket
+        command: Command line, e.g. "pin france.ovpn"
+        timeout: Maximum wait for the answer in seconds
+    
+    Returns:
+        Response object
+    
+    Raises:
+        OSError: If the socket cannot be reached
+        ValueError: If the answer is not valid JSON
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+        connection.sendall(command.encode() + b"\n")
+        with connection.makefile("rb") as reader:
+            return json.loads(reader.readline())
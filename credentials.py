@@ -0,0 +1,136 @@
+import os
+import stat
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+USERNAME_ENV = "CYCLEVPN_USERNAME"
+PASSWORD_ENV = "CYCLEVPN_PASSWORD"
+SYSTEMD_CREDENTIAL = "cyclevpn"
+
+
+def parse_credentials(text: str) -> Optional[Tuple[str, str]]:
+    """
+    Parse credentials in the OpenVPN auth-user-pass format.
+    
+    Args:
+        text: Username on the first line, password on the second
+    
+    Returns:
+        Tuple of (username, password), or None if either is missing
+    """
+    lines = text.splitlines()
+    if len(lines) < 2 or not lines[0].strip() or not lines[1]:
+        return None
+    return lines[0].strip(), lines[1]
+
+
+class CredentialLoader:
+    """
+    Reads the VPN credentials without a terminal, for unattended starts.
+    
+    The sources are tried in order: an inherited file descriptor, a
+    secret file, the systemd credential named "cyclevpn"
+    (LoadCredential=), then the CYCLEVPN_USERNAME and CYCLEVPN_PASSWORD
+    environment variables, which are removed from the environment once
+    read. Files and descriptors use the auth-user-pass format: the
+    username on the first line and the password on the second.
+    """
+    
+    def __init__(self, config_manager, logger_manager, credentials_fd: Optional[int] = None,
+                 credentials_file: Optional[str] = None):
+        """
+        Initialize the loader.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            credentials_fd: File descriptor given on the command line, overriding the configuration
+            credentials_file: Secret file given on the command line, overriding the configuration
+        """
+        self.logger = logger_manager
+        daemon_config = config_manager.get_daemon_config()
+        self.credentials_fd = credentials_fd if credentials_fd is not None else daemon_config.get('credentials_fd')
+        self.credentials_file = credentials_file or daemon_config.get('credentials_file') or None
+    
+    def load(self) -> Optional[Tuple[str, str]]:
+        """
+        Read the credentials from the first available source.
+        
+        Returns:
+            Tuple of (username, password), or None if no source provides them
+        
+        Raises:
+            ValueError: If a configured source is unreadable or malformed
+        """
+        if self.credentials_fd is not None:
+            return self.read_fd(self.credentials_fd)
+        
+        if self.credentials_file:
+            return self.read_file(Path(self.credentials_file))
+        
+        credentials_directory = os.environ.get("CREDENTIALS_DIRECTORY")
+        if credentials_directory and (Path(credentials_directory) / SYSTEMD_CREDENTIAL).exists():
+            return self.read_file(Path(credentials_directory) / SYSTEMD_CREDENTIAL)
+        
+        if USERNAME_ENV in os.environ and PASSWORD_ENV in os.environ:
+            username = os.environ.pop(USERNAME_ENV)
+            password = os.environ.pop(PASSWORD_ENV)
+            if not username or not password:
+                raise ValueError(f"{USERNAME_ENV} and {PASSWORD_ENV} must not be empty")
+            self.logger.info("Credentials read from the environment")
+            return username, password
+        
+        return None
+    
+    def read_fd(self, fd: int) -> Tuple[str, str]:
+        """
+        Read the credentials from an inherited file descriptor and close it.
+        
+        Args:
+            fd: Readable file descriptor, e.g. a pipe from the service manager
+        
+        Returns:
+            Tuple of (username, password)
+        
+        Raises:
+            ValueError: If the descriptor is unreadable or malformed
+        """
+        try:
+            with os.fdopen(fd, 'r', encoding='utf-8') as file:
+                credentials = parse_credentials(file.read())
+        except OSError as e:
+            raise ValueError(f"Cannot read credentials from file descriptor {fd}: {e}") from e
+        
+        if not credentials:
+            raise ValueError(f"File descriptor {fd} must provide a username and a password line")
+        self.logger.info(f"Credentials read from file descriptor {fd}")
+        return credentials
+    
+    def read_file(self, path: Path) -> Tuple[str, str]:
+        """
+        Read the credentials from a secret file.
+        
+        Args:
+            path: Secret file path
+        
+        Returns:
+            Tuple of (username, password)
+        
+        Raises:
+            ValueError: If the file is unreadable or malformed
+        """
+        try:
+            mode = path.stat().st_mode
+            text = path.read_text(encoding='utf-8')
+        except OSError as e:
+            raise ValueError(f"Cannot read credentials from {path}: {e}") from e
+        
+        if mode & (stat.S_IRWXG | stat.S_IRWXO):
+            self.logger.warning(f"Credentials file {path} is accessible to other users, restrict it with chmod 600")
+        
+        credentials = parse_credentials(text)
+        if not credentials:
+            raise ValueError(f"{path} must contain a username and a password line")
+        self.logger.info(f"Credentials read from {path}")
+        return credentials
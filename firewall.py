@@ -0,0 +1,188 @@
+import subprocess
+from typing import Callable, List, Optional, Tuple
+
+from remote_resolver import read_nameservers
+
+
+LAN_NETWORKS = ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "169.254.0.0/16"]
+
+
+def run_command(command: List[str], stdin: Optional[str] = None) -> Tuple[int, str]:
+    """
+    Run a command and return its exit status and error output.
+    
+    Args:
+        command: Command as a list of arguments
+        stdin: Optional text passed on standard input
+    
+    Returns:
+        Tuple of (return code, stderr text)
+    """
+    try:
+        result = subprocess.run(
+            command,
+            input=stdin,
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        return result.returncode, result.stderr.strip()
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return 1, str(e)
+
+
+class FirewallManager:
+    """
+    Fail-closed nftables kill switch.
+    
+    The whole ruleset lives in a dedicated table that is replaced in a
+    single "nft -f" transaction. Only loopback, the tun devices and the
+    current VPN server endpoints are allowed, so losing the tunnel can
+    never leak traffic onto the underlying network.
+    """
+    
+    def __init__(self, config_manager, logger_manager, executor: Callable = None):
+        """
+        Initialize the firewall manager.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            executor: Optional callable(command, stdin) -> (returncode, stderr),
+                used instead of running nft directly
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.firewall_config = config_manager.get_firewall_config()
+        self.network_config = config_manager.get_network_config()
+        self.executor = executor or run_command
+        self.resolv_conf = "/etc/resolv.conf"
+        self.table = self.firewall_config.get('table', 'cyclevpn')
+        self.active = False
+        self.endpoints = []
+    
+    def is_enabled(self) -> bool:
+        """
+        Check whether the nftables backend is configured.
+        
+        Returns:
+            True if the firewall kill switch should be used, False otherwise
+        """
+        return self.firewall_config.get('backend', 'none') == "nftables"
+    
+    def render_ruleset(self, endpoints: List[Tuple[str, int, str]]) -> str:
+        """
+        Generate the nftables ruleset for the given VPN server endpoints.
+        
+        Args:
+            endpoints: List of (address, port, proto) the tunnels may reach
+        
+        Returns:
+            Ruleset in nft syntax, replacing any previous CycleVPN table
+        """
+        tunnel_devices = f"{self.network_config.get('tun_device_prefix', 'cvpn')}*"
+        
+        output_rules = [
+            'oifname "lo" accept',
+            f'oifname "{tunnel_devices}" accept',
+        ]
+        input_rules = [
+            'iifname "lo" accept',
+            f'iifname "{tunnel_devices}" accept',
+        ]
+        
+        for address, port, proto in endpoints:
+            output_rules.append(f"ip daddr {address} {proto} dport {port} accept")
+            input_rules.append(f"ip saddr {address} {proto} sport {port} accept")
+        
+        if self.firewall_config.get('allow_lan', True):
+            networks = ", ".join(LAN_NETWORKS)
+            output_rules.append(f"ip daddr {{ {networks} }} accept")
+            input_rules.append(f"ip saddr {{ {networks} }} accept")
+        
+        if self.firewall_config.get('allow_dns', False):
+            # Only the configured resolvers, loopback ones are already covered by "lo"
+            nameservers = [address for address in read_nameservers(self.resolv_conf) if not address.startswith("127.")]
+            if nameservers:
+                resolvers = ", ".join(nameservers)
+                for proto in ("udp", "tcp"):
+                    output_rules.append(f"ip daddr {{ {resolvers} }} {proto} dport 53 accept")
+                    input_rules.append(f"ip saddr {{ {resolvers} }} {proto} sport 53 ct state established accept")
+        
+        if self.firewall_config.get('allow_dhcp', True):
+            output_rules.append("udp sport 68 udp dport 67 accept")
+            input_rules.append("udp sport 67 udp dport 68 accept")
+        
+        lines = [
+            f"table inet {self.table}",
+            f"delete table inet {self.table}",
+            f"table inet {self.table} {{",
+            "    chain output {",
+            "        type filter hook output priority 0; policy drop;",
+        ]
+        lines += [f"        {rule}" for rule in output_rules]
+        lines += [
+            "    }",
+            "    chain input {",
+            "        type filter hook input priority 0; policy drop;",
+        ]
+        lines += [f"        {rule}" for rule in input_rules]
+        lines += [
+            "    }",
+            "}",
+        ]
+        return "\n".join(lines) + "\n"
+    
+    def apply(self, endpoints: List[Tuple[str, int, str]]) -> bool:
+        """
+        Atomically replace the ruleset, allowing only the given endpoints.
+        
+        Args:
+            endpoints: List of (address, port, proto) the tunnels may reach
+        
+        Returns:
+            True if the ruleset is in place, False otherwise
+        """
+        ruleset = self.render_ruleset(endpoints)
+        returncode, stderr = self.executor(["nft", "-f", "-"], ruleset)
+        
+        if returncode != 0:
+            self.logger.error(f"Failed to apply firewall ruleset: {stderr}")
+            return False
+        
+        self.active = True
+        self.endpoints = list(endpoints)
+        allowed = ", ".join(f"{address}:{port}/{proto}" for address, port, proto in endpoints) or "none"
+        self.logger.debug(f"Firewall ruleset applied, allowed VPN endpoints: {allowed}")
+        return True
+    
+    def block_all(self) -> bool:
+        """
+        Block every VPN endpoint, leaving only loopback and tun devices open.
+        
+        Returns:
+            True if the blocking ruleset is in place, False otherwise
+        """
+        return self.apply([])
+    
+    def remove(self) -> bool:
+        """
+        Remove the CycleVPN table and restore normal connectivity.
+        
+        Returns:
+            True if the table was removed or did not exist, False otherwise
+        """
+        if not self.active:
+            return True
+        
+        ruleset = f"table inet {self.table}\ndelete table inet {self.table}\n"
+        returncode, stderr = self.executor(["nft", "-f", "-"], ruleset)
+        
+        if returncode != 0:
+            self.logger.error(f"Failed to remove firewall table: {stderr}")
+            return False
+        
+        self.active = False
+        self.endpoints = []
+        self.logger.info("Firewall kill switch removed")
+        return True
\ No newline at end of file
@@ -0,0 +1,260 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from rotation_policy import SessionSample
+
+
+FAILURE_LINK_DOWN = "link_down"
+FAILURE_OPENVPN_STATE = "openvpn_state"
+FAILURE_STALLED = "stalled"
+FAILURE_IP_LEAK = "ip_check"
+
+
+class HealthMonitor:
+    """
+    Background watchdog for the active tunnel during a session.
+    
+    Every interval it reads the tun device flags and byte counters from
+    sysfs (or procfs inside a namespace), which costs a few small file
+    reads; the OpenVPN state and the external IP are queried at their own,
+    lower rates. The tunnel counts as stalled when it keeps sending without
+    receiving anything back for stall_seconds. A failure has to persist for
+    failure_grace seconds before it is reported, so a single missed sample
+    does not end a session.
+    
+    The same samples feed the session's rotation policy, which ends the
+    session when it decides to rotate.
+    """
+    
+    def __init__(self, config_manager, logger_manager, kill_switch, control=None,
+                 verify_external_ip: Optional[Callable[[], bool]] = None):
+        """
+        Initialize the health monitor.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            kill_switch: Instance of KillSwitch used for the external IP check
+            control: Optional RotationControl carrying operator requests
+            verify_external_ip: Optional external IP check replacing the kill
+                switch's, for a tunnel that is not in the host namespace
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.kill_switch = kill_switch
+        self.control = control
+        self.verify_external_ip = verify_external_ip or kill_switch.verify_external_ip
+        self.health_config = config_manager.get_health_config()
+        
+        self.tunnel = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.failed = threading.Event()
+        self.finished = threading.Event()
+        self.lock = threading.Lock()
+        self.failure = None
+        self.policy = None
+        self.rotation_reason = None
+        self.rates = (0.0, 0.0)
+        self.last_state_check = 0.0
+        self.openvpn_connected = True
+        self.last_ip_check = 0.0
+        self.last_rx_bytes = 0
+        self.last_tx_bytes = 0
+        self.receiving_since = 0.0
+        self.rate_sample = (0.0, 0, 0)
+    
+    def start(self, tunnel, policy=None):
+        """
+        Start watching a tunnel in a background thread.
+        
+        Args:
+            tunnel: Active VPNTunnel
+            policy: Optional RotationPolicy deciding when the session ends
+        """
+        self.stop()
+        self.tunnel = tunnel
+        self.policy = policy
+        self.failure = None
+        self.rotation_reason = None
+        self.failed.clear()
+        self.finished.clear()
+        self.stop_event.clear()
+        
+        self.thread = threading.Thread(target=self.run, name=f"health-{tunnel.device}", daemon=True)
+        self.thread.start()
+        if self.policy:
+            self.policy.start()
+        if self.control:
+            self.control.attach(self)
+    
+    def stop(self):
+        """
+        Stop the background thread and release any waiter.
+        """
+        if self.control:
+            self.control.detach(self)
+        self.stop_event.set()
+        self.finished.set()
+        if self.policy:
+            self.policy.stop()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        if self.tunnel:
+            self.kill_switch.metrics.set_tunnel_rates(self.tunnel.device, None)
+    
+    def wait(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Wait until the rotation policy ends the session or the tunnel is reported unhealthy.
+        
+        Args:
+            timeout: Maximum wait in seconds, None to wait for the end of the session
+        
+        Returns:
+            Failure reason, or None if the tunnel stayed healthy
+        """
+        self.finished.wait(timeout)
+        return self.failure
+    
+    def end_session(self, reason: str) -> bool:
+        """
+        End the session now, as if the rotation policy had decided to rotate.
+        
+        Args:
+            reason: Reason to rotate
+        
+        Returns:
+            True if a running session was ended, False if it had already ended
+        """
+        with self.lock:
+            if self.finished.is_set():
+                return False
+            self.rotation_reason = reason
+            self.finished.set()
+        self.logger.info(f"Ending the session on {self.tunnel.device}: {reason}")
+        return True
+    
+    def check(self, now: float) -> Optional[str]:
+        """
+        Run the checks that are due.
+        
+        Args:
+            now: Current monotonic time
+        
+        Returns:
+            Failure reason, or None if every check passed
+        """
+        if not self.tunnel.is_link_up():
+            return FAILURE_LINK_DOWN
+        
+        state_interval = self.health_config.get('state_interval', 5)
+        state_due = not self.openvpn_connected or now - self.last_state_check >= state_interval
+        if self.tunnel.management and state_due:
+            self.last_state_check = now
+            self.openvpn_connected = self.tunnel.is_connected()
+        
+        if not self.openvpn_connected:
+            return FAILURE_OPENVPN_STATE
+        
+        ip_check_interval = self.health_config.get('ip_check_interval', 0)
+        if ip_check_interval and now - self.last_ip_check >= ip_check_interval:
+            self.last_ip_check = now
+            if not self.verify_external_ip():
+                return FAILURE_IP_LEAK
+        
+        rx_bytes, tx_bytes = self.tunnel.get_traffic_counters()
+        self.record_rates(now, rx_bytes, tx_bytes)
+        if rx_bytes != self.last_rx_bytes or tx_bytes == self.last_tx_bytes:
+            self.last_rx_bytes = rx_bytes
+            self.last_tx_bytes = tx_bytes
+            self.receiving_since = now
+            return None
+        
+        stall_seconds = self.health_config.get('stall_seconds', 60)
+        if stall_seconds and now - self.receiving_since >= stall_seconds:
+            return FAILURE_STALLED
+        return None
+    
+    def record_rates(self, now: float, rx_bytes: int, tx_bytes: int):
+        """
+        Publish the tunnel traffic rates since the previous sample.
+        
+        Args:
+            now: Current monotonic time
+            rx_bytes: Bytes received through the tunnel
+            tx_bytes: Bytes sent through the tunnel
+        """
+        sampled_at, last_rx_bytes, last_tx_bytes = self.rate_sample
+        self.rate_sample = (now, rx_bytes, tx_bytes)
+        
+        elapsed = now - sampled_at
+        if elapsed > 0:
+            self.rates = (max(rx_bytes - last_rx_bytes, 0) / elapsed, max(tx_bytes - last_tx_bytes, 0) / elapsed)
+            self.kill_switch.metrics.set_tunnel_rates(self.tunnel.device, *self.rates)
+    
+    def check_policy(self, now: float, started_at: float, start_counters: tuple) -> Optional[str]:
+        """
+        Ask the rotation policy whether the session should end.
+        
+        Args:
+            now: Current monotonic time
+            started_at: Monotonic time the session started
+            start_counters: Tunnel (rx_bytes, tx_bytes) when the session started
+        
+        Returns:
+            Reason to rotate, or None to keep the session
+        """
+        if not self.policy or (self.control and self.control.is_holding()):
+            return None
+        
+        _, rx_bytes, tx_bytes = self.rate_sample
+        sample = SessionSample(
+            now - started_at,
+            max(rx_bytes - start_counters[0], 0),
+            max(tx_bytes - start_counters[1], 0),
+            *self.rates
+        )
+        return self.policy.check(sample)
+    
+    def run(self):
+        """
+        Sample the tunnel until stopped or until a failure persists.
+        """
+        interval = self.health_config.get('interval', 1.0)
+        failure_grace = self.health_config.get('failure_grace', 5)
+        
+        started_at = time.monotonic()
+        self.last_state_check = self.last_ip_check = self.receiving_since = started_at
+        self.last_rx_bytes, self.last_tx_bytes = self.tunnel.get_traffic_counters()
+        start_counters = (self.last_rx_bytes, self.last_tx_bytes)
+        self.rate_sample = (started_at, self.last_rx_bytes, self.last_tx_bytes)
+        self.rates = (0.0, 0.0)
+        self.openvpn_connected = True
+        failing_since = None
+        
+        while not self.stop_event.wait(interval):
+            now = time.monotonic()
+            failure = self.check(now)
+            
+            if not failure:
+                failing_since = None
+                reason = self.check_policy(now, started_at, start_counters)
+                if reason and self.end_session(reason):
+                    return
+                continue
+            
+            if failing_since is None:
+                failing_since = now
+                self.logger.warning(f"Tunnel {self.tunnel.device} unhealthy: {failure}")
+            
+            if failure == FAILURE_IP_LEAK or now - failing_since >= failure_grace:
+                with self.lock:
+                    if self.finished.is_set():
+                        return
+                    self.failure = failure
+                    self.failed.set()
+                    self.finished.set()
+                self.logger.error(f"Tunnel {self.tunnel.device} failed health check: {failure}")
+                return
\ No newline at end of file
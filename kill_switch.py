@@ -1,11 +1,17 @@
-import subprocess
 import sys
 import time
 import psutil
-import requests
 from typing import Optional, List
 from colorama import Fore
 
+from firewall import FirewallManager
+from metrics import Metrics
+from process_registry import ProcessRegistry
+from connectivity_client import ConnectivityClient, PATH_DEFAULT, PATH_TUNNEL, PATH_UNDERLAY
+from public_ip_resolver import PublicIPResolver
+from route_manager import get_interface_ipv4, get_route_device
+from service_control import ServiceController
+
 
 class KillSwitch:
     """
@@ -27,62 +33,100 @@ class KillSwitch:
         self.logger = logger_manager
         self.network_config = config_manager.get_network_config()
         self.security_config = config_manager.get_security_config()
+        self.connectivity = ConnectivityClient(config_manager, logger_manager)
+        self.ip_resolver = PublicIPResolver(config_manager, logger_manager, self.connectivity)
+        self.firewall = FirewallManager(config_manager, logger_manager)
+        self.process_registry = ProcessRegistry(logger_manager)
+        self.metrics = Metrics(config_manager, logger_manager)
+        self.services = ServiceController(config_manager, logger_manager)
         self.initial_ip = None
+        self.external_ip = None
+        self.external_checked_at = None
         self.vpn_process = None
         self.blocked_services = []
         
-    def get_current_ip_address(self) -> Optional[str]:
+    def get_current_ip_address(self, path: str = PATH_DEFAULT) -> Optional[str]:
         """
-        Get the current public IP address with retry mechanism.
+        Get the current public IP address from the fastest responding providers.
+        
+        Args:
+            path: Network path to check through (default route, tunnel or underlay)
         
         Returns:
             Current public IP address or None if failed
         """
-        ip_services = [
-            "https://ifconfig.io/ip",
-            "https://ipinfo.io/ip",
-            "https://httpbin.org/ip",
-            "https://api.ipify.org"
-        ]
-        
-        for attempt in range(self.network_config['ip_check_retries']):
-            for service in ip_services:
-                try:
-                    response = requests.get(
-                        service,
-                        timeout=self.network_config['ip_check_timeout']
-                    )
-                    if response.status_code == 200:
-                        ip = response.text.strip()
-                        if service == "https://httpbin.org/ip":
-                            import json
-                            ip = json.loads(ip)['origin']
-                        self.logger.debug(f"IP obtained from {service}: {ip}")
-                        return ip
-                except requests.RequestException as e:
-                    self.logger.debug(f"Failed to get IP from {service}: {e}")
-                    continue
-            
-            if attempt < self.network_config['ip_check_retries'] - 1:
-                self.logger.warning(f"IP check attempt {attempt + 1} failed, retrying...")
-                time.sleep(2)
-        
-        self.logger.error("Failed to obtain IP address from all services")
-        return None
+        return self.ip_resolver.resolve(path)
     
-    def store_initial_ip(self):
+    def store_initial_ip(self, refresh: bool = False):
         """
         Store the initial IP address before VPN connection.
+        
+        The address is cached across sessions; it is only fetched again
+        when refresh is set and the firewall is not blocking the underlay.
+        
+        Args:
+            refresh: Fetch the address again even if one is already stored
         """
-        self.initial_ip = self.get_current_ip_address()
+        if self.initial_ip and (not refresh or self.firewall.active):
+            self.logger.debug(f"Using stored initial IP address: {self.initial_ip}")
+            return
+        
+        self.initial_ip = self.get_current_ip_address(PATH_UNDERLAY)
         if self.initial_ip:
             self.logger.info(f"Initial IP address stored: {self.initial_ip}")
         else:
             self.logger.error("Failed to store initial IP address")
     
-    def verify_vpn_connection(self, expected_different_ip: bool = True) -> bool:
+    def verify_tunnel(self, tunnel) -> bool:
         """
-        Verify if VPN connection is working properly.
+        Verify a tunnel locally, without contacting any external service.
+        
+        The tun device must be up with the address pushed by the server,
+        the routing table must send traffic through it and OpenVPN must
+        report the tunnel as connected.
+        
+        Args:
+            tunnel: VPNTunnel to verify
+            
+        Returns:
+            True if every local check passed, False otherwise
+        """
+        assigned_ip = get_interface_ipv4(tunnel.device)
+        if not assigned_ip:
+            self.logger.error(f"VPN verification failed - {tunnel.device} has no IPv4 address")
+            return False
+        
+        pushed_ip = tunnel.get_local_ip()
+        if pushed_ip and pushed_ip != assigned_ip:
+            self.logger.error(f"VPN verification failed - {tunnel.device} has {assigned_ip}, server pushed {pushed_ip}")
+            return False
+        
+        probe_address = self.security_config.get('route_probe_address', '1.1.1.1')
+        route_device = get_route_device(probe_address)
+        if route_device != tunnel.device:
+            self.logger.error(f"VPN verification failed - traffic is routed through {route_device}")
+            return False
+        
+        if not tunnel.is_connected():
+            self.logger.error("VPN verification failed - OpenVPN does not report CONNECTED")
+            return False
+        
+        self.logger.success(f"VPN connection verified locally on {tunnel.device} ({assigned_ip})")
+        return True
+    
+    def is_external_check_due(self) -> bool:
+        """
+        Check whether the rate-limited external IP check should run again.
+        
+        Returns:
+            True if no check ran within external_ip_check_interval, False otherwise
+        """
+        interval = self.security_config.get('external_ip_check_interval', 900)
+        return self.external_checked_at is None or time.monotonic() - self.external_checked_at >= interval
+    
+    def verify_external_ip(self, expected_different_ip: bool = True) -> bool:
+        """
+        Verify the VPN through the public IP address seen by external services.
         
         Args:
             expected_different_ip: Whether IP should be different from initial
@@ -90,14 +134,15 @@ class KillSwitch:
         Returns:
             True if VPN is working correctly, False otherwise
         """
-        if not self.security_config['verify_ip_change']:
-            return True
-        
-        current_ip = self.get_current_ip_address()
+        path = PATH_TUNNEL if self.connectivity.has_tunnel() else PATH_DEFAULT
+        current_ip = self.get_current_ip_address(path)
         if not current_ip:
             self.logger.error("Cannot verify VPN connection - unable to get current IP")
             return False
         
+        self.external_ip = current_ip
+        self.external_checked_at = time.monotonic()
+        
         if expected_different_ip:
             is_connected = current_ip != self.initial_ip
             if is_connected:
@@ -109,6 +154,88 @@ class KillSwitch:
             self.logger.info(f"Current IP: {current_ip}")
             return True
     
+    def verify_vpn_connection(self, tunnel=None, expected_different_ip: bool = True) -> bool:
+        """
+        Verify if VPN connection is working properly.
+        
+        In "local" mode a tunnel is verified without any outbound request.
+        In "both" mode the external IP check also runs, at most once per
+        external_ip_check_interval. In "external" mode, or without a tunnel
+        to inspect, only the external IP check is used.
+        
+        Args:
+            tunnel: Optional VPNTunnel to verify locally
+            expected_different_ip: Whether IP should be different from initial
+            
+        Returns:
+            True if VPN is working correctly, False otherwise
+        """
+        started_at = time.monotonic()
+        try:
+            return self.run_verification(tunnel, expected_different_ip)
+        finally:
+            self.metrics.verification_latency.observe(time.monotonic() - started_at)
+    
+    def run_verification(self, tunnel, expected_different_ip: bool) -> bool:
+        """
+        Run the checks of the configured verification mode.
+        
+        Args:
+            tunnel: Optional VPNTunnel to verify locally
+            expected_different_ip: Whether IP should be different from initial
+            
+        Returns:
+            True if VPN is working correctly, False otherwise
+        """
+        mode = self.security_config.get('verification_mode', 'local')
+        
+        if tunnel and mode in ("local", "both"):
+            if not self.verify_tunnel(tunnel):
+                return False
+            if mode == "local" or not self.is_external_check_due():
+                return True
+        
+        if not self.security_config['verify_ip_change']:
+            return True
+        
+        return self.verify_external_ip(expected_different_ip)
+    
+    def engage_firewall(self) -> bool:
+        """
+        Install the fail-closed firewall ruleset with no VPN endpoint allowed yet.
+        
+        Returns:
+            True if the ruleset is in place or the firewall backend is not used
+        """
+        if not self.firewall.is_enabled() or not self.config_manager.is_kill_switch_enabled():
+            return True
+        
+        if self.firewall.block_all():
+            self.logger.info("Firewall kill switch engaged")
+            return True
+        return False
+    
+    def apply_firewall(self, endpoints: List[tuple]) -> bool:
+        """
+        Atomically allow only the given VPN server endpoints through the firewall.
+        
+        Args:
+            endpoints: List of (address, port, proto) tuples
+            
+        Returns:
+            True if the ruleset is in place or the firewall backend is not used
+        """
+        if not self.firewall.is_enabled() or not self.config_manager.is_kill_switch_enabled():
+            return True
+        return self.firewall.apply(endpoints)
+    
+    def release_firewall(self):
+        """
+        Remove the firewall ruleset on a clean exit, if configured to do so.
+        """
+        if self.config_manager.get_firewall_config().get('remove_on_exit', True):
+            self.firewall.remove()
+    
     def block_network_services(self, services: List[str]):
         """
         Block specified network services to prevent data leakage.
@@ -140,103 +267,96 @@ class KillSwitch:
         
         self.blocked_services.clear()
     
-    def stop_system_service(self, service_name: str):
+    def stop_system_service(self, service_name: str) -> bool:
         """
         Stop a system service.
         
         Args:
             service_name: Name of the service to stop
+        
+        Returns:
+            True if the service is stopped, False otherwise
         """
-        try:
-            result = subprocess.run(
-                ["service", service_name, "stop"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                self.logger.success(f"Successfully stopped service: {service_name}")
-            else:
-                self.logger.error(f"Failed to stop service {service_name}: {result.stderr}")
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"Timeout stopping service: {service_name}")
-        except Exception as e:
-            self.logger.error(f"Error stopping service {service_name}: {e}")
+        return self.services.control(service_name, "stop")
     
-    def start_system_service(self, service_name: str):
+    def start_system_service(self, service_name: str) -> bool:
         """
         Start a system service.
         
         Args:
             service_name: Name of the service to start
+        
+        Returns:
+            True if the service is running, False otherwise
         """
-        try:
-            result = subprocess.run(
-                ["service", service_name, "start"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                self.logger.success(f"Successfully started service: {service_name}")
-            else:
-                self.logger.error(f"Failed to start service {service_name}: {result.stderr}")
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"Timeout starting service: {service_name}")
-        except Exception as e:
-            self.logger.error(f"Error starting service {service_name}: {e}")
+        return self.services.control(service_name, "start")
     
-    def kill_vpn_processes(self):
+    def terminate_processes(self, processes: List[psutil.Process], label: str):
         """
-        Terminate all OpenVPN processes.
+        Terminate processes and force kill the ones still running after a bounded wait.
+        
+        Args:
+            processes: Processes to terminate
+            label: Process description used in log messages
         """
-        killed_processes = []
+        terminated = []
+        
+        for proc in processes:
+            try:
+                proc.terminate()
+                terminated.append(proc)
+                self.logger.warning(f"Terminated {label} process: {proc.pid}")
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        
+        timeout = self.network_config.get('process_stop_timeout', 5)
+        _, alive = psutil.wait_procs(terminated, timeout=timeout)
         
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+        for proc in alive:
+            try:
+                proc.kill()
+                self.logger.error(f"Force killed {label} process: {proc.pid}")
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    
+    def kill_vpn_processes(self, full_scan: bool = False):
+        """
+        Terminate the OpenVPN processes started by CycleVPN.
+        
+        Args:
+            full_scan: Also sweep the process table for any other OpenVPN process
+        """
+        timeout = self.network_config.get('process_stop_timeout', 5)
+        for pid in self.process_registry.stop_all("openvpn", timeout):
+            self.logger.warning(f"Terminated OpenVPN process: {pid}")
+        
+        if not full_scan:
+            return
+        
+        processes = []
+        for proc in psutil.process_iter(['pid', 'name']):
             try:
                 if proc.info['name'] == 'openvpn':
-                    proc.terminate()
-                    killed_processes.append(proc.info['pid'])
-                    self.logger.warning(f"Terminated OpenVPN process: {proc.info['pid']}")
+                    processes.append(proc)
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 continue
         
-        if killed_processes:
-            time.sleep(2)
-            for pid in killed_processes:
-                try:
-                    proc = psutil.Process(pid)
-                    if proc.is_running():
-                        proc.kill()
-                        self.logger.error(f"Force killed OpenVPN process: {pid}")
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+        self.terminate_processes(processes, "OpenVPN")
     
     def kill_transmission_processes(self):
         """
         Terminate all Transmission processes for security.
         """
-        killed_processes = []
+        processes = []
         
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+        for proc in psutil.process_iter(['pid', 'name']):
             try:
                 if 'transmission' in proc.info['name'].lower():
-                    proc.terminate()
-                    killed_processes.append(proc.info['pid'])
-                    self.logger.warning(f"Terminated Transmission process: {proc.info['pid']}")
+                    processes.append(proc)
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 continue
         
-        if killed_processes:
-            time.sleep(2)
-            for pid in killed_processes:
-                try:
-                    proc = psutil.Process(pid)
-                    if proc.is_running():
-                        proc.kill()
-                        self.logger.error(f"Force killed Transmission process: {pid}")
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+        self.terminate_processes(processes, "Transmission")
     
     def activate_kill_switch(self, services_to_block: List[str] = None):
         """
@@ -252,10 +372,17 @@ class KillSwitch:
         if services_to_block is None:
             services_to_block = ['transmission']
         
+        self.metrics.kill_switch_activations.inc()
         self.logger.error("KILL SWITCH ACTIVATED - VPN connection failed!", Fore.RED)
+        
+        if self.firewall.is_enabled() and self.firewall.block_all():
+            self.logger.error("All traffic outside the VPN is blocked by the firewall", Fore.RED)
+            self.logger.error("Fix VPN connection before continuing", Fore.RED)
+            return
+        
         self.logger.error("Blocking network services to prevent data leakage...", Fore.RED)
         
-        self.kill_vpn_processes()
+        self.kill_vpn_processes(full_scan=True)
         self.kill_transmission_processes()
         self.block_network_services(services_to_block)
         
@@ -267,6 +394,7 @@ class KillSwitch:
         Emergency shutdown of the application with full network protection.
         """
         self.logger.error("EMERGENCY SHUTDOWN INITIATED", Fore.RED)
+        self.metrics.emergency_shutdowns.inc()
         self.kill_transmission_processes()
         self.activate_kill_switch(['transmission', 'openvpn'])
         self.logger.error("Application terminated for security reasons", Fore.RED)
@@ -1,15 +1,172 @@
+import atexit
+import json
+import queue
 import sys
+import threading
+import time
+from datetime import datetime
 from pathlib import Path
 from loguru import logger
 from colorama import Fore, Style
 
 
+LEVELS = {
+    "trace": 5,
+    "debug": 10,
+    "info": 20,
+    "success": 25,
+    "warning": 30,
+    "error": 40,
+    "critical": 50,
+}
+
+BATCH_SIZE = 256
+
+
+class LogWriter:
+    """
+    Background writer draining log events in batches.
+    
+    Callers only append a tuple to a queue. The writer thread renders
+    the batch once for the console and once for the log file, and
+    writes each with a single call. The file goes through loguru, which
+    keeps handling rotation and retention.
+    """
+    
+    def __init__(self, file_format: str, console_format: str):
+        """
+        Initialize the writer and start its thread.
+        
+        Args:
+            file_format: "json" for JSON lines, "text" for the configured loguru format
+            console_format: strftime format of the console timestamps
+        """
+        self.file_format = file_format
+        self.console_format = console_format
+        self.queue = queue.SimpleQueue()
+        self.file_logger = logger.bind(cyclevpn_writer=True)
+        self.thread = threading.Thread(target=self.run, name="log-writer", daemon=True)
+        self.thread.start()
+    
+    def put(self, event: tuple):
+        """
+        Queue an event.
+        
+        Args:
+            event: Tuple of (created, level, message, color, fields)
+        """
+        self.queue.put(event)
+    
+    def run(self):
+        """
+        Write queued events until a None sentinel is received.
+        
+        A queued threading.Event is set once the events queued before it are written.
+        """
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            events = [item for item in batch if isinstance(item, tuple)]
+            if events:
+                self.write(events)
+            
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in batch:
+                return
+    
+    def write(self, events: list):
+        """
+        Render and write a batch of events.
+        
+        Args:
+            events: Events as queued by put
+        """
+        try:
+            sys.stdout.write("".join(self.render_console(event) for event in events))
+            sys.stdout.flush()
+        except (OSError, ValueError):
+            pass
+        
+        if self.file_format == "json":
+            self.file_logger.opt(raw=True).info("".join(self.render_json(event) for event in events))
+        else:
+            for _, level, message, _, _ in events:
+                self.file_logger.log(level.upper(), message)
+    
+    def render_console(self, event: tuple) -> str:
+        """
+        Render an event as a colored console line.
+        
+        Args:
+            event: Queued event
+        
+        Returns:
+            Console line
+        """
+        created, level, message, color, _ = event
+        timestamp = time.strftime(self.console_format, time.localtime(created))
+        return f"{Fore.GREEN}{timestamp}{Style.RESET_ALL} | {level.upper():<7} | {color}{message}{Style.RESET_ALL}\n"
+    
+    def render_json(self, event: tuple) -> str:
+        """
+        Render an event as a JSON line.
+        
+        Args:
+            event: Queued event
+        
+        Returns:
+            JSON line
+        """
+        created, level, message, _, fields = event
+        record = {
+            "time": datetime.fromtimestamp(created).astimezone().isoformat(timespec="milliseconds"),
+            "level": level.upper(),
+            "message": message,
+        }
+        record.update(fields)
+        return json.dumps(record, default=str) + "\n"
+    
+    def flush(self, timeout: float = 5.0):
+        """
+        Wait until every event queued so far is written.
+        
+        Args:
+            timeout: Maximum wait in seconds
+        """
+        if not self.thread.is_alive():
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+    
+    def close(self, timeout: float = 5.0):
+        """
+        Write the pending events and stop the thread.
+        
+        Args:
+            timeout: Maximum wait in seconds
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+
 class LoggerManager:
     """
     Manages logging configuration and colored output for CycleVPN.
     
-    This class configures loguru for both file and console logging
-    with color support and proper formatting.
+    Every message is one event on a single path: the level is checked
+    first, then the event is queued for the background LogWriter, which
+    prints it once to the console and appends it to the log file as a
+    JSON line. Keyword fields passed with a message, such as server,
+    phase or duration, become fields of its JSON record.
     """
     
     def __init__(self, config_manager):
@@ -20,38 +177,85 @@ class LoggerManager:
             config_manager: Instance of ConfigManager for logging configuration
         """
         self.config_manager = config_manager
+        self.level_no = LEVELS["info"]
+        self.writer = None
         self.setup_logging()
     
     def setup_logging(self):
         """
-        Configure loguru logger with file and console handlers.
+        Configure the log file sink and start the background writer.
         """
         logging_config = self.config_manager.get_logging_config()
         paths_config = self.config_manager.get_paths_config()
+        file_format = logging_config.get('file_format', 'json')
         
         logger.remove()
+        self.level_no = LEVELS.get(logging_config['level'].lower(), LEVELS["info"])
         
         log_file_path = Path(paths_config['log_file'])
         
         logger.add(
             log_file_path,
-            level=logging_config['level'],
+            level=0,
             format=logging_config['format'],
             rotation=logging_config['rotation'],
             retention=logging_config['retention'],
-            enqueue=True
+            filter=lambda record: "cyclevpn_writer" in record["extra"]
         )
         
+        # Direct loguru calls from other modules join the same event path
         logger.add(
-            sys.stdout,
-            level=logging_config['level'],
-            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level}</level> | <cyan>{message}</cyan>",
-            colorize=True
+            self.forward_record,
+            level=0,
+            format="{message}",
+            filter=lambda record: "cyclevpn_writer" not in record["extra"] and record["level"].no >= self.level_no
         )
         
-        logger.info("Logger initialized successfully")
+        self.writer = LogWriter(file_format, "%Y-%m-%d %H:%M:%S")
+        atexit.register(self.writer.close)
+        self.config_manager.add_reload_listener(self.apply_level)
+        
+        self.info("Logger initialized successfully")
+    
+    def apply_level(self):
+        """
+        Apply the log level of a reloaded configuration.
+        """
+        level = self.config_manager.get_logging_config()['level']
+        self.level_no = LEVELS.get(level.lower(), LEVELS["info"])
+    
+    def forward_record(self, message):
+        """
+        Queue a record logged directly through loguru.
+        
+        Args:
+            message: loguru message carrying the record
+        """
+        record = message.record
+        level = record["level"].name.lower()
+        color = Fore.RED if record["level"].no >= LEVELS["error"] else Fore.RESET
+        self.writer.put((record["time"].timestamp(), level, record["message"], color, {}))
+    
+    def is_enabled(self, level: str) -> bool:
+        """
+        Check whether messages of a level are logged.
+        
+        Args:
+            level: Log level name
+        
+        Returns:
+            True if the level passes the configured threshold, False otherwise
+        """
+        return LEVELS.get(level, LEVELS["info"]) >= self.level_no
     
-    def log_and_print(self, message: str, level: str = "info", color: str = Fore.RESET):
+    def flush(self):
+        """
+        Wait until every message logged so far has been written.
+        """
+        if self.writer:
+            self.writer.flush()
+    
+    def log_and_print(self, message: str, level: str = "info", color: str = Fore.RESET, **fields):
         """
         Log a message and print it with specified color.
         
@@ -59,66 +263,64 @@ class LoggerManager:
             message: The message to log and print
             level: Log level (info, warning, error, debug)
             color: Color code for console output
+            **fields: Structured fields added to the JSON record
         """
-        print(color + message + Style.RESET_ALL)
-        
-        level_map = {
-            "info": logger.info,
-            "warning": logger.warning,
-            "error": logger.error,
-            "debug": logger.debug,
-            "success": logger.success
-        }
-        
-        log_function = level_map.get(level.lower(), logger.info)
-        log_function(message)
+        level = level.lower()
+        if LEVELS.get(level, LEVELS["info"]) < self.level_no:
+            return
+        self.writer.put((time.time(), level, message, color, fields))
     
-    def info(self, message: str, color: str = Fore.CYAN):
+    def info(self, message: str, color: str = Fore.CYAN, **fields):
         """
         Log and print an info message.
         
         Args:
             message: The message to log
             color: Color for console output
+            **fields: Structured fields added to the JSON record
         """
-        self.log_and_print(message, "info", color)
+        self.log_and_print(message, "info", color, **fields)
     
-    def success(self, message: str, color: str = Fore.GREEN):
+    def success(self, message: str, color: str = Fore.GREEN, **fields):
         """
         Log and print a success message.
         
         Args:
             message: The message to log
             color: Color for console output
+            **fields: Structured fields added to the JSON record
         """
-        self.log_and_print(message, "success", color)
+        self.log_and_print(message, "success", color, **fields)
     
-    def warning(self, message: str, color: str = Fore.YELLOW):
+    def warning(self, message: str, color: str = Fore.YELLOW, **fields):
         """
         Log and print a warning message.
         
         Args:
             message: The message to log
             color: Color for console output
+            **fields: Structured fields added to the JSON record
         """
-        self.log_and_print(message, "warning", color)
+        self.log_and_print(message, "warning", color, **fields)
     
-    def error(self, message: str, color: str = Fore.RED):
+    def error(self, message: str, color: str = Fore.RED, **fields):
         """
         Log and print an error message.
         
         Args:
             message: The message to log
             color: Color for console output
+            **fields: Structured fields added to the JSON record
         """
-        self.log_and_print(message, "error", color)
+        self.log_and_print(message, "error", color, **fields)
     
-    def debug(self, message: str, color: str = Fore.MAGENTA):
+    def debug(self, message: str, color: str = Fore.MAGENTA, **fields):
         """
         Log and print a debug message.
         
         Args:
             message: The message to log
             color: Color for console output
+            **fields: Structured fields added to the JSON record
         """
-        self.log_and_print(message, "debug", color) 
\ No newline at end of file
+        self.log_and_print(message, "debug", color, **fields)
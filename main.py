@@ -1,12 +1,23 @@
+import argparse
+import asyncio
+import json
 import sys
 import signal
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional, Tuple
 from colorama import init, Fore
 
 from config_manager import ConfigManager
+from config_reloader import ConfigReloader
+from control_server import COMMANDS, DEFAULT_CONTROL_SOCKET, ControlServer, send_command
+from credentials import CredentialLoader
 from logger_manager import LoggerManager
 from kill_switch import KillSwitch
+from multi_tunnel import MultiTunnelManager
+from rotation_supervisor import RotationSupervisor
 from vpn_manager import VPNManager
 
 
@@ -18,9 +29,15 @@ class CycleVPNApplication:
     providing a unified interface for VPN rotation and management.
     """
     
-    def __init__(self):
+    def __init__(self, daemon: bool = False, credentials_fd: Optional[int] = None,
+                 credentials_file: Optional[str] = None):
         """
         Initialize the CycleVPN application.
+        
+        Args:
+            daemon: Run unattended, never prompting for credentials
+            credentials_fd: File descriptor to read the credentials from
+            credentials_file: Secret file to read the credentials from
         """
         init(autoreset=True)
         
@@ -34,7 +51,17 @@ class CycleVPNApplication:
                 self.kill_switch
             )
             
-            self.setup_signal_handlers()
+            self.multi_tunnel = None
+            self.config_reloader = ConfigReloader(self.config_manager, self.logger_manager)
+            self.control_server = ControlServer(self.config_manager, self.logger_manager, self.vpn_manager)
+            self.credential_loader = CredentialLoader(
+                self.config_manager,
+                self.logger_manager,
+                credentials_fd,
+                credentials_file
+            )
+            self.daemon = daemon or self.config_manager.get_daemon_config().get('enabled', False)
+            
             self.logger_manager.success("CycleVPN application initialized successfully")
             
         except Exception as e:
@@ -44,10 +71,14 @@ class CycleVPNApplication:
     def setup_signal_handlers(self):
         """
         Setup signal handlers for graceful shutdown.
+        
+        The handler only requests a stop: the running phase notices it,
+        returns, and teardown runs once from run_application or the
+        rotation supervisor instead of inside the interrupted call.
         """
         def signal_handler(signum, frame):
             self.logger_manager.warning("Received interrupt signal, shutting down...")
-            self.shutdown()
+            self.vpn_manager.request_stop()
         
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
@@ -82,6 +113,7 @@ class CycleVPNApplication:
         
         self.logger_manager.info("Configuration Summary:")
         self.logger_manager.info(f"  • Cooldown: {session_config['cooldown_seconds']} seconds")
+        self.logger_manager.info(f"  • Rotation Policy: {self.config_manager.get_rotation_config().get('policy', 'fixed')}")
         self.logger_manager.info(f"  • Kill Switch: {'Enabled' if session_config['kill_switch_enabled'] else 'Disabled'}")
         self.logger_manager.info(f"  • Max Failures: {session_config['max_connection_failures']}")
         self.logger_manager.info(f"  • VPN Timeout: {network_config['vpn_establish_wait']} seconds")
@@ -90,51 +122,141 @@ class CycleVPNApplication:
         """
         Verify that all prerequisites are met before starting.
         
+        The underlay IP lookup runs while the OpenVPN directory is scanned,
+        and the servers are pre-resolved and probed as soon as the scan is
+        done, so startup waits for the slowest check instead of their sum.
+        
         Returns:
             True if all prerequisites are met, False otherwise
         """
         self.logger_manager.info("Verifying prerequisites...")
-        
-        ovpn_files = self.vpn_manager.discover_ovpn_files()
-        if not ovpn_files:
-            self.logger_manager.error("No OpenVPN configuration files found")
-            return False
-        
-        self.logger_manager.info(f"Found {len(ovpn_files)} OpenVPN configuration files")
+        started_at = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prerequisites")
         
         try:
-            initial_ip = self.kill_switch.get_current_ip_address()
-            if not initial_ip:
-                self.logger_manager.error("Unable to determine current IP address")
+            ip_lookup = executor.submit(self.vpn_manager.load_initial_ip)
+            
+            ovpn_files = self.vpn_manager.discover_ovpn_files()
+            if self.stop_requested():
+                return False
+            if not ovpn_files:
                 return False
             
-            self.logger_manager.info(f"Current IP address: {initial_ip}")
+            warm_up = executor.submit(self.vpn_manager.warm_up, ovpn_files)
             
-        except Exception as e:
-            self.logger_manager.error(f"Network connectivity check failed: {e}")
-            return False
+            try:
+                ip_lookup.result()
+                if self.stop_requested():
+                    return False
+                if not self.kill_switch.initial_ip:
+                    self.logger_manager.error("Unable to determine current IP address")
+                    return False
+                
+            except Exception as e:
+                self.logger_manager.error(f"Network connectivity check failed: {e}")
+                return False
+            
+            try:
+                warm_up.result()
+            except Exception as e:
+                self.logger_manager.warning(f"Server warm-up failed: {e}")
+        
+        finally:
+            executor.shutdown(wait=False)
         
-        self.logger_manager.success("All prerequisites verified successfully")
+        self.logger_manager.success(
+            f"All prerequisites verified successfully in {time.monotonic() - started_at:.1f} seconds"
+        )
         return True
     
+    def stop_requested(self) -> bool:
+        """
+        Check whether SIGINT or SIGTERM asked the application to stop.
+        
+        Returns:
+            True if a stop was requested, False otherwise
+        """
+        return self.vpn_manager.stop_requested.is_set()
+    
+    def get_credentials(self) -> Optional[Tuple[str, str]]:
+        """
+        Get the VPN credentials from a non-interactive source, or prompt for them.
+        
+        In daemon mode there is no prompt: a missing source is an error.
+        
+        Returns:
+            Tuple of (username, password), or None if unavailable in daemon mode
+        """
+        try:
+            credentials = self.credential_loader.load()
+        except ValueError as e:
+            self.logger_manager.error(str(e))
+            return None
+        
+        if credentials:
+            return credentials
+        if self.daemon:
+            self.logger_manager.error(
+                "Daemon mode needs credentials from --credentials-fd, --credentials-file, "
+                "a systemd credential or the CYCLEVPN_USERNAME/CYCLEVPN_PASSWORD environment"
+            )
+            return None
+        return self.vpn_manager.get_user_credentials()
+    
     def run_application(self):
         """
         Run the main application loop.
         """
         try:
-            self.display_welcome_message()
+            if not self.daemon:
+                self.display_welcome_message()
             self.display_configuration_summary()
             
-            if not self.verify_prerequisites():
+            credentials = self.get_credentials()
+            if not credentials:
+                return False
+            username, password = credentials
+            
+            self.setup_signal_handlers()
+            self.kill_switch.metrics.start()
+            self.config_reloader.start()
+            if self.daemon or self.config_manager.get_daemon_config().get('control_interactive', False):
+                self.control_server.start()
+            
+            if not self.verify_prerequisites() and not self.stop_requested():
                 self.logger_manager.error("Prerequisites verification failed")
                 return False
             
-            self.logger_manager.info("Starting VPN rotation...")
+            if self.stop_requested():
+                self.logger_manager.info("Application stopped by user")
+                self.cleanup()
+                return True
             
-            username, password = self.vpn_manager.get_user_credentials()
+            self.logger_manager.info("Starting VPN rotation...")
             
             self.logger_manager.info("Initiating continuous VPN rotation")
-            self.vpn_manager.run_continuous_vpn_rotation(username, password)
+            if self.config_manager.get_multi_tunnel_config().get('exits', 1) > 1:
+                self.multi_tunnel = MultiTunnelManager(
+                    self.config_manager,
+                    self.logger_manager,
+                    self.vpn_manager
+                )
+                self.control_server.multi_tunnel = self.multi_tunnel
+                self.multi_tunnel.run(username, password)
+                self.cleanup()
+            elif self.config_manager.get_session_config().get('supervisor', 'asyncio') == "asyncio":
+                supervisor = RotationSupervisor(
+                    self.config_manager,
+                    self.logger_manager,
+                    self.vpn_manager,
+                    on_shutdown=self.cleanup
+                )
+                asyncio.run(supervisor.run(username, password))
+                if supervisor.exit_code:
+                    sys.exit(supervisor.exit_code)
+            else:
+                self.vpn_manager.run_continuous_vpn_rotation(username, password)
+                self.cleanup()
             
         except KeyboardInterrupt:
             self.logger_manager.info("Application stopped by user")
@@ -144,15 +266,22 @@ class CycleVPNApplication:
         
         return True
     
-    def shutdown(self):
+    def cleanup(self):
         """
-        Perform graceful shutdown of the application.
+        Stop Transmission, disconnect and release every protection left in place.
         """
         self.logger_manager.info("Shutting down CycleVPN...")
         
         try:
             self.emergency_stop_transmission()
+            if self.multi_tunnel:
+                self.multi_tunnel.stop()
             self.vpn_manager.disconnect_vpn()
+            self.kill_switch.release_firewall()
+            self.kill_switch.metrics.stop()
+            self.config_reloader.stop()
+            self.control_server.stop()
+            self.kill_switch.services.close()
             
             if self.config_manager.get_security_config()['clear_credentials_on_exit']:
                 self.logger_manager.info("Clearing credentials for security")
@@ -162,9 +291,6 @@ class CycleVPNApplication:
             
         except Exception as e:
             self.logger_manager.error(f"Error during shutdown: {e}")
-        
-        finally:
-            sys.exit(0)
     
     def emergency_stop_transmission(self):
         """
@@ -179,9 +305,11 @@ class CycleVPNApplication:
         except Exception as e:
             self.logger_manager.error(f"Failed to kill Transmission processes: {e}")
         
+        transmission_service = self.config_manager.get_services_config()['transmission_service']
+        if self.kill_switch.services.control(transmission_service, "stop"):
+            return
+        
         methods = [
-            ["service", "transmission", "stop"],
-            ["systemctl", "stop", "transmission"],
             ["brew", "services", "stop", "transmission"],
             ["launchctl", "stop", "transmission"],
             ["pkill", "-f", "transmission"]
@@ -208,12 +336,74 @@ class CycleVPNApplication:
         self.logger_manager.error("Your real IP may be exposed!")
 
 
+def get_control_socket(config_path: str) -> str:
+    """
+    Read the control socket path from the configuration file, without loading the application.
+    
+    Args:
+        config_path: Path to the configuration file
+    
+    Returns:
+        Control socket path
+    """
+    try:
+        with open(config_path, 'r', encoding='utf-8') as file:
+            return json.load(file).get('daemon', {}).get('control_socket') or DEFAULT_CONTROL_SOCKET
+    except (OSError, ValueError, AttributeError):
+        return DEFAULT_CONTROL_SOCKET
+
+
+def run_control_command(args) -> int:
+    """
+    Send a command to the running instance and print its answer.
+    
+    Args:
+        args: Parsed "ctl" command line
+    
+    Returns:
+        Process exit code
+    """
+    socket_path = args.socket or get_control_socket("config.json")
+    try:
+        response = send_command(socket_path, " ".join([args.command] + args.arguments))
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}Cannot reach CycleVPN on {socket_path}: {e}", file=sys.stderr)
+        return 1
+    
+    print(json.dumps(response, indent=2))
+    return 0 if response.get("ok") else 1
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line.
+    
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="CycleVPN - Advanced VPN Rotation Tool")
+    parser.add_argument("--daemon", action="store_true", help="run unattended, without prompts")
+    parser.add_argument("--credentials-fd", type=int, help="read username and password lines from this file descriptor")
+    parser.add_argument("--credentials-file", help="read username and password lines from this file")
+    
+    subparsers = parser.add_subparsers(dest="action")
+    ctl = subparsers.add_parser("ctl", help="send a command to the running instance")
+    ctl.add_argument("command", choices=COMMANDS)
+    ctl.add_argument("arguments", nargs="*", help="server name for pin")
+    ctl.add_argument("--socket", help="control socket path (default: from config.json)")
+    return parser.parse_args()
+
+
 def main():
     """
     Main entry point of the CycleVPN application.
     """
+    args = parse_arguments()
+    if args.action == "ctl":
+        sys.exit(run_control_command(args))
+    
     try:
-        app = CycleVPNApplication()
+        app = CycleVPNApplication(args.daemon, args.credentials_fd, args.credentials_file)
         success = app.run_application()
         
         if not success:
@@ -0,0 +1,400 @@
+import socket
+import threading
+import time
+from typing import List, Optional
+
+
+CONNECTION_ESTABLISHED = "connected"
+CONNECTION_AUTH_FAILED = "auth_failed"
+CONNECTION_FAILED = "failed"
+CONNECTION_TIMEOUT = "timeout"
+
+PASSWORD_REQUEST = ">PASSWORD:Need 'Auth'"
+
+
+def parse_state_line(line: str) -> Optional[dict]:
+    """
+    Parse an OpenVPN management state line.
+    
+    Accepts both real-time notifications (">STATE:...") and the lines
+    returned by the "state" command.
+    
+    Args:
+        line: Raw state line from the management interface
+    
+    Returns:
+        Dictionary with the parsed state fields, or None if malformed
+    """
+    if line.startswith(">STATE:"):
+        line = line[len(">STATE:"):]
+    
+    fields = line.split(",")
+    if len(fields) < 2 or not fields[0].isdigit():
+        return None
+    
+    fields += [""] * (9 - len(fields))
+    return {
+        "timestamp": int(fields[0]),
+        "state": fields[1],
+        "description": fields[2],
+        "local_ip": fields[3],
+        "remote_ip": fields[4],
+        "remote_port": fields[5],
+    }
+
+
+def quote_argument(value: str) -> str:
+    """
+    Quote a management command argument.
+    
+    Args:
+        value: Raw argument
+    
+    Returns:
+        Argument in double quotes with backslashes and quotes escaped
+    """
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class ManagementInterface:
+    """
+    Client for the OpenVPN management interface over a Unix socket.
+    
+    This class attaches to a held OpenVPN instance, enables real-time
+    state notifications and reports connection readiness as soon as
+    OpenVPN announces it, instead of waiting for a fixed delay.
+    """
+    
+    def __init__(self, socket_path: str, logger_manager):
+        """
+        Initialize the management interface client.
+        
+        Args:
+            socket_path: Path of the management Unix socket
+            logger_manager: Instance of LoggerManager
+        """
+        self.socket_path = socket_path
+        self.logger = logger_manager
+        self.connection = None
+        self.buffer = b""
+        self.notifications = []
+        self.last_state = None
+        self.credentials = None
+        self.credentials_requested = False
+        self.lock = threading.RLock()
+    
+    def connect(self, timeout: float) -> bool:
+        """
+        Connect to the management socket, retrying until OpenVPN creates it.
+        
+        Args:
+            timeout: Maximum time to wait for the socket in seconds
+        
+        Returns:
+            True if connected, False otherwise
+        """
+        deadline = time.monotonic() + timeout
+        
+        while time.monotonic() < deadline:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.socket_path)
+                self.connection = sock
+                self.logger.debug(f"Attached to OpenVPN management socket: {self.socket_path}")
+                return True
+            except OSError:
+                sock.close()
+                time.sleep(0.05)
+        
+        self.logger.error(f"Timeout connecting to OpenVPN management socket: {self.socket_path}")
+        return False
+    
+    def close(self):
+        """
+        Close the management connection and forget the credentials.
+        """
+        with self.lock:
+            if self.connection:
+                try:
+                    self.connection.close()
+                except OSError:
+                    pass
+                self.connection = None
+            self.buffer = b""
+            self.notifications.clear()
+            self.credentials = None
+    
+    def interrupt(self):
+        """
+        Wake up a thread blocked on the management socket, from another thread.
+        
+        The blocked read sees the socket as closed; close() still has to be
+        called by the owning thread.
+        """
+        connection = self.connection
+        if connection:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+    
+    def read_line(self, deadline: float) -> Optional[str]:
+        """
+        Read a single line from the management socket.
+        
+        Args:
+            deadline: Monotonic time after which reading is abandoned
+        
+        Returns:
+            The decoded line, or None on timeout
+        
+        Raises:
+            ConnectionError: If OpenVPN closed the management socket
+        """
+        while b"\n" not in self.buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            
+            self.connection.settimeout(remaining)
+            try:
+                chunk = self.connection.recv(4096)
+            except socket.timeout:
+                return None
+            
+            if not chunk:
+                raise ConnectionError("OpenVPN closed the management socket")
+            self.buffer += chunk
+        
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return line.decode("utf-8", errors="replace").rstrip("\r")
+    
+    def send_command(self, command: str, timeout: float = 5.0) -> List[str]:
+        """
+        Send a command and collect its response.
+        
+        Real-time notifications received while waiting are queued and
+        later consumed by wait_for_connection. A credentials request
+        received meanwhile is answered once the response is complete.
+        
+        Args:
+            command: Management command to send
+            timeout: Maximum time to wait for the response in seconds
+        
+        Returns:
+            List of response lines (a single SUCCESS/ERROR line, or the
+            lines of a multi-line response without its END marker)
+        
+        Raises:
+            ConnectionError: If the socket is closed or the command times out
+        """
+        with self.lock:
+            response = self.exchange(command, timeout)
+            self.answer_credentials_request()
+            return response
+    
+    def exchange(self, command: str, timeout: float) -> List[str]:
+        """
+        Send a command and read lines until its response is complete.
+        
+        Args:
+            command: Management command to send
+            timeout: Maximum time to wait for the response in seconds
+        
+        Returns:
+            List of response lines, see send_command
+        
+        Raises:
+            ConnectionError: If the socket is closed or the command times out
+        """
+        if not self.connection:
+            raise ConnectionError("Management interface is not connected")
+        
+        self.connection.sendall(f"{command}\n".encode("utf-8"))
+        deadline = time.monotonic() + timeout
+        response = []
+        
+        while True:
+            line = self.read_line(deadline)
+            if line is None:
+                raise ConnectionError(f"Timeout waiting for response to '{command.split()[0]}'")
+            
+            if line.startswith(">"):
+                self.queue_notification(line)
+                continue
+            
+            if line.startswith("SUCCESS:") or line.startswith("ERROR:"):
+                if not response:
+                    return [line]
+            
+            if line == "END":
+                return response
+            
+            response.append(line)
+    
+    def queue_notification(self, line: str):
+        """
+        Queue a real-time notification, or flag it if it asks for credentials.
+        
+        Args:
+            line: Notification line
+        """
+        if line.startswith(PASSWORD_REQUEST):
+            self.credentials_requested = True
+        else:
+            self.notifications.append(line)
+    
+    def set_credentials(self, username: str, password: str):
+        """
+        Keep the credentials OpenVPN asks for through --management-query-passwords.
+        
+        They stay in memory only, so OpenVPN can ask again on a reconnect.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+        """
+        self.credentials = (username, password)
+    
+    def clear_credentials(self):
+        """
+        Forget the credentials.
+        """
+        self.credentials = None
+    
+    def answer_credentials_request(self):
+        """
+        Send the credentials if OpenVPN asked for them.
+        
+        Raises:
+            ConnectionError: If the socket is closed or OpenVPN does not respond
+        """
+        while self.credentials_requested:
+            self.credentials_requested = False
+            if not self.credentials:
+                self.logger.error("OpenVPN asked for credentials but none are available")
+                return
+            
+            username, password = self.credentials
+            for field, value in (("username", username), ("password", password)):
+                reply = self.exchange(f'{field} "Auth" {quote_argument(value)}', 5.0)
+                if not reply or not reply[0].startswith("SUCCESS:"):
+                    self.logger.error(f"OpenVPN refused the {field}: {reply[0] if reply else 'no response'}")
+                    return
+            self.logger.debug("Credentials sent through the management interface")
+    
+    def release_hold(self):
+        """
+        Enable real-time state notifications and release the startup hold.
+        """
+        self.send_command("state on")
+        self.send_command("hold release")
+    
+    def get_state(self) -> Optional[dict]:
+        """
+        Query the current OpenVPN state.
+        
+        Returns:
+            Parsed state dictionary, or None if unavailable
+        """
+        try:
+            for line in self.send_command("state"):
+                state = parse_state_line(line)
+                if state:
+                    self.last_state = state
+                    return state
+        except (ConnectionError, OSError) as e:
+            self.logger.debug(f"Failed to query OpenVPN state: {e}")
+        return None
+    
+    def get_pid(self) -> Optional[int]:
+        """
+        Query the PID of the OpenVPN daemon.
+        
+        Returns:
+            Process identifier, or None if unavailable
+        """
+        try:
+            for line in self.send_command("pid"):
+                if line.startswith("SUCCESS: pid="):
+                    return int(line.split("=", 1)[1])
+        except (ConnectionError, OSError, ValueError) as e:
+            self.logger.debug(f"Failed to query OpenVPN PID: {e}")
+        return None
+    
+    def next_notification(self, deadline: float) -> Optional[str]:
+        """
+        Return the next queued or incoming real-time notification.
+        
+        Args:
+            deadline: Monotonic time after which waiting is abandoned
+        
+        Returns:
+            Notification line, or None on timeout
+        """
+        with self.lock:
+            while True:
+                self.answer_credentials_request()
+                if self.notifications:
+                    return self.notifications.pop(0)
+                
+                line = self.read_line(deadline)
+                if line is None:
+                    return None
+                if line.startswith(">"):
+                    self.queue_notification(line)
+    
+    def wait_for_connection(self, timeout: float) -> str:
+        """
+        Wait for OpenVPN to report the outcome of the connection attempt.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+        
+        Returns:
+            One of CONNECTION_ESTABLISHED, CONNECTION_AUTH_FAILED,
+            CONNECTION_FAILED or CONNECTION_TIMEOUT
+        """
+        deadline = time.monotonic() + timeout
+        
+        try:
+            while True:
+                line = self.next_notification(deadline)
+                if line is None:
+                    return CONNECTION_TIMEOUT
+                
+                if line.startswith(">PASSWORD:Verification Failed"):
+                    self.logger.error("OpenVPN authentication failed")
+                    return CONNECTION_AUTH_FAILED
+                
+                if line.startswith(">FATAL:"):
+                    self.logger.error(f"OpenVPN fatal error: {line[len('>FATAL:'):]}")
+                    return CONNECTION_FAILED
+                
+                if not line.startswith(">STATE:"):
+                    continue
+                
+                state = parse_state_line(line)
+                if not state:
+                    continue
+                
+                self.last_state = state
+                self.logger.debug(f"OpenVPN state: {state['state']} {state['description']}")
+                
+                if state["state"] == "CONNECTED":
+                    if state["description"] == "SUCCESS":
+                        return CONNECTION_ESTABLISHED
+                    self.logger.error(f"OpenVPN connected with errors: {state['description']}")
+                    return CONNECTION_FAILED
+                
+                if state["description"] == "auth-failure":
+                    self.logger.error("OpenVPN authentication failed")
+                    return CONNECTION_AUTH_FAILED
+                
+                if state["state"] in ("RECONNECTING", "EXITING"):
+                    self.logger.error(f"OpenVPN connection attempt failed: {state['description']}")
+                    return CONNECTION_FAILED
+                    
+        except (ConnectionError, OSError) as e:
+            self.logger.error(f"Lost OpenVPN management connection: {e}")
+            return CONNECTION_FAILED
\ No newline at end of file
@@ -0,0 +1,531 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+MAIN_EXIT = "main"
+
+CONNECT_LATENCY_BUCKETS = (0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 60, 120)
+VERIFICATION_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+DOWNTIME_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+
+def escape_label_value(value: str) -> str:
+    """
+    Escape a label value for the OpenMetrics text format.
+    
+    Args:
+        value: Raw label value
+    
+    Returns:
+        Value with backslashes, quotes and newlines escaped
+    """
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    """
+    Format a sample value for the OpenMetrics text format.
+    
+    Args:
+        value: Sample value
+    
+    Returns:
+        Value as text, with infinities spelled +Inf/-Inf
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """
+    Format a label set.
+    
+    Args:
+        names: Label names
+        values: Label values, in the same order
+        extra: Already formatted label appended last, e.g. le="0.5"
+    
+    Returns:
+        Label set such as {server="a.ovpn"}, or an empty string without labels
+    """
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    """
+    Base class of a metric family with a fixed set of label names.
+    """
+    
+    metric_type = "unknown"
+    
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        """
+        Initialize the metric family.
+        
+        Args:
+            name: Metric family name
+            documentation: Help text
+            label_names: Names of the labels every sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.series = {}
+    
+    def get_key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """
+        Get the series key of a label set.
+        
+        Args:
+            labels: Label values by name
+        
+        Returns:
+            Label values in label name order
+        
+        Raises:
+            ValueError: If the label names do not match the family's
+        """
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+    
+    def remove(self, **labels):
+        """
+        Drop a series.
+        
+        Args:
+            **labels: Label values of the series
+        """
+        with self.lock:
+            self.series.pop(self.get_key(labels), None)
+    
+    @abstractmethod
+    def render_samples(self) -> List[str]:
+        """
+        Render the sample lines of the family.
+        
+        Returns:
+            List of sample lines
+        """
+    
+    def render(self) -> List[str]:
+        """
+        Render the family with its metadata.
+        
+        Returns:
+            List of exposition lines
+        """
+        return [
+            f"# TYPE {self.name} {self.metric_type}",
+            f"# HELP {self.name} {self.documentation}",
+        ] + self.render_samples()
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count.
+    """
+    
+    metric_type = "counter"
+    
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        """
+        Initialize the counter, at zero if it has no labels.
+        
+        Args:
+            name: Metric family name
+            documentation: Help text
+            label_names: Names of the labels every sample carries
+        """
+        super().__init__(name, documentation, label_names)
+        if not self.label_names:
+            self.series[()] = 0.0
+    
+    def inc(self, amount: float = 1.0, **labels):
+        """
+        Increase the count of a series.
+        
+        Args:
+            amount: Amount to add
+            **labels: Label values of the series
+        """
+        key = self.get_key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0.0) + amount
+    
+    def render_samples(self) -> List[str]:
+        """
+        Render the sample lines of the family.
+        
+        Returns:
+            List of sample lines
+        """
+        with self.lock:
+            items = sorted(self.series.items())
+        return [
+            f"{self.name}_total{format_labels(self.label_names, key)} {format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down, either set directly or computed at scrape time.
+    """
+    
+    metric_type = "gauge"
+    
+    def set(self, value: float, **labels):
+        """
+        Set the value of a series.
+        
+        Args:
+            value: New value
+            **labels: Label values of the series
+        """
+        key = self.get_key(labels)
+        with self.lock:
+            self.series[key] = value
+    
+    def set_function(self, function: Callable[[], float], **labels):
+        """
+        Compute the value of a series when it is scraped.
+        
+        Args:
+            function: Callable returning the current value
+            **labels: Label values of the series
+        """
+        self.set(function, **labels)
+    
+    def render_samples(self) -> List[str]:
+        """
+        Render the sample lines of the family.
+        
+        Returns:
+            List of sample lines
+        """
+        with self.lock:
+            items = sorted(self.series.items())
+        return [
+            f"{self.name}{format_labels(self.label_names, key)} "
+            f"{format_value(value() if callable(value) else value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(Metric):
+    """
+    Distribution of observations over fixed cumulative buckets.
+    """
+    
+    metric_type = "histogram"
+    
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...],
+                 label_names: Tuple[str, ...] = ()):
+        """
+        Initialize the histogram.
+        
+        Args:
+            name: Metric family name
+            documentation: Help text
+            buckets: Upper bounds of the buckets, in increasing order
+            label_names: Names of the labels every sample carries
+        """
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets) + (math.inf,)
+    
+    def observe(self, value: float, **labels):
+        """
+        Record an observation.
+        
+        Args:
+            value: Observed value
+            **labels: Label values of the series
+        """
+        key = self.get_key(labels)
+        with self.lock:
+            counts, total = self.series.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self.series[key] = (counts, total + value)
+    
+    def render_samples(self) -> List[str]:
+        """
+        Render the sample lines of the family.
+        
+        Returns:
+            List of sample lines
+        """
+        with self.lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self.series.items())
+        
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, key)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, key)} {format_value(total)}")
+        return lines
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the OpenMetrics exposition on /metrics.
+    """
+    
+    protocol_version = "HTTP/1.1"
+    metrics = None
+    
+    def do_GET(self):
+        """
+        Send the current exposition, or 404 for any other path.
+        """
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        
+        body = self.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """
+        Keep scrapes out of the console.
+        """
+
+
+class Metrics:
+    """
+    Rotation and tunnel metrics of CycleVPN, with an optional scrape endpoint.
+    
+    Metrics are always recorded in memory, which only costs a dictionary
+    update per event. When metrics.enabled is set, start() serves them in
+    the OpenMetrics text format on http://<listen_address>:<port>/metrics.
+    Multi-tunnel exits are told apart by the exit label; the single
+    tunnel of the normal rotation is the "main" exit. Rotation downtime
+    runs from the end of an exit's session to its next verified
+    connection, so make-before-break switches record none.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the metrics.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.metrics_config = config_manager.get_metrics_config()
+        self.server = None
+        self.thread = None
+        self.current_servers = {}
+        self.down_since = {}
+        
+        self.connect_latency = Histogram(
+            "cyclevpn_connect_latency_seconds",
+            "Time from launching OpenVPN until the tunnel is up",
+            CONNECT_LATENCY_BUCKETS,
+            ("server",)
+        )
+        self.verification_latency = Histogram(
+            "cyclevpn_verification_latency_seconds",
+            "Time spent verifying a new tunnel",
+            VERIFICATION_LATENCY_BUCKETS
+        )
+        self.rotation_downtime = Histogram(
+            "cyclevpn_rotation_downtime_seconds",
+            "Time without a verified tunnel between two sessions",
+            DOWNTIME_BUCKETS,
+            ("exit",)
+        )
+        self.connection_failures = Counter(
+            "cyclevpn_connection_failures",
+            "Failed connections and sessions per server and stage",
+            ("server", "stage")
+        )
+        self.kill_switch_activations = Counter(
+            "cyclevpn_kill_switch_activations",
+            "Kill switch activations"
+        )
+        self.emergency_shutdowns = Counter(
+            "cyclevpn_emergency_shutdowns",
+            "Emergency shutdowns"
+        )
+        self.current_server = Gauge(
+            "cyclevpn_current_server",
+            "Server each exit is connected to, 1 for the active server",
+            ("exit", "server")
+        )
+        self.session_age = Gauge(
+            "cyclevpn_session_age_seconds",
+            "Age of the current session of each exit",
+            ("exit",)
+        )
+        self.tunnel_throughput = Gauge(
+            "cyclevpn_tunnel_bytes_per_second",
+            "Traffic rate of each tun device over the last health check interval",
+            ("device", "direction")
+        )
+        
+        self.families = [
+            self.connect_latency, self.verification_latency, self.rotation_downtime,
+            self.connection_failures, self.kill_switch_activations, self.emergency_shutdowns,
+            self.current_server, self.session_age, self.tunnel_throughput,
+        ]
+    
+    def render(self) -> str:
+        """
+        Render every metric family.
+        
+        Returns:
+            OpenMetrics text exposition
+        """
+        lines = []
+        for family in self.families:
+            lines.extend(family.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+    
+    def start(self) -> bool:
+        """
+        Serve the metrics endpoint in a background thread, if enabled.
+        
+        Returns:
+            True if the endpoint is serving or disabled, False if it failed to start
+        """
+        if not self.metrics_config.get('enabled', False) or self.server:
+            return True
+        
+        address = self.metrics_config.get('listen_address', '127.0.0.1')
+        port = self.metrics_config.get('port', 9469)
+        handler = type("BoundMetricsRequestHandler", (MetricsRequestHandler,), {"metrics": self})
+        
+        try:
+            self.server = ThreadingHTTPServer((address, port), handler)
+        except OSError as e:
+            self.logger.error(f"Failed to start metrics endpoint on {address}:{port}: {e}")
+            return False
+        
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Metrics available at http://{address}:{self.server.server_address[1]}/metrics")
+        return True
+    
+    def stop(self):
+        """
+        Stop serving and close the listening socket.
+        """
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
+    
+    def record_connection(self, server: str, connect_latency: Optional[float], verified: bool,
+                          exit_name: str = MAIN_EXIT):
+        """
+        Record the outcome of a connection attempt.
+        
+        A verified connection starts a session on the exit. If the exit
+        lost a session before, the time since then is its rotation downtime.
+        
+        Args:
+            server: OpenVPN configuration file name
+            connect_latency: Time until the tunnel was up, or None if it never came up
+            verified: Whether the connection passed verification
+            exit_name: Exit the connection belongs to
+        """
+        if connect_latency is not None:
+            self.connect_latency.observe(connect_latency, server=server)
+        
+        if not verified:
+            stage = "connect" if connect_latency is None else "verify"
+            self.connection_failures.inc(server=server, stage=stage)
+            return
+        
+        now = time.monotonic()
+        down_since = self.down_since.pop(exit_name, None)
+        if down_since is not None:
+            self.rotation_downtime.observe(now - down_since, exit=exit_name)
+        
+        self.clear_current_server(exit_name)
+        self.current_servers[exit_name] = server
+        self.current_server.set(1, exit=exit_name, server=server)
+        self.session_age.set_function(lambda: time.monotonic() - now, exit=exit_name)
+    
+    def record_tunnel_failure(self, server: Optional[str]):
+        """
+        Count a tunnel that failed its health checks mid-session.
+        
+        Args:
+            server: OpenVPN configuration file name of the failed tunnel
+        """
+        self.connection_failures.inc(server=server or "unknown", stage="health")
+    
+    def end_session(self, exit_name: str = MAIN_EXIT):
+        """
+        Mark the exit as disconnected, which starts its downtime.
+        
+        Args:
+            exit_name: Exit name
+        """
+        if self.clear_current_server(exit_name):
+            self.down_since[exit_name] = time.monotonic()
+            self.session_age.remove(exit=exit_name)
+    
+    def clear_current_server(self, exit_name: str) -> bool:
+        """
+        Drop the current server series of an exit.
+        
+        Args:
+            exit_name: Exit name
+        
+        Returns:
+            True if the exit had a current server, False otherwise
+        """
+        previous = self.current_servers.pop(exit_name, None)
+        if previous is None:
+            return False
+        self.current_server.remove(exit=exit_name, server=previous)
+        return True
+    
+    def set_tunnel_rates(self, device: str, rx_rate: Optional[float], tx_rate: Optional[float] = None):
+        """
+        Set the traffic rate of a tun device.
+        
+        Args:
+            device: tun device name
+            rx_rate: Received bytes per second, or None to drop the device's series
+            tx_rate: Sent bytes per second
+        """
+        if rx_rate is None:
+            self.tunnel_throughput.remove(device=device, direction="rx")
+            self.tunnel_throughput.remove(device=device, direction="tx")
+            return
+        
+        self.tunnel_throughput.set(rx_rate, device=device, direction="rx")
+        self.tunnel_throughput.set(tx_rate, device=device, direction="tx")
@@ -0,0 +1,456 @@
+import sqlite3
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from connectivity_client import NamespaceClient
+from health_monitor import HealthMonitor
+from netns_manager import NamespaceManager
+from public_ip_resolver import PublicIPResolver
+from rotation_policy import RotationPolicy, create_rotation_policy
+from route_manager import RouteManager
+from vpn_tunnel import VPNTunnel
+
+
+class TunnelExit:
+    """
+    One exit of multi-tunnel mode: a tunnel and its worker in a namespace.
+    
+    The exit rotates on its own schedule, break-before-make: the worker is
+    stopped, the tunnel replaced, then the worker started again. Because
+    the namespace has no default route, traffic simply stops while the
+    tunnel is down.
+    """
+    
+    def __init__(self, manager, index: int, namespace: str, gateway: str, veth_device: str):
+        """
+        Initialize the exit.
+        
+        Args:
+            manager: Owning MultiTunnelManager
+            index: Exit index
+            namespace: Network namespace of the exit
+            gateway: Host end of the veth pair
+            veth_device: Namespace end of the veth pair
+        """
+        self.manager = manager
+        self.logger = manager.logger
+        self.index = index
+        self.namespace = namespace
+        self.route_manager = RouteManager(manager.logger, netns=namespace, underlay_gateway=(gateway, veth_device))
+        self.namespace_client = NamespaceClient(namespace)
+        self.ip_resolver = PublicIPResolver(manager.config_manager, manager.logger, self.namespace_client)
+        self.health_monitor = HealthMonitor(
+            manager.config_manager,
+            manager.logger,
+            manager.vpn_manager.kill_switch,
+            manager.vpn_manager.control,
+            verify_external_ip=self.verify_external_ip
+        )
+        
+        prefix = manager.config_manager.get_network_config().get('tun_device_prefix', 'cvpn')
+        self.device = f"{prefix}x{index}"
+        self.tunnel = None
+        self.worker = None
+        self.current_ovpn_file = None
+        self.history_session_id = None
+        self.session_started_at = None
+    
+    def connect(self, ovpn_file: str, username: str, password: str) -> bool:
+        """
+        Bring up a tunnel inside the namespace and route traffic through it.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            True if the tunnel is up, carries the namespace routes and hides the
+            initial IP, False otherwise
+        """
+        vpn_manager = self.manager.vpn_manager
+        with self.manager.selection_lock:
+            endpoint = vpn_manager.resolve_endpoint(ovpn_file)
+            profile = vpn_manager.catalog.get(ovpn_file)
+        if not endpoint or not self.route_manager.pin_host_route(endpoint[0]):
+            return False
+        
+        self.logger.info(f"[{self.namespace}] Connecting to VPN server using: {ovpn_file}")
+        self.current_ovpn_file = ovpn_file
+        self.tunnel = VPNTunnel(
+            self.manager.config_manager,
+            self.logger,
+            Path(profile.path),
+            self.device,
+            route_noexec=True,
+            remote=endpoint[:2],
+            process_registry=vpn_manager.kill_switch.process_registry,
+            netns=self.namespace
+        )
+        
+        started_at = time.monotonic()
+        connected = (
+            self.tunnel.start(username, password)
+            and self.route_manager.switch_default_route(self.device)
+            and self.tunnel.is_link_up()
+            and self.tunnel.is_connected()
+            and self.verify_external_ip()
+        )
+        
+        connect_latency = time.monotonic() - started_at if connected else None
+        vpn_manager.kill_switch.metrics.record_connection(ovpn_file, connect_latency, connected, self.namespace)
+        try:
+            session_id = vpn_manager.history.record_attempt(ovpn_file, connect_latency, connected)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to record server history: {e}")
+            session_id = None
+        
+        if not connected:
+            self.logger.error(f"[{self.namespace}] Failed to establish VPN connection using {ovpn_file}")
+            self.disconnect()
+            return False
+        
+        self.history_session_id = session_id
+        self.session_started_at = time.monotonic()
+        self.logger.success(
+            f"[{self.namespace}] VPN connection established using {ovpn_file}",
+            server=ovpn_file,
+            phase="connect",
+            duration=round(connect_latency, 3),
+            exit=self.namespace
+        )
+        return True
+    
+    def verify_external_ip(self) -> bool:
+        """
+        Check from inside the namespace that the exit does not show the host's public IP.
+        
+        Returns:
+            True if the public IP seen from the namespace differs from the initial one, False otherwise
+        """
+        current_ip = self.ip_resolver.resolve()
+        if not current_ip:
+            self.logger.error(f"[{self.namespace}] Cannot verify the exit - unable to get its public IP")
+            return False
+        
+        if current_ip == self.manager.vpn_manager.kill_switch.initial_ip:
+            self.logger.error(f"[{self.namespace}] Exit shows the initial IP address: {current_ip}")
+            return False
+        
+        self.logger.debug(f"[{self.namespace}] Exit public IP: {current_ip}")
+        return True
+    
+    def start_worker(self):
+        """
+        Start the configured worker command inside the namespace.
+        """
+        command = [
+            argument.format(index=self.index, netns=self.namespace)
+            for argument in self.manager.multi_config.get('worker_command', [])
+        ]
+        if not command:
+            return
+        
+        try:
+            process = subprocess.Popen(
+                ["ip", "netns", "exec", self.namespace] + command,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self.logger.error(f"[{self.namespace}] Failed to start worker: {e}")
+            return
+        
+        self.worker = process
+        self.manager.vpn_manager.kill_switch.process_registry.register(process.pid, f"worker:{self.namespace}")
+        self.logger.info(f"[{self.namespace}] Worker started: {' '.join(command)}")
+    
+    def stop_worker(self):
+        """
+        Stop the worker, if one is running.
+        """
+        if self.worker:
+            timeout = self.manager.config_manager.get_network_config().get('process_stop_timeout', 5)
+            self.manager.vpn_manager.kill_switch.process_registry.stop(self.worker.pid, timeout)
+            self.worker.poll()
+            self.worker = None
+    
+    def disconnect(self):
+        """
+        Stop the worker, then the tunnel, and remove the namespace routes.
+        """
+        self.stop_worker()
+        
+        if self.tunnel:
+            if self.history_session_id is not None:
+                rx_bytes, tx_bytes = self.tunnel.get_traffic_counters()
+                try:
+                    self.manager.vpn_manager.history.record_session_end(
+                        self.history_session_id,
+                        time.monotonic() - self.session_started_at,
+                        rx_bytes,
+                        tx_bytes,
+                        not self.tunnel.is_connected()
+                    )
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Failed to record server history: {e}")
+                self.history_session_id = None
+            
+            self.tunnel.stop()
+            self.tunnel = None
+        
+        self.manager.vpn_manager.kill_switch.metrics.end_session(self.namespace)
+        self.namespace_client.reset()
+        self.route_manager.clear_routes()
+        self.current_ovpn_file = None
+    
+    def get_status(self) -> dict:
+        """
+        Describe the exit for the control socket.
+        
+        Returns:
+            Dictionary with the namespace, server, tun device, session age and traffic
+        """
+        tunnel = self.tunnel
+        status = {"namespace": self.namespace, "server": self.current_ovpn_file, "device": self.device}
+        if tunnel:
+            rx_bytes, tx_bytes = tunnel.get_traffic_counters()
+            status.update(rx_bytes=rx_bytes, tx_bytes=tx_bytes)
+        if tunnel and self.history_session_id is not None:
+            status["session_seconds"] = round(time.monotonic() - self.session_started_at, 1)
+        return status
+    
+    def hold_session(self, policy: RotationPolicy, session_limit: Optional[float] = None) -> Optional[str]:
+        """
+        Keep the session running until it ends, fails or the exit is stopped.
+        
+        Args:
+            policy: Rotation policy deciding when the session ends
+            session_limit: Optional number of seconds after which the session ends anyway
+        
+        Returns:
+            Failure reason if the tunnel failed, None otherwise
+        """
+        self.health_monitor.start(self.tunnel, policy)
+        deadline = time.monotonic() + session_limit if session_limit is not None else None
+        try:
+            while not self.manager.stop_event.is_set():
+                if self.health_monitor.finished.wait(1.0):
+                    return self.health_monitor.failure
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.health_monitor.end_session("staggered first session")
+            return None
+        finally:
+            self.health_monitor.stop()
+    
+    def run(self, username: str, password: str, first_session: Optional[float] = None):
+        """
+        Rotate this exit through the shared server pool until stopped.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+            first_session: Optional length in seconds of the first session, to stagger rotations
+        """
+        stop_event = self.manager.stop_event
+        config_manager = self.manager.config_manager
+        failure_count = 0
+        session_limit = first_session
+        
+        try:
+            while not stop_event.is_set():
+                config_manager.apply_pending_changes()
+                max_failures = config_manager.get_session_config()['max_connection_failures']
+                
+                ovpn_file = self.manager.acquire_server(self)
+                if not ovpn_file:
+                    self.logger.error(f"[{self.namespace}] No free server available")
+                    stop_event.wait(5)
+                    continue
+                
+                try:
+                    if not self.connect(ovpn_file, username, password):
+                        failure_count += 1
+                        if failure_count >= max_failures:
+                            self.logger.error(f"[{self.namespace}] Maximum failures reached, exit stopped")
+                            return
+                        continue
+                    
+                    failure_count = 0
+                    self.start_worker()
+                    
+                    # The RTT probe of the degraded policy cannot reach into the namespace
+                    policy = create_rotation_policy(config_manager)
+                    self.logger.info(f"[{self.namespace}] VPN session active {policy.describe()}...")
+                    if session_limit is not None:
+                        self.logger.info(f"[{self.namespace}] First session shortened to {session_limit:.0f}s to stagger rotations")
+                    failure = self.hold_session(policy, session_limit)
+                    session_limit = None
+                    if failure:
+                        self.manager.vpn_manager.kill_switch.metrics.record_tunnel_failure(ovpn_file)
+                        self.logger.warning(f"[{self.namespace}] Rotating early after tunnel failure: {failure}")
+                finally:
+                    self.disconnect()
+                    self.manager.release_server(ovpn_file)
+        except Exception as e:
+            self.logger.error(f"[{self.namespace}] Unexpected error: {e}")
+        finally:
+            self.disconnect()
+
+
+class MultiTunnelManager:
+    """
+    Runs several exits at once, each in its own network namespace.
+    
+    OpenVPN is single-threaded, so one tunnel per core lets total
+    throughput scale with the machine. The exits share the profile pool
+    and the server history but never use the same server at the same
+    time. All exits connect at once, and the first session of exit i
+    lasts i/N of a cooldown so rotations are staggered instead of all
+    going down together.
+    """
+    
+    def __init__(self, config_manager, logger_manager, vpn_manager):
+        """
+        Initialize the multi-tunnel manager.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            vpn_manager: Instance of VPNManager providing the catalog, selector and history
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.vpn_manager = vpn_manager
+        self.multi_config = config_manager.get_multi_tunnel_config()
+        self.namespace_manager = NamespaceManager(config_manager, logger_manager)
+        
+        self.stop_event = vpn_manager.stop_requested
+        self.selection_lock = threading.Lock()
+        self.servers_in_use = set()
+        self.ovpn_files = []
+        self.passes = iter(())
+        self.exits = []
+        self.threads = []
+    
+    def acquire_server(self, tunnel_exit: TunnelExit) -> Optional[str]:
+        """
+        Pick the next server for an exit, skipping those used by other exits.
+        
+        Args:
+            tunnel_exit: Exit asking for a server
+        
+        Returns:
+            OpenVPN configuration file name, or None if every server is in use
+        """
+        with self.selection_lock:
+            for _ in range(2 * len(self.ovpn_files)):
+                ovpn_file = next(self.passes, None)
+                if ovpn_file is None:
+                    self.passes = self.vpn_manager.server_selector.iterate_pass(self.ovpn_files)
+                    continue
+                if ovpn_file not in self.servers_in_use:
+                    self.servers_in_use.add(ovpn_file)
+                    return ovpn_file
+        return None
+    
+    def get_status(self) -> list:
+        """
+        Describe every exit for the control socket.
+        
+        Returns:
+            List of exit status dictionaries
+        """
+        return [tunnel_exit.get_status() for tunnel_exit in list(self.exits)]
+    
+    def release_server(self, ovpn_file: str):
+        """
+        Return a server to the shared pool.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+        """
+        with self.selection_lock:
+            self.servers_in_use.discard(ovpn_file)
+    
+    def start(self, username: str, password: str, count: int) -> bool:
+        """
+        Create the namespaces and start one rotation thread per exit.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+            count: Number of exits
+        
+        Returns:
+            True if at least one exit started, False otherwise
+        """
+        self.ovpn_files = self.vpn_manager.discover_ovpn_files()
+        if len(self.ovpn_files) < count:
+            self.logger.error(f"{count} exits need at least {count} OpenVPN files")
+            return False
+        
+        if not self.vpn_manager.warmed_up:
+            self.vpn_manager.warm_up(self.ovpn_files)
+        
+        underlay = self.vpn_manager.route_manager.get_underlay_gateway()
+        if not underlay or not self.namespace_manager.enable_masquerade(underlay[1]):
+            return False
+        
+        cooldown_seconds = self.config_manager.get_cooldown_seconds()
+        stagger = self.multi_config.get('stagger', True)
+        
+        for index in range(1, count + 1):
+            namespace = self.namespace_manager.setup(index)
+            if not namespace:
+                continue
+            
+            tunnel_exit = TunnelExit(self, index, *namespace)
+            first_session = index * cooldown_seconds / count if stagger and index < count else None
+            thread = threading.Thread(
+                target=tunnel_exit.run,
+                args=(username, password, first_session),
+                name=f"exit-{index}",
+                daemon=True
+            )
+            self.exits.append(tunnel_exit)
+            self.threads.append(thread)
+            thread.start()
+        
+        self.logger.info(f"Multi-tunnel mode running with {len(self.exits)} exits")
+        return bool(self.exits)
+    
+    def run(self, username: str, password: str):
+        """
+        Run the exits until every exit stopped or a stop is requested.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+        """
+        try:
+            if self.start(username, password, self.multi_config.get('exits', 1)):
+                while any(thread.is_alive() for thread in self.threads):
+                    if self.stop_event.wait(1):
+                        self.logger.info("VPN rotation stopped by user")
+                        break
+                else:
+                    self.logger.error("All exits stopped")
+        except KeyboardInterrupt:
+            self.logger.info("VPN rotation stopped by user")
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """
+        Stop every exit and remove the namespaces.
+        """
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=30)
+        self.threads = []
+        self.exits = []
+        self.namespace_manager.teardown_all()
\ No newline at end of file
@@ -0,0 +1,164 @@
+import shutil
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from firewall import run_command
+
+
+class NamespaceManager:
+    """
+    Creates the network namespaces used by multi-tunnel mode.
+    
+    Each exit gets a namespace linked to the host by a veth pair on its
+    own /30. The namespace has no default route: only the pinned VPN
+    server route uses the veth link, and everything else has to go through
+    the tunnel, so a worker can never reach the network outside its tunnel.
+    The host masquerades the veth subnets on the underlay interface.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the namespace manager.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.multi_config = config_manager.get_multi_tunnel_config()
+        self.prefix = self.multi_config.get('namespace_prefix', 'cyclevpn')
+        self.subnet = self.multi_config.get('subnet', '10.231')
+        self.namespaces = []
+    
+    def get_namespace_name(self, index: int) -> str:
+        """
+        Get the namespace name of an exit.
+        
+        Args:
+            index: Exit index
+        
+        Returns:
+            Namespace name
+        """
+        return f"{self.prefix}{index}"
+    
+    def run(self, command: List[str], ignore: str = "") -> bool:
+        """
+        Run a setup command, logging failures.
+        
+        Args:
+            command: Command as a list of arguments
+            ignore: Error text that should not count as a failure
+        
+        Returns:
+            True if the command succeeded, False otherwise
+        """
+        returncode, stderr = run_command(command)
+        if returncode == 0 or (ignore and ignore in stderr):
+            return True
+        self.logger.error(f"Command failed: {' '.join(command)}: {stderr}")
+        return False
+    
+    def enable_masquerade(self, underlay_device: str) -> bool:
+        """
+        Enable forwarding and NAT for the namespace subnets on the host.
+        
+        Args:
+            underlay_device: Host interface facing the network
+        
+        Returns:
+            True if forwarding and NAT are in place, False otherwise
+        """
+        try:
+            Path("/proc/sys/net/ipv4/ip_forward").write_text("1\n")
+        except OSError as e:
+            self.logger.error(f"Failed to enable IP forwarding: {e}")
+            return False
+        
+        table = f"{self.prefix}_nat"
+        ruleset = (
+            f"table ip {table}\n"
+            f"delete table ip {table}\n"
+            f"table ip {table} {{\n"
+            f"    chain postrouting {{\n"
+            f"        type nat hook postrouting priority 100; policy accept;\n"
+            f"        ip saddr {self.subnet}.0.0/16 oifname \"{underlay_device}\" masquerade\n"
+            f"    }}\n"
+            f"}}\n"
+        )
+        returncode, stderr = run_command(["nft", "-f", "-"], ruleset)
+        if returncode != 0:
+            self.logger.error(f"Failed to install namespace NAT: {stderr}")
+            return False
+        return True
+    
+    def setup(self, index: int) -> Optional[Tuple[str, str, str]]:
+        """
+        Create the namespace of an exit and link it to the host.
+        
+        Args:
+            index: Exit index
+        
+        Returns:
+            Tuple of (namespace, gateway, device) with the host end of the veth
+            pair as gateway and the namespace end as device, or None on failure
+        """
+        namespace = self.get_namespace_name(index)
+        host_device = f"cvh{index}"
+        namespace_device = f"cvn{index}"
+        host_address = f"{self.subnet}.{index}.1"
+        namespace_address = f"{self.subnet}.{index}.2"
+        
+        commands = [
+            (["ip", "netns", "add", namespace], "File exists"),
+            (["ip", "link", "add", host_device, "type", "veth", "peer", "name", namespace_device,
+              "netns", namespace], "File exists"),
+            (["ip", "addr", "replace", f"{host_address}/30", "dev", host_device], ""),
+            (["ip", "link", "set", host_device, "up"], ""),
+            (["ip", "-n", namespace, "addr", "replace", f"{namespace_address}/30", "dev", namespace_device], ""),
+            (["ip", "-n", namespace, "link", "set", namespace_device, "up"], ""),
+            (["ip", "-n", namespace, "link", "set", "lo", "up"], ""),
+        ]
+        
+        for command, ignore in commands:
+            if not self.run(command, ignore):
+                self.teardown(index)
+                return None
+        
+        nameservers = self.multi_config.get('nameservers', ['1.1.1.1'])
+        resolv_directory = Path("/etc/netns") / namespace
+        try:
+            resolv_directory.mkdir(parents=True, exist_ok=True)
+            (resolv_directory / "resolv.conf").write_text(
+                "".join(f"nameserver {server}\n" for server in nameservers)
+            )
+        except OSError as e:
+            self.logger.warning(f"Failed to write resolv.conf for {namespace}: {e}")
+        
+        if namespace not in self.namespaces:
+            self.namespaces.append(namespace)
+        self.logger.info(f"Network namespace {namespace} ready ({namespace_address})")
+        return namespace, host_address, namespace_device
+    
+    def teardown(self, index: int):
+        """
+        Delete the namespace of an exit, which also removes its veth pair.
+        
+        Args:
+            index: Exit index
+        """
+        namespace = self.get_namespace_name(index)
+        run_command(["ip", "netns", "del", namespace])
+        shutil.rmtree(Path("/etc/netns") / namespace, ignore_errors=True)
+        
+        if namespace in self.namespaces:
+            self.namespaces.remove(namespace)
+    
+    def teardown_all(self):
+        """
+        Delete every namespace created by this manager and the host NAT table.
+        """
+        for namespace in list(self.namespaces):
+            self.teardown(int(namespace[len(self.prefix):]))
+        run_command(["nft", "delete", "table", "ip", f"{self.prefix}_nat"])
\ No newline at end of file
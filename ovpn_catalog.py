@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+INLINE_BLOCKS = {"ca": "ca_fingerprint", "crl-verify": "crl_fingerprint"}
+
+
+@dataclass(frozen=True)
+class OVPNProfile:
+    """
+    Compact, parsed view of an OpenVPN configuration file.
+    """
+    
+    name: str
+    path: str
+    mtime_ns: int
+    size: int
+    remote_host: Optional[str] = None
+    remote_port: int = 1194
+    proto: str = "udp"
+    cipher: Optional[str] = None
+    auth: Optional[str] = None
+    ca_fingerprint: Optional[str] = None
+    crl_fingerprint: Optional[str] = None
+    region: str = ""
+
+
+def fingerprint(data: str) -> str:
+    """
+    Compute the fingerprint of a PEM block, ignoring whitespace differences.
+    
+    Args:
+        data: PEM text
+    
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    normalized = "\n".join(line.strip() for line in data.strip().splitlines() if line.strip())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def region_from_filename(name: str) -> str:
+    """
+    Derive a region tag from a profile file name.
+    
+    "us_new_york.ovpn" gives "us", "czech_republic.ovpn" gives "czech_republic".
+    
+    Args:
+        name: Profile file name
+    
+    Returns:
+        Region tag
+    """
+    stem = Path(name).stem.lower()
+    prefix, _, rest = stem.partition("_")
+    return prefix if rest and len(prefix) == 2 else stem
+
+
+def parse_ovpn_file(path: Path, stat: os.stat_result) -> OVPNProfile:
+    """
+    Parse an OpenVPN configuration file into a profile record.
+    
+    Args:
+        path: Path to the configuration file
+        stat: Result of os.stat on the file
+    
+    Returns:
+        Parsed profile
+    """
+    fields = {}
+    block_name = None
+    block_lines = []
+    
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        for raw_line in file:
+            line = raw_line.strip()
+            
+            if block_name:
+                if line == f"</{block_name}>":
+                    if block_name in INLINE_BLOCKS:
+                        fields[INLINE_BLOCKS[block_name]] = fingerprint("\n".join(block_lines))
+                    block_name = None
+                    block_lines = []
+                else:
+                    block_lines.append(line)
+                continue
+            
+            if line.startswith("<") and line.endswith(">") and not line.startswith("</"):
+                block_name = line[1:-1]
+                continue
+            
+            parts = line.split()
+            if not parts or parts[0].startswith(("#", ";")):
+                continue
+            
+            directive = parts[0]
+            if directive == "remote" and len(parts) >= 2 and "remote_host" not in fields:
+                fields["remote_host"] = parts[1]
+                if len(parts) >= 3 and parts[2].isdigit():
+                    fields["remote_port"] = int(parts[2])
+                if len(parts) >= 4:
+                    fields["proto"] = "tcp" if parts[3].startswith("tcp") else "udp"
+            elif directive == "proto" and len(parts) >= 2:
+                fields["proto"] = "tcp" if parts[1].startswith("tcp") else "udp"
+            elif directive in ("cipher", "auth") and len(parts) >= 2:
+                fields[directive] = parts[1].lower()
+            elif directive in INLINE_BLOCKS and len(parts) >= 2:
+                referenced = path.parent / parts[1]
+                if referenced.is_file():
+                    fields[INLINE_BLOCKS[directive]] = fingerprint(referenced.read_text(errors='replace'))
+    
+    return OVPNProfile(
+        name=path.name,
+        path=str(path),
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        region=region_from_filename(path.name),
+        **fields
+    )
+
+
+class OVPNCatalog:
+    """
+    Cached catalog of the OpenVPN profiles in the configured directory.
+    
+    Each profile is parsed once and stored on disk keyed by path, mtime and
+    size, so a rescan only re-reads the files that actually changed.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the catalog.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.paths_config = config_manager.get_paths_config()
+        self.cache_path = Path(self.paths_config.get('catalog_cache', '.cyclevpn_catalog.json'))
+        self.profiles = {}
+        self.cache_loaded = False
+    
+    def load_cache(self) -> Dict[str, OVPNProfile]:
+        """
+        Load cached profiles from disk.
+        
+        Returns:
+            Dictionary of profile path to profile
+        """
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+            return {entry['path']: OVPNProfile(**entry) for entry in entries}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            self.logger.warning(f"Ignoring unreadable catalog cache {self.cache_path}: {e}")
+            return {}
+    
+    def save_cache(self, profiles: Dict[str, OVPNProfile]):
+        """
+        Write the profiles to the on-disk cache atomically.
+        
+        Args:
+            profiles: Dictionary of profile path to profile
+        """
+        temp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump([asdict(profile) for profile in profiles.values()], file, indent=1)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write catalog cache {self.cache_path}: {e}")
+    
+    def scan(self) -> List[OVPNProfile]:
+        """
+        Rescan the profile directory, parsing only new or modified files.
+        
+        Returns:
+            List of profiles sorted by file name
+        """
+        ovpn_directory = Path(self.paths_config['ovpn_directory'])
+        
+        if not self.cache_loaded:
+            self.profiles = self.load_cache()
+            self.cache_loaded = True
+        
+        profiles = {}
+        parsed = 0
+        
+        for file in ovpn_directory.glob("*.ovpn"):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            if not file.is_file():
+                continue
+            
+            key = str(file)
+            cached = self.profiles.get(key)
+            if cached and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                profiles[key] = cached
+                continue
+            
+            try:
+                profiles[key] = parse_ovpn_file(file, stat)
+                parsed += 1
+            except OSError as e:
+                self.logger.error(f"Failed to parse OpenVPN file {file.name}: {e}")
+        
+        changed = parsed > 0 or profiles.keys() != self.profiles.keys()
+        self.profiles = profiles
+        
+        if changed:
+            self.logger.debug(f"Catalog updated: {parsed} profiles parsed, {len(profiles) - parsed} cached")
+            self.save_cache(profiles)
+        
+        return sorted(profiles.values(), key=lambda profile: profile.name)
+    
+    def get(self, name: str) -> Optional[OVPNProfile]:
+        """
+        Get a profile by file name, rescanning if it is unknown or changed.
+        
+        Args:
+            name: Profile file name
+        
+        Returns:
+            The profile, or None if the file does not exist
+        """
+        path = Path(self.paths_config['ovpn_directory']) / name
+        profile = self.profiles.get(str(path))
+        
+        if profile:
+            try:
+                stat = path.stat()
+                if profile.mtime_ns == stat.st_mtime_ns and profile.size == stat.st_size:
+                    return profile
+            except OSError:
+                return None
+        
+        for profile in self.scan():
+            if profile.name == name:
+                return profile
+        return None
\ No newline at end of file
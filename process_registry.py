@@ -0,0 +1,186 @@
+import os
+import select
+import signal
+import threading
+from typing import List, Optional
+
+import psutil
+
+
+def wait_for_exit(pid: int, timeout: float) -> bool:
+    """
+    Wait for a process to exit without sleeping a fixed delay.
+    
+    A pidfd is polled when the kernel supports it, so the wait returns as
+    soon as the process is gone; otherwise psutil polls with a short backoff.
+    
+    Args:
+        pid: Process identifier
+        timeout: Maximum wait in seconds
+    
+    Returns:
+        True if the process is gone, False if it is still running
+    """
+    pidfd_open = getattr(os, "pidfd_open", None)
+    
+    if pidfd_open:
+        try:
+            pidfd = pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pidfd = None
+        
+        if pidfd is not None:
+            try:
+                poller = select.poll()
+                poller.register(pidfd, select.POLLIN)
+                return bool(poller.poll(max(timeout, 0) * 1000))
+            finally:
+                os.close(pidfd)
+    
+    try:
+        psutil.Process(pid).wait(timeout=timeout)
+        return True
+    except psutil.NoSuchProcess:
+        return True
+    except psutil.TimeoutExpired:
+        return False
+
+
+class ProcessRegistry:
+    """
+    Registry of the processes started by CycleVPN.
+    
+    Each entry keeps the process creation time next to its PID, so a
+    recycled PID is never signalled by mistake. Stopping a tracked process
+    only touches that process; walking the whole process table is left to
+    the kill switch as a last resort.
+    """
+    
+    def __init__(self, logger_manager):
+        """
+        Initialize the process registry.
+        
+        Args:
+            logger_manager: Instance of LoggerManager
+        """
+        self.logger = logger_manager
+        self.processes = {}
+        self.lock = threading.Lock()
+    
+    def register(self, pid: int, label: str) -> bool:
+        """
+        Track a running process.
+        
+        Args:
+            pid: Process identifier
+            label: Short description, e.g. "openvpn:cvpn0"
+        
+        Returns:
+            True if the process exists and is now tracked, False otherwise
+        """
+        try:
+            create_time = psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        
+        with self.lock:
+            self.processes[pid] = (label, create_time)
+        self.logger.debug(f"Tracking {label} process {pid}")
+        return True
+    
+    def unregister(self, pid: int):
+        """
+        Stop tracking a process.
+        
+        Args:
+            pid: Process identifier
+        """
+        with self.lock:
+            self.processes.pop(pid, None)
+    
+    def get_pids(self, prefix: str = "") -> List[int]:
+        """
+        Get the tracked PIDs whose label starts with the given prefix.
+        
+        Args:
+            prefix: Label prefix, e.g. "openvpn"
+        
+        Returns:
+            List of process identifiers
+        """
+        with self.lock:
+            return [pid for pid, (label, _) in self.processes.items() if label.startswith(prefix)]
+    
+    def get_process(self, pid: int) -> Optional[psutil.Process]:
+        """
+        Get a tracked process if it is still the one that was registered.
+        
+        Args:
+            pid: Process identifier
+        
+        Returns:
+            The process, or None if it exited or its PID was reused
+        """
+        with self.lock:
+            entry = self.processes.get(pid)
+        if not entry:
+            return None
+        
+        try:
+            process = psutil.Process(pid)
+            if process.create_time() == entry[1] and process.status() != psutil.STATUS_ZOMBIE:
+                return process
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        
+        self.unregister(pid)
+        return None
+    
+    def stop(self, pid: int, timeout: float = 5.0) -> bool:
+        """
+        Terminate a tracked process, escalating to SIGKILL after a bounded wait.
+        
+        Args:
+            pid: Process identifier
+            timeout: Time allowed for a clean exit in seconds
+        
+        Returns:
+            True if the process is gone, False otherwise
+        """
+        process = self.get_process(pid)
+        if not process:
+            return True
+        
+        with self.lock:
+            label = self.processes.get(pid, ("process", 0))[0]
+        
+        try:
+            process.send_signal(signal.SIGTERM)
+            if not wait_for_exit(pid, timeout):
+                process.kill()
+                self.logger.error(f"Force killed {label} process: {pid}")
+                wait_for_exit(pid, 1.0)
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied as e:
+            self.logger.error(f"Cannot stop {label} process {pid}: {e}")
+            return False
+        
+        self.unregister(pid)
+        return True
+    
+    def stop_all(self, prefix: str = "", timeout: float = 5.0) -> List[int]:
+        """
+        Terminate every tracked process whose label starts with the prefix.
+        
+        Args:
+            prefix: Label prefix, e.g. "openvpn"
+            timeout: Time allowed for a clean exit in seconds
+        
+        Returns:
+            List of the PIDs that were stopped
+        """
+        pids = self.get_pids(prefix)
+        return [pid for pid in pids if self.stop(pid, timeout)]
\ No newline at end of file
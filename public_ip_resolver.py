@@ -0,0 +1,305 @@
+import ipaddress
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import requests
+
+from connectivity_client import PATH_DEFAULT
+
+
+def parse_plain_ip(text: str) -> str:
+    """
+    Parse a provider response containing only the IP address.
+    
+    Args:
+        text: Response body
+    
+    Returns:
+        The IP address string
+    """
+    return text.strip()
+
+
+def parse_httpbin_ip(text: str) -> str:
+    """
+    Parse the JSON response returned by httpbin.org/ip.
+    
+    Args:
+        text: Response body
+    
+    Returns:
+        The IP address string
+    """
+    return json.loads(text)['origin'].split(",")[0].strip()
+
+
+DEFAULT_IP_PROVIDERS = [
+    ("https://ifconfig.io/ip", parse_plain_ip),
+    ("https://ipinfo.io/ip", parse_plain_ip),
+    ("https://httpbin.org/ip", parse_httpbin_ip),
+    ("https://api.ipify.org", parse_plain_ip),
+]
+
+# Providers whose answer is not the bare address; any other URL must return only the IP
+PROVIDER_PARSERS = {
+    "https://httpbin.org/ip": parse_httpbin_ip,
+}
+
+
+class ProviderStats:
+    """
+    Latency and error statistics for a single IP provider.
+    """
+    
+    SMOOTHING = 0.3
+    
+    def __init__(self):
+        """
+        Initialize empty statistics.
+        """
+        self.attempts = 0
+        self.failures = 0
+        self.latency = None
+        self.pending_since = None
+    
+    def record(self, latency: float, success: bool):
+        """
+        Record the outcome of one request.
+        
+        Args:
+            latency: Time spent on the request in seconds
+            success: Whether a valid IP address was returned
+        """
+        self.attempts += 1
+        self.pending_since = None
+        if not success:
+            self.failures += 1
+        
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.SMOOTHING * (latency - self.latency)
+    
+    def expected_latency(self) -> float:
+        """
+        Get the latency used to rank this provider.
+        
+        A request still pending from an earlier round counts with the time
+        it has been running so far, so a stalled provider is not ranked first.
+        
+        Returns:
+            Expected latency in seconds
+        """
+        latency = self.latency or 0.0
+        if self.pending_since is not None:
+            latency = max(latency, time.monotonic() - self.pending_since)
+        return latency
+    
+    def error_rate(self) -> float:
+        """
+        Get the fraction of failed requests.
+        
+        Returns:
+            Error rate between 0 and 1
+        """
+        return self.failures / self.attempts if self.attempts else 0.0
+
+
+class PublicIPResolver:
+    """
+    Resolves the public IP address by querying several providers concurrently.
+    
+    Providers are ranked by their smoothed latency, where failures count as
+    a full timeout, so slow or broken providers drift to the end of the list.
+    Requests are hedged: the best provider starts immediately and the others
+    follow after a short delay. Once an answer is accepted, the requests
+    that have not started are dropped; those already in flight are left to
+    finish in the background and their answers are ignored.
+    """
+    
+    def __init__(self, config_manager, logger_manager, client, providers: list = None):
+        """
+        Initialize the resolver.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            client: Instance of ConnectivityClient used for all requests
+            providers: Optional list of (url, parser) tuples, instead of ip_check_providers
+        
+        Raises:
+            ValueError: If there is no provider to query
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.network_config = config_manager.get_network_config()
+        if providers is None:
+            urls = self.network_config.get('ip_check_providers')
+            if urls is None:
+                providers = DEFAULT_IP_PROVIDERS
+            else:
+                providers = [(url, PROVIDER_PARSERS.get(url, parse_plain_ip)) for url in urls]
+        if not providers:
+            raise ValueError("At least one IP provider is required")
+        self.providers = list(providers)
+        self.stats = {url: ProviderStats() for url, _ in self.providers}
+        self.stats_lock = threading.Lock()
+        self.client = client
+    
+    def ranked_providers(self) -> list:
+        """
+        Get the providers ordered from fastest to slowest.
+        
+        Returns:
+            List of (url, parser) tuples
+        """
+        with self.stats_lock:
+            return sorted(
+                self.providers,
+                key=lambda provider: self.stats[provider[0]].expected_latency()
+            )
+    
+    def query_provider(self, url: str, parser: Callable[[str], str], timeout: float,
+                       path: str = PATH_DEFAULT) -> Optional[str]:
+        """
+        Query a single provider and validate its answer.
+        
+        Args:
+            url: Provider URL
+            parser: Function extracting the IP from the response body
+            timeout: Request timeout in seconds
+            path: Network path of the connectivity client to use
+        
+        Returns:
+            The IP address, or None if the provider failed
+        """
+        started_at = time.monotonic()
+        ip = None
+        with self.stats_lock:
+            self.stats[url].pending_since = started_at
+        
+        try:
+            response = self.client.get(url, timeout=timeout, path=path)
+            if response.status_code == 200:
+                ip = str(ipaddress.ip_address(parser(response.text)))
+            else:
+                self.logger.debug(f"IP provider {url} returned HTTP {response.status_code}")
+        except (requests.RequestException, ValueError, KeyError) as e:
+            self.logger.debug(f"Failed to get IP from {url}: {e}")
+        
+        latency = time.monotonic() - started_at
+        with self.stats_lock:
+            self.stats[url].record(latency if ip else timeout, ip is not None)
+        
+        if ip:
+            self.logger.debug(f"IP obtained from {url}: {ip} ({latency:.2f}s)")
+        return ip
+    
+    def resolve_once(self, path: str = PATH_DEFAULT) -> Optional[str]:
+        """
+        Run one concurrent round over all providers.
+        
+        Args:
+            path: Network path of the connectivity client to use
+        
+        Returns:
+            The accepted IP address, or None if no quorum was reached
+        """
+        timeout = self.network_config['ip_check_timeout']
+        quorum = max(1, self.network_config.get('ip_check_quorum', 1))
+        hedge_delay = self.network_config.get('ip_check_hedge_delay', 0.25)
+        providers = self.ranked_providers()
+        if quorum > len(providers):
+            self.logger.error(f"ip_check_quorum {quorum} exceeds the {len(providers)} IP providers")
+            return None
+        
+        decided = threading.Event()
+        condition = threading.Condition()
+        answers = {}
+        finished = [0]
+        
+        def worker(rank: int, url: str, parser: Callable[[str], str]):
+            delay = max(0, rank - quorum + 1) * hedge_delay
+            if delay and decided.wait(delay):
+                with condition:
+                    finished[0] += 1
+                    condition.notify_all()
+                return
+            
+            ip = None if decided.is_set() else self.query_provider(url, parser, timeout, path)
+            with condition:
+                if ip:
+                    answers[ip] = answers.get(ip, 0) + 1
+                    if answers[ip] >= quorum:
+                        decided.set()
+                finished[0] += 1
+                condition.notify_all()
+        
+        executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="ip-check")
+        try:
+            for rank, (url, parser) in enumerate(providers):
+                executor.submit(worker, rank, url, parser)
+            
+            with condition:
+                condition.wait_for(
+                    lambda: decided.is_set() or finished[0] == len(providers)
+                )
+        finally:
+            decided.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        with condition:
+            answers = dict(answers)
+        
+        for ip, count in answers.items():
+            if count >= quorum:
+                return ip
+        
+        if answers:
+            self.logger.warning(f"IP providers disagree, no quorum of {quorum}: {answers}")
+        return None
+    
+    def resolve(self, path: str = PATH_DEFAULT) -> Optional[str]:
+        """
+        Get the current public IP address with retry mechanism.
+        
+        Args:
+            path: Network path of the connectivity client to use
+        
+        Returns:
+            Current public IP address or None if failed
+        """
+        retries = self.network_config['ip_check_retries']
+        
+        for attempt in range(retries):
+            ip = self.resolve_once(path)
+            if ip:
+                return ip
+            
+            if attempt < retries - 1:
+                self.logger.warning(f"IP check attempt {attempt + 1} failed, retrying...")
+                time.sleep(self.network_config.get('ip_check_retry_delay', 2))
+        
+        self.logger.error("Failed to obtain IP address from all services")
+        return None
+    
+    def get_provider_report(self) -> List[dict]:
+        """
+        Get the current statistics of every provider, fastest first.
+        
+        Returns:
+            List of dictionaries with url, latency, attempts and error_rate
+        """
+        report = []
+        for url, _ in self.ranked_providers():
+            stats = self.stats[url]
+            report.append({
+                "url": url,
+                "latency": stats.latency,
+                "attempts": stats.attempts,
+                "error_rate": stats.error_rate(),
+            })
+        return report
\ No newline at end of file
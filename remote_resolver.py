@@ -0,0 +1,419 @@
+import ipaddress
+import json
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from route_manager import resolve_ipv4
+
+
+DNS_PORT = 53
+TYPE_A = 1
+CLASS_IN = 1
+FLAG_RECURSION_DESIRED = 0x0100
+FLAG_RESPONSE = 0x8000
+FLAG_TRUNCATED = 0x0200
+RCODE_NAME_ERROR = 3
+
+
+def read_nameservers(path: str = "/etc/resolv.conf") -> List[str]:
+    """
+    Read the IPv4 nameservers of the system resolver configuration.
+    
+    Args:
+        path: resolv.conf path
+    
+    Returns:
+        Nameserver addresses, in configured order
+    """
+    nameservers = []
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver" and "." in parts[1]:
+                    nameservers.append(parts[1])
+    except OSError:
+        pass
+    return nameservers
+
+
+def build_query(host: str, query_id: int) -> bytes:
+    """
+    Build a recursive DNS query for the A records of a host.
+    
+    Args:
+        host: Fully qualified host name
+        query_id: 16-bit query identifier
+    
+    Returns:
+        DNS message
+    """
+    header = struct.pack("!HHHHHH", query_id, FLAG_RECURSION_DESIRED, 1, 0, 0, 0)
+    name = b"".join(
+        bytes([len(label)]) + label for label in host.rstrip(".").encode("idna").split(b".")
+    ) + b"\0"
+    return header + name + struct.pack("!HH", TYPE_A, CLASS_IN)
+
+
+def skip_name(data: bytes, offset: int) -> int:
+    """
+    Skip an encoded, possibly compressed, domain name.
+    
+    Args:
+        data: DNS message
+        offset: Start of the name
+    
+    Returns:
+        Offset just after the name
+    """
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += length + 1
+
+
+def parse_response(data: bytes, query_id: int) -> Optional[Tuple[List[str], int]]:
+    """
+    Extract the A records of a DNS response.
+    
+    Args:
+        data: DNS message
+        query_id: Identifier of the query it answers
+    
+    Returns:
+        Tuple of (addresses, lowest TTL in seconds); no addresses if the name
+        does not exist. None if the response is unusable or truncated
+    """
+    if len(data) < 12:
+        return None
+    response_id, flags, question_count, answer_count, _, _ = struct.unpack_from("!HHHHHH", data)
+    if response_id != query_id or not flags & FLAG_RESPONSE or flags & FLAG_TRUNCATED:
+        return None
+    
+    rcode = flags & 0x000F
+    if rcode == RCODE_NAME_ERROR:
+        return [], 0
+    if rcode != 0:
+        return None
+    
+    offset = 12
+    for _ in range(question_count):
+        offset = skip_name(data, offset) + 4
+    
+    addresses = []
+    ttls = []
+    for _ in range(answer_count):
+        offset = skip_name(data, offset)
+        record_type, record_class, ttl, length = struct.unpack_from("!HHIH", data, offset)
+        offset += 10
+        if record_type == TYPE_A and record_class == CLASS_IN and length == 4:
+            addresses.append(socket.inet_ntoa(data[offset:offset + 4]))
+            ttls.append(ttl)
+        offset += length
+    
+    return addresses, min(ttls) if ttls else 0
+
+
+def query_a_records(host: str, nameserver: str, timeout: float) -> Optional[Tuple[List[str], int]]:
+    """
+    Ask one nameserver for the A records of a host over UDP.
+    
+    Args:
+        host: Fully qualified host name
+        nameserver: Nameserver IPv4 address
+        timeout: Maximum wait for the answer in seconds
+    
+    Returns:
+        Tuple of (addresses, TTL), or None if the nameserver gave no usable answer
+    """
+    query_id = random.getrandbits(16)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect((nameserver, DNS_PORT))
+        sock.send(build_query(host, query_id))
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = parse_response(sock.recv(4096), query_id)
+            if result is not None:
+                return result
+    except (OSError, struct.error, IndexError, UnicodeError):
+        pass
+    finally:
+        sock.close()
+    return None
+
+
+class CacheEntry:
+    """
+    Resolved addresses of one remote host.
+    """
+    
+    def __init__(self, addresses: List[str], expires_at: float):
+        """
+        Initialize the entry.
+        
+        Args:
+            addresses: IPv4 addresses of the host
+            expires_at: Wall-clock time after which the addresses are refreshed
+        """
+        self.addresses = addresses
+        self.expires_at = expires_at
+        self.next_index = random.randrange(len(addresses)) if addresses else 0
+    
+    def is_fresh(self) -> bool:
+        """
+        Check whether the addresses are still within their TTL.
+        
+        Returns:
+            True if the entry has not expired, False otherwise
+        """
+        return time.time() < self.expires_at
+
+
+class RemoteResolver:
+    """
+    Resolves the remote hosts of the VPN profiles ahead of time.
+    
+    All remotes are resolved in parallel before the rotation starts and
+    refreshed in the background once their TTL expires, so connecting
+    never waits on DNS. Each connect takes the next A record of its host
+    and pins it as the only remote of the OpenVPN configuration, which also
+    lets the firewall allow that exact address. When a refresh fails, for instance while
+    the kill switch blocks DNS, the last known addresses are kept; they
+    are also stored on disk for the next start.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the resolver and load the on-disk cache.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.logger = logger_manager
+        self.dns_config = config_manager.get_dns_config()
+        paths_config = config_manager.get_paths_config()
+        self.cache_path = Path(paths_config.get('dns_cache', '.cyclevpn_dns.json'))
+        self.entries: Dict[str, CacheEntry] = {}
+        self.lock = threading.Lock()
+        self.prefetch_lock = threading.Lock()
+        self.refresh_thread = None
+        self.load_cache()
+    
+    def is_enabled(self) -> bool:
+        """
+        Check whether remotes are pre-resolved.
+        
+        Returns:
+            True if pre-resolution is enabled, False otherwise
+        """
+        return self.dns_config.get('pre_resolve', True)
+    
+    def load_cache(self):
+        """
+        Load the last known addresses from disk.
+        """
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+            for host, entry in entries.items():
+                if entry['addresses']:
+                    self.entries[host] = CacheEntry(list(entry['addresses']), float(entry['expires_at']))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            self.logger.warning(f"Ignoring unreadable DNS cache {self.cache_path}: {e}")
+    
+    def save_cache(self):
+        """
+        Write the cached addresses to disk atomically.
+        """
+        with self.lock:
+            entries = {
+                host: {"addresses": entry.addresses, "expires_at": entry.expires_at}
+                for host, entry in self.entries.items()
+            }
+        
+        temp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(entries, file, indent=1)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write DNS cache {self.cache_path}: {e}")
+    
+    def lookup(self, host: str) -> Optional[Tuple[List[str], int]]:
+        """
+        Resolve all A records of a host.
+        
+        The system nameservers are queried directly to learn the TTL;
+        getaddrinfo with the default TTL is the fallback.
+        
+        Args:
+            host: Host name or IPv4 address
+        
+        Returns:
+            Tuple of (addresses, TTL in seconds), or None if resolution failed
+        """
+        try:
+            ipaddress.IPv4Address(host)
+            return [host], self.dns_config.get('max_ttl', 3600)
+        except ValueError:
+            pass
+        
+        timeout = self.dns_config.get('timeout', 2.0)
+        if "." in host:
+            for nameserver in read_nameservers():
+                result = query_a_records(host, nameserver, timeout)
+                if result and result[0]:
+                    return result
+        
+        try:
+            infos = socket.getaddrinfo(host, None, socket.AF_INET, socket.SOCK_DGRAM)
+        except (socket.gaierror, UnicodeError):
+            return None
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        return (addresses, self.dns_config.get('default_ttl', 300)) if addresses else None
+    
+    def refresh(self, host: str) -> bool:
+        """
+        Resolve a host and cache its addresses, keeping the old ones on failure.
+        
+        Args:
+            host: Host name
+        
+        Returns:
+            True if the host was resolved, False otherwise
+        """
+        result = self.lookup(host)
+        if not result:
+            with self.lock:
+                stale = host in self.entries
+            if stale:
+                self.logger.warning(f"Unable to refresh {host}, keeping its last known addresses")
+            return False
+        
+        addresses, ttl = result
+        ttl = min(max(ttl, self.dns_config.get('min_ttl', 30)), self.dns_config.get('max_ttl', 3600))
+        with self.lock:
+            entry = self.entries.get(host)
+            if entry and entry.addresses == addresses:
+                entry.expires_at = time.time() + ttl
+            else:
+                self.entries[host] = CacheEntry(addresses, time.time() + ttl)
+        return True
+    
+    def prefetch(self, hosts: List[str]):
+        """
+        Resolve in parallel every host without fresh cached addresses.
+        
+        Args:
+            hosts: Remote host names
+        """
+        if not self.is_enabled():
+            return
+        
+        with self.prefetch_lock:
+            with self.lock:
+                expired = [
+                    host for host in dict.fromkeys(hosts)
+                    if host not in self.entries or not self.entries[host].is_fresh()
+                ]
+            if not expired:
+                return
+            
+            started_at = time.monotonic()
+            workers = max(1, min(self.dns_config.get('workers', 16), len(expired)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resolve") as executor:
+                resolved = sum(executor.map(self.refresh, expired))
+            
+            self.logger.info(
+                f"Resolved {resolved}/{len(expired)} VPN remotes in {time.monotonic() - started_at:.2f} seconds",
+                phase="resolve",
+                duration=round(time.monotonic() - started_at, 3)
+            )
+            self.save_cache()
+    
+    def prefetch_in_background(self, hosts: List[str]):
+        """
+        Refresh the expired hosts in a background thread.
+        
+        Args:
+            hosts: Remote host names
+        """
+        if not self.is_enabled() or (self.refresh_thread and self.refresh_thread.is_alive()):
+            return
+        
+        self.refresh_thread = threading.Thread(
+            target=self.prefetch, args=(list(hosts),), name="resolve-refresh", daemon=True
+        )
+        self.refresh_thread.start()
+    
+    def get_addresses(self, host: str) -> List[str]:
+        """
+        Get the addresses of a host, resolving it now if nothing is cached.
+        
+        Expired addresses are still returned; the background refresh
+        replaces them.
+        
+        Args:
+            host: Remote host name
+        
+        Returns:
+            IPv4 addresses, empty if the host cannot be resolved
+        """
+        with self.lock:
+            entry = self.entries.get(host)
+        if entry is None:
+            self.refresh(host)
+            with self.lock:
+                entry = self.entries.get(host)
+        return list(entry.addresses) if entry else []
+    
+    def get_address(self, host: str) -> Optional[str]:
+        """
+        Get the first address of a host.
+        
+        Args:
+            host: Remote host name
+        
+        Returns:
+            IPv4 address, or None if the host cannot be resolved
+        """
+        if not self.is_enabled():
+            return resolve_ipv4(host)
+        addresses = self.get_addresses(host)
+        return addresses[0] if addresses else None
+    
+    def next_address(self, host: str) -> Optional[str]:
+        """
+        Get the next address of a host, rotating among its A records.
+        
+        Args:
+            host: Remote host name
+        
+        Returns:
+            IPv4 address, or None if the host cannot be resolved
+        """
+        if not self.is_enabled():
+            return resolve_ipv4(host)
+        if not self.get_addresses(host):
+            return None
+        
+        with self.lock:
+            entry = self.entries[host]
+            address = entry.addresses[entry.next_index % len(entry.addresses)]
+            entry.next_index += 1
+        return address
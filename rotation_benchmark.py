@@ -0,0 +1,804 @@
+import argparse
+import contextlib
+import copy
+import functools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from colorama import init, Fore
+
+import health_monitor
+import kill_switch
+import management_interface
+import process_registry
+import public_ip_resolver
+import server_history
+import server_selector
+import vpn_manager
+import vpn_tunnel
+from config_manager import ConfigManager
+from connectivity_client import ConnectivityClient
+from kill_switch import KillSwitch
+from logger_manager import LoggerManager
+from public_ip_resolver import PublicIPResolver, parse_plain_ip
+from rotation_policy import RotationPolicy
+from vpn_manager import VPNManager
+from vpn_tunnel import VPNTunnel
+
+
+PHASES = ["service_stop", "launch", "readiness", "verification", "service_start", "teardown"]
+
+CLOCK_MODULES = [
+    health_monitor, kill_switch, management_interface, process_registry,
+    public_ip_resolver, server_history, server_selector, vpn_manager, vpn_tunnel,
+]
+
+REAL_IP = "192.0.2.1"
+TUNNEL_IP = "198.51.100.1"
+
+STUB_OPENVPN = '''#!{python}
+import os
+import signal
+import socket
+import sys
+import time
+
+arguments = sys.argv[1:]
+
+
+def option(name, count=1):
+    if name not in arguments:
+        return None
+    index = arguments.index(name)
+    return arguments[index + 1:index + 1 + count]
+
+
+if "--daemon" in arguments:
+    if os.fork():
+        os._exit(0)
+    os.setsid()
+
+state_file = os.path.join(os.environ["CYCLEVPN_STUB_STATE"], "%d" % os.getpid())
+socket_path = (option("--management") or [None])[0]
+remotes = [option("--remote", 2)] if option("--remote", 2) else []
+with open(option("--config")[0]) as config_file:
+    for line in config_file:
+        words = line.split()
+        if words[:1] == ["remote"] and len(words) >= 3:
+            remotes.append(words[1:3])
+remote = remotes[0] if remotes else ["203.0.113.1", "1194"]
+
+
+def cleanup(*_):
+    for path in (state_file, socket_path):
+        try:
+            if path:
+                os.remove(path)
+        except OSError:
+            pass
+    os._exit(0)
+
+
+signal.signal(signal.SIGTERM, cleanup)
+with open(option("--writepid")[0], "w") as pid_file:
+    pid_file.write("%d\\n" % os.getpid())
+
+state = "%d,CONNECTED,SUCCESS,10.8.0.2,%s,%s,," % (time.time(), remote[0], remote[1])
+query_passwords = "--management-query-passwords" in arguments
+credentials_path = (option("--auth-user-pass") or [None])[0]
+if credentials_path and not credentials_path.startswith("--"):
+    with open(credentials_path) as credentials_file:
+        if len(credentials_file.read().split()) != 2:
+            sys.exit(1)
+
+if not socket_path:
+    open(state_file, "w").close()
+    while True:
+        signal.pause()
+
+server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+server.bind(socket_path)
+server.listen(1)
+connection, _ = server.accept()
+stream = connection.makefile("rwb", buffering=0)
+stream.write(b">INFO:OpenVPN Management Interface Version 5 -- type 'help' for more info\\r\\n")
+stream.write(b">HOLD:Waiting for hold release:0\\r\\n")
+
+for raw in stream:
+    command = raw.decode().strip()
+    if command == "state on":
+        reply = "SUCCESS: real-time state notification set to ON"
+    elif command == "hold release" and query_passwords:
+        reply = "SUCCESS: hold release succeeded\\r\\n>PASSWORD:Need 'Auth' username/password"
+    elif command.startswith('username "Auth" '):
+        reply = "SUCCESS: 'Auth' username entered, but not yet verified"
+    elif command.startswith('password "Auth" '):
+        open(state_file, "w").close()
+        reply = "SUCCESS: 'Auth' password entered, but not yet verified\\r\\n>STATE:" + state
+    elif command == "hold release":
+        open(state_file, "w").close()
+        reply = "SUCCESS: hold release succeeded\\r\\n>STATE:" + state
+    elif command == "state":
+        reply = state + "\\r\\nEND"
+    elif command == "pid":
+        reply = "SUCCESS: pid=%d" % os.getpid()
+    elif command.startswith("signal "):
+        stream.write(b"SUCCESS: signal SIGTERM thrown\\r\\n")
+        cleanup()
+    else:
+        reply = "ERROR: unknown command"
+    stream.write(reply.encode() + b"\\r\\n")
+
+while True:
+    signal.pause()
+'''
+
+STUB_SERVICE = '''#!/bin/sh
+exit 0
+'''
+
+
+class VirtualClock:
+    """
+    Clock that skips long sleeps instead of waiting for them.
+    
+    Virtual time is real time plus an offset. Sleeps of at least
+    skip_threshold seconds, such as the cooldown or the fixed OpenVPN
+    wait, return at once and move the offset forward; short polling
+    sleeps still happen, so waits on real I/O keep working.
+    """
+    
+    def __init__(self, skip_threshold: float = 1.0):
+        """
+        Initialize the clock.
+        
+        Args:
+            skip_threshold: Shortest sleep in seconds that is skipped
+        """
+        self.skip_threshold = skip_threshold
+        self.offset = 0.0
+        self.lock = threading.Lock()
+        self.installed = []
+    
+    def monotonic(self) -> float:
+        """
+        Get the virtual monotonic time.
+        
+        Returns:
+            Monotonic time in seconds
+        """
+        return time.monotonic() + self.offset
+    
+    def time(self) -> float:
+        """
+        Get the virtual wall clock time.
+        
+        Returns:
+            Seconds since the epoch
+        """
+        return time.time() + self.offset
+    
+    def sleep(self, seconds: float):
+        """
+        Sleep, or advance virtual time if the sleep is long enough to skip.
+        
+        Args:
+            seconds: Sleep duration in seconds
+        """
+        if seconds < self.skip_threshold:
+            time.sleep(seconds)
+        else:
+            self.advance(seconds)
+    
+    def advance(self, seconds: float):
+        """
+        Move virtual time forward.
+        
+        Args:
+            seconds: Amount of time in seconds
+        """
+        with self.lock:
+            self.offset += seconds
+    
+    def __getattr__(self, name):
+        return getattr(time, name)
+    
+    def install(self, modules: list):
+        """
+        Replace the time module seen by the given modules with this clock.
+        
+        Args:
+            modules: Modules that imported time
+        """
+        for module in modules:
+            if getattr(module, 'time', None) is time:
+                module.time = self
+                self.installed.append(module)
+    
+    def uninstall(self):
+        """
+        Give the modules back the real time module.
+        """
+        for module in self.installed:
+            module.time = time
+        self.installed = []
+
+
+class PhaseTimer:
+    """
+    Measures the time spent in each rotation phase.
+    
+    Methods are wrapped in place and timed exclusively: time spent in a
+    nested timed call counts for the inner phase only.
+    """
+    
+    def __init__(self):
+        """
+        Initialize the phase timer.
+        """
+        self.samples = defaultdict(list)
+        self.current = None
+        self.stack = []
+        self.patches = []
+        self.failures = 0
+    
+    def wrap(self, owner, name: str, phase: Union[str, Callable[..., str]]):
+        """
+        Time every call of a method.
+        
+        Args:
+            owner: Class or instance the method is looked up on
+            name: Method name
+            phase: Phase name, or callable deriving it from the call arguments
+        """
+        original = getattr(owner, name)
+        timer = self
+        
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            label = phase(*args) if callable(phase) else phase
+            timer.stack.append(0.0)
+            started_at = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started_at
+                nested = timer.stack.pop()
+                if timer.stack:
+                    timer.stack[-1] += elapsed
+                if timer.current is not None:
+                    timer.current[label] += elapsed - nested
+        
+        self.patches.append((owner, name, vars(owner).get(name)))
+        setattr(owner, name, timed)
+    
+    def restore(self):
+        """
+        Put every wrapped method back.
+        """
+        for owner, name, original in reversed(self.patches):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self.patches = []
+    
+    def begin(self):
+        """
+        Start accounting a new rotation.
+        """
+        self.current = defaultdict(float)
+    
+    def end(self, elapsed: float, successful: bool):
+        """
+        Close the rotation in progress.
+        
+        Args:
+            elapsed: Real time the rotation took in seconds
+            successful: Whether the session completed
+        """
+        for phase in PHASES:
+            self.samples[phase].append(self.current[phase])
+        self.samples['rotation'].append(elapsed)
+        if not successful:
+            self.failures += 1
+        self.current = None
+    
+    def get_rotation_count(self) -> int:
+        """
+        Get the number of completed rotations.
+        
+        Returns:
+            Rotation count
+        """
+        return len(self.samples['rotation'])
+    
+    def summarize(self) -> Dict[str, dict]:
+        """
+        Summarize the samples of each phase.
+        
+        Returns:
+            Dictionary mapping each phase to its mean, median, p95 and max in seconds
+        """
+        summary = {}
+        for phase in PHASES + ['rotation']:
+            values = sorted(self.samples[phase])
+            if not values:
+                continue
+            summary[phase] = {
+                "mean": statistics.mean(values),
+                "median": statistics.median(values),
+                "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max": values[-1],
+            }
+        return summary
+
+
+class IPEchoHandler(BaseHTTPRequestHandler):
+    """
+    Answers with the tunnel IP while a stub tunnel is up, the real IP otherwise.
+    """
+    
+    protocol_version = "HTTP/1.1"
+    state_directory = None
+    
+    def do_GET(self):
+        """
+        Send the public IP the caller would currently have.
+        """
+        body = (TUNNEL_IP if os.listdir(self.state_directory) else REAL_IP).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """
+        Keep the echo server quiet.
+        """
+
+
+class MockTransmissionHandler(BaseHTTPRequestHandler):
+    """
+    Minimal Transmission RPC endpoint holding a few torrents in memory.
+    
+    It enforces the X-Transmission-Session-Id handshake and implements the
+    torrent and session methods used to pause, rebind and resume.
+    """
+    
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    session_id = "cyclevpn-benchmark"
+    lock = threading.Lock()
+    torrents = {}
+    settings = {}
+    
+    @classmethod
+    def reset(cls, torrent_count: int = 5):
+        """
+        Start over with running torrents and default session settings.
+        
+        Args:
+            torrent_count: Number of torrents
+        """
+        cls.torrents = {torrent_id: 4 for torrent_id in range(1, torrent_count + 1)}
+        cls.settings = {
+            "alt-speed-enabled": False,
+            "alt-speed-down": 50,
+            "alt-speed-up": 50,
+            "bind-address-ipv4": "0.0.0.0",
+            "peer-port": 51413,
+        }
+    
+    def do_POST(self):
+        """
+        Answer an RPC request.
+        """
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        
+        if self.headers.get("X-Transmission-Session-Id") != self.session_id:
+            self.send_body(409, b"", {"X-Transmission-Session-Id": self.session_id})
+            return
+        
+        with self.lock:
+            arguments = self.run_method(request.get("method"), request.get("arguments", {}))
+        result = {"result": "success", "arguments": arguments} if arguments is not None else {"result": "method not recognized"}
+        self.send_body(200, json.dumps(result).encode(), {"Content-Type": "application/json"})
+    
+    def run_method(self, method: str, arguments: dict) -> Optional[dict]:
+        """
+        Apply an RPC method to the in-memory state.
+        
+        Args:
+            method: RPC method name
+            arguments: Method arguments
+        
+        Returns:
+            Response arguments, or None for an unknown method
+        """
+        ids = arguments.get("ids", list(self.torrents))
+        if method == "torrent-get":
+            return {"torrents": [{"id": torrent_id, "status": status} for torrent_id, status in self.torrents.items()]}
+        if method in ("torrent-stop", "torrent-start"):
+            for torrent_id in ids:
+                if torrent_id in self.torrents:
+                    self.torrents[torrent_id] = 0 if method == "torrent-stop" else 4
+            return {}
+        if method == "session-get":
+            fields = arguments.get("fields", list(self.settings))
+            return {field: self.settings[field] for field in fields if field in self.settings}
+        if method == "session-set":
+            self.settings.update(arguments)
+            return {}
+        if method == "session-stats":
+            active = sum(1 for status in self.torrents.values() if status)
+            throttled = self.settings["alt-speed-enabled"] and not self.settings["alt-speed-down"]
+            return {
+                "torrentCount": len(self.torrents),
+                "activeTorrentCount": active,
+                "pausedTorrentCount": len(self.torrents) - active,
+                "downloadSpeed": 0 if throttled else active * 1024,
+                "uploadSpeed": 0 if throttled else active * 512,
+            }
+        return None
+    
+    def send_body(self, status: int, body: bytes, headers: dict):
+        """
+        Send a response with a body.
+        
+        Args:
+            status: HTTP status code
+            body: Response body
+            headers: Extra headers
+        """
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """
+        Keep the mock RPC server quiet.
+        """
+
+
+class RotationBenchmark:
+    """
+    Runs run_continuous_vpn_rotation against stub OpenVPN and service commands.
+    
+    Everything runs in a scratch directory: a configuration derived from
+    the real one, fake profiles, a stub openvpn that speaks the management
+    protocol, a stub service command, a loopback IP-echo server and, when
+    Transmission is driven over RPC, a mock RPC server. The
+    stub creates no tun device, so tunnel checks are bound to the loopback
+    device the echo server listens on and verification uses the external
+    IP check. Cooldowns and fixed waits run on a virtual clock.
+    """
+    
+    def __init__(self, base_config: dict, rotations: int, servers: int,
+                 management: bool = True, transmission_rpc: Optional[str] = None,
+                 log_level: str = "WARNING", verbose: bool = False):
+        """
+        Initialize the benchmark.
+        
+        Args:
+            base_config: Configuration data the harness configuration is derived from
+            rotations: Number of rotations to run
+            servers: Number of fake profiles
+            management: Whether OpenVPN is driven through its management interface
+            transmission_rpc: Pause mode ("stop" or "alt-speed") to control Transmission
+                over RPC, or None to stop and start its service
+            log_level: Log level of the application under test
+            verbose: Keep the console output of the application under test
+        """
+        self.base_config = base_config
+        self.rotations = rotations
+        self.servers = servers
+        self.management = management
+        self.transmission_rpc = transmission_rpc
+        self.rpc_url = None
+        self.log_level = log_level
+        self.verbose = verbose
+        self.clock = VirtualClock()
+        self.timer = PhaseTimer()
+    
+    def build_config(self, directory: Path) -> dict:
+        """
+        Derive the harness configuration from the base configuration.
+        
+        Args:
+            directory: Scratch directory
+        
+        Returns:
+            Configuration data
+        """
+        config = copy.deepcopy(self.base_config)
+        config['paths'].update(
+            ovpn_directory=str(directory / "openvpn"),
+            log_file=str(directory / "cyclevpn.log"),
+            temp_directory=str(directory / "run"),
+            catalog_cache=str(directory / "catalog.json"),
+            dns_cache=str(directory / "dns.json"),
+            state_file=str(directory / "state.json"),
+            history_database=str(directory / "history.db")
+        )
+        config['network'].update(underlay_interface="lo", management_interface=self.management)
+        config['session'].update(rotation_mode="break-before-make", kill_switch_enabled=False)
+        config['security'].update(verification_mode="external")
+        config['logging'].update(level=self.log_level)
+        config['firewall'] = dict(config.get('firewall', {}), backend="nftables" if self.transmission_rpc else "none")
+        config['services'].update(control_backend="command")
+        if self.transmission_rpc:
+            config['transmission'] = dict(
+                config.get('transmission', {}),
+                control="rpc",
+                rpc_url=self.rpc_url,
+                pause_mode=self.transmission_rpc,
+                peer_port=51413
+            )
+        return config
+    
+    def prepare(self, directory: Path) -> Path:
+        """
+        Write the stubs, the fake profiles and the configuration.
+        
+        Args:
+            directory: Scratch directory
+        
+        Returns:
+            Path of the harness configuration file
+        """
+        bin_directory = directory / "bin"
+        for path in (bin_directory, directory / "openvpn", directory / "run", directory / "state"):
+            path.mkdir()
+        
+        for name, source in (("openvpn", STUB_OPENVPN.replace("{python}", sys.executable)),
+                             ("service", STUB_SERVICE)):
+            stub = bin_directory / name
+            stub.write_text(source)
+            stub.chmod(0o755)
+        
+        # Loopback remotes make the selector's latency probes fail fast
+        for index in range(1, self.servers + 1):
+            (directory / "openvpn" / f"server{index:03d}.ovpn").write_text(
+                f"client\ndev tun\nproto udp\nremote 127.0.{index // 250}.{index % 250 + 1} 1194\n"
+            )
+        
+        config_path = directory / "config.json"
+        config_path.write_text(json.dumps(self.build_config(directory), indent=2))
+        return config_path
+    
+    def instrument(self, manager: VPNManager):
+        """
+        Wrap the phases, the session loop and the session hold.
+        
+        Args:
+            manager: VPNManager under test
+        """
+        self.timer.wrap(VPNManager, 'set_transmission', lambda _, action: f"service_{action}")
+        self.timer.wrap(VPNTunnel, 'start', "launch")
+        self.timer.wrap(VPNTunnel, 'wait_until_ready', "readiness")
+        self.timer.wrap(KillSwitch, 'verify_vpn_connection', "verification")
+        self.timer.wrap(VPNManager, 'disconnect_vpn', "teardown")
+        
+        run_vpn_session = manager.run_vpn_session
+        
+        def run_session(ovpn_file: str, username: str, password: str) -> bool:
+            if self.timer.get_rotation_count() >= self.rotations:
+                raise KeyboardInterrupt
+            self.timer.begin()
+            started_at = time.perf_counter()
+            successful = run_vpn_session(ovpn_file, username, password)
+            self.timer.end(time.perf_counter() - started_at, successful)
+            return successful
+        
+        def hold_session(policy: RotationPolicy) -> Optional[str]:
+            self.clock.advance(policy.cooldown_seconds)
+            return None
+        
+        manager.run_vpn_session = run_session
+        manager.monitor_session = hold_session
+    
+    def run(self) -> Dict[str, dict]:
+        """
+        Run the rotations and summarize the phase timings.
+        
+        Returns:
+            Summary of each phase, see PhaseTimer.summarize
+        """
+        original_path = os.environ.get("PATH", "")
+        
+        with tempfile.TemporaryDirectory(prefix="cyclevpn_bench_") as scratch:
+            directory = Path(scratch)
+            
+            MockTransmissionHandler.reset()
+            rpc_server = ThreadingHTTPServer(("127.0.0.1", 0), MockTransmissionHandler)
+            rpc_server.daemon_threads = True
+            threading.Thread(target=rpc_server.serve_forever, name="transmission-rpc", daemon=True).start()
+            self.rpc_url = f"http://127.0.0.1:{rpc_server.server_address[1]}/transmission/rpc"
+            
+            config_path = self.prepare(directory)
+            
+            IPEchoHandler.state_directory = str(directory / "state")
+            echo_server = ThreadingHTTPServer(("127.0.0.1", 0), IPEchoHandler)
+            echo_server.daemon_threads = True
+            threading.Thread(target=echo_server.serve_forever, name="ip-echo", daemon=True).start()
+            
+            os.environ["PATH"] = f"{directory / 'bin'}{os.pathsep}{original_path}"
+            os.environ["CYCLEVPN_STUB_STATE"] = str(directory / "state")
+            self.clock.install(CLOCK_MODULES)
+            manager = None
+            
+            try:
+                config_manager = ConfigManager(str(config_path))
+                logger_manager = LoggerManager(config_manager)
+                switch = KillSwitch(config_manager, logger_manager)
+                switch.ip_resolver = PublicIPResolver(
+                    config_manager,
+                    logger_manager,
+                    switch.connectivity,
+                    [(f"http://127.0.0.1:{echo_server.server_address[1]}/", parse_plain_ip)]
+                )
+                if self.transmission_rpc:
+                    # RPC control is only used behind the firewall; pretend it is engaged without nft
+                    switch.firewall.executor = lambda command, stdin=None: (0, "")
+                    switch.firewall.active = True
+                connectivity = switch.connectivity
+                connectivity.bind_tunnel = lambda interface, source_address=None: (
+                    ConnectivityClient.bind_tunnel(connectivity, "lo")
+                )
+                
+                manager = VPNManager(config_manager, logger_manager, switch)
+                self.instrument(manager)
+                with open(os.devnull, 'w') as devnull:
+                    with contextlib.redirect_stdout(sys.stdout if self.verbose else devnull):
+                        manager.run_continuous_vpn_rotation("benchmark", "benchmark")
+                
+            except SystemExit:
+                print(f"{Fore.RED}Rotation stopped by an emergency shutdown")
+                
+            finally:
+                self.timer.restore()
+                self.clock.uninstall()
+                if manager:
+                    manager.history.close()
+                echo_server.shutdown()
+                echo_server.server_close()
+                rpc_server.shutdown()
+                rpc_server.server_close()
+                os.environ["PATH"] = original_path
+                os.environ.pop("CYCLEVPN_STUB_STATE", None)
+        
+        return self.timer.summarize()
+
+
+def find_regressions(summary: Dict[str, dict], baseline: Dict[str, dict],
+                     tolerance: float, min_delta: float) -> List[str]:
+    """
+    Compare the median of each phase with a baseline.
+    
+    Args:
+        summary: Current phase summary
+        baseline: Baseline phase summary
+        tolerance: Allowed relative slowdown, e.g. 0.25 for 25%
+        min_delta: Slowdowns smaller than this many seconds are ignored
+    
+    Returns:
+        Descriptions of the phases that regressed
+    """
+    regressions = []
+    for phase, stats in summary.items():
+        reference = baseline.get(phase)
+        if not reference:
+            continue
+        
+        limit = reference['median'] * (1 + tolerance)
+        if stats['median'] > limit and stats['median'] - reference['median'] > min_delta:
+            regressions.append(
+                f"{phase}: median {stats['median'] * 1000:.2f} ms, "
+                f"baseline {reference['median'] * 1000:.2f} ms"
+            )
+    return regressions
+
+
+def print_summary(summary: Dict[str, dict], rotations: int, failures: int):
+    """
+    Print the phase timings as a table.
+    
+    Args:
+        summary: Phase summary
+        rotations: Number of rotations run
+        failures: Number of failed sessions
+    """
+    print(f"{Fore.CYAN}{rotations} rotations, {failures} failed")
+    print(f"{'phase':<15}{'mean':>10}{'median':>10}{'p95':>10}{'max':>10}   (ms)")
+    for phase, stats in summary.items():
+        print(
+            f"{phase:<15}"
+            + "".join(f"{stats[key] * 1000:>10.2f}" for key in ("mean", "median", "p95", "max"))
+        )
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line of the rotation benchmark.
+    
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Time each phase of the VPN rotation against stub backends")
+    parser.add_argument("--rotations", type=int, default=1000, help="Number of rotations to run")
+    parser.add_argument("--servers", type=int, default=20, help="Number of fake OpenVPN profiles")
+    parser.add_argument("--config", default="config.json", help="Configuration the harness is derived from")
+    parser.add_argument("--no-management", action="store_true",
+                        help="Run OpenVPN without the management interface (fixed establish wait)")
+    parser.add_argument("--transmission-rpc", choices=["stop", "alt-speed"],
+                        help="Pause Transmission over RPC against a mock server instead of stopping its service")
+    parser.add_argument("--output", help="Write the phase summary to this JSON file")
+    parser.add_argument("--baseline", help="Fail if a phase is slower than in this JSON summary")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per phase")
+    parser.add_argument("--min-delta", type=float, default=0.001,
+                        help="Slowdowns below this many seconds never count as regressions")
+    parser.add_argument("--log-level", default="WARNING", help="Log level of the application under test")
+    parser.add_argument("--verbose", action="store_true", help="Show the console output of the application under test")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Entry point of the rotation benchmark.
+    """
+    init(autoreset=True)
+    arguments = parse_arguments()
+    
+    with open(arguments.config, 'r', encoding='utf-8') as file:
+        base_config = json.load(file)
+    
+    benchmark = RotationBenchmark(
+        base_config,
+        arguments.rotations,
+        arguments.servers,
+        management=not arguments.no_management,
+        transmission_rpc=arguments.transmission_rpc,
+        log_level=arguments.log_level,
+        verbose=arguments.verbose
+    )
+    summary = benchmark.run()
+    rotations = benchmark.timer.get_rotation_count()
+    print_summary(summary, rotations, benchmark.timer.failures)
+    
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            json.dump({"rotations": rotations, "phases": summary}, file, indent=2)
+    
+    if rotations < arguments.rotations or benchmark.timer.failures:
+        print(f"{Fore.RED}Rotation benchmark did not complete every session")
+        sys.exit(1)
+    
+    if arguments.baseline:
+        with open(arguments.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)['phases']
+        
+        regressions = find_regressions(summary, baseline, arguments.tolerance, arguments.min_delta)
+        for regression in regressions:
+            print(f"{Fore.RED}Regression in {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"{Fore.GREEN}No phase regressed against {arguments.baseline}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
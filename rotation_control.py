@@ -0,0 +1,87 @@
+import threading
+from typing import Optional
+
+
+ROTATE_OPERATOR = "operator"
+
+
+class RotationControl:
+    """
+    Operator requests shared by the rotation loops and the control socket.
+    
+    Health monitors attach themselves while a session runs, so a rotation
+    request ends the current sessions at once instead of at the next
+    sample. While rotation is paused or a server is pinned, rotation
+    policies are not consulted and the session lasts until the tunnel
+    fails or the operator asks for a rotation; health checks keep running.
+    """
+    
+    def __init__(self):
+        """
+        Initialize the control state.
+        """
+        self.lock = threading.Lock()
+        self.paused = False
+        self.pinned = None
+        self.monitors = set()
+    
+    def attach(self, monitor):
+        """
+        Register the health monitor of a running session.
+        
+        Args:
+            monitor: HealthMonitor watching the session
+        """
+        with self.lock:
+            self.monitors.add(monitor)
+    
+    def detach(self, monitor):
+        """
+        Unregister the health monitor of a finished session.
+        
+        Args:
+            monitor: HealthMonitor watching the session
+        """
+        with self.lock:
+            self.monitors.discard(monitor)
+    
+    def request_rotation(self) -> int:
+        """
+        End the current sessions so the rotation loops move on.
+        
+        Returns:
+            Number of sessions ended
+        """
+        with self.lock:
+            monitors = list(self.monitors)
+        return sum(1 for monitor in monitors if monitor.end_session(ROTATE_OPERATOR))
+    
+    def is_holding(self) -> bool:
+        """
+        Check whether sessions ignore their rotation policy.
+        
+        Returns:
+            True if rotation is paused or a server is pinned, False otherwise
+        """
+        return self.paused or self.pinned is not None
+    
+    def pause(self):
+        """
+        Keep the current sessions until resumed.
+        """
+        self.paused = True
+    
+    def resume(self):
+        """
+        Let the rotation policies end sessions again.
+        """
+        self.paused = False
+    
+    def pin(self, ovpn_file: Optional[str]):
+        """
+        Use one server for every new session, or None to rotate normally.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name, or None to unpin
+        """
+        self.pinned = ovpn_file
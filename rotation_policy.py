@@ -0,0 +1,389 @@
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+
+from connectivity_client import PATH_TUNNEL
+
+
+ROTATE_TIMER = "timer"
+ROTATE_BYTES = "byte_budget"
+ROTATE_DEGRADED = "degraded"
+ROTATE_IDLE = "idle"
+ROTATE_MAX_SESSION = "max_session"
+
+
+class SessionSample(NamedTuple):
+    """
+    Tunnel traffic observed by the health monitor since the session started.
+    """
+    elapsed: float
+    rx_bytes: int
+    tx_bytes: int
+    rx_rate: float
+    tx_rate: float
+
+
+def format_bytes(count: float) -> str:
+    """
+    Format a byte count for log messages.
+    
+    Args:
+        count: Number of bytes
+    
+    Returns:
+        Human-readable size, e.g. "1.5 GB"
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1000:
+            return f"{count:.1f} {unit}" if unit != "B" else f"{int(count)} B"
+        count /= 1000
+    return f"{count:.1f} TB"
+
+
+class RotationPolicy(ABC):
+    """
+    Decides when the active session ends.
+    
+    A policy is created for each session and evaluated by the health
+    monitor at every sample, with the traffic counted on the tun device
+    since the session started. Subclasses implement describe() and
+    check(); every policy except the fixed timer also ends the session
+    once max_session_seconds is reached, if set. The health monitor calls
+    start() and stop() around the session so that a policy can take its
+    own measurements without slowing down the samples.
+    """
+    
+    def __init__(self, rotation_config, cooldown_seconds: float, connectivity=None):
+        """
+        Initialize the policy.
+        
+        Args:
+            rotation_config: "rotation" configuration section
+            cooldown_seconds: Configured session length
+            connectivity: Optional ConnectivityClient bound to the tunnel
+        """
+        self.rotation_config = rotation_config
+        self.cooldown_seconds = cooldown_seconds
+        self.connectivity = connectivity
+        self.max_session_seconds = rotation_config.get('max_session_seconds', 0)
+    
+    @abstractmethod
+    def describe(self) -> str:
+        """
+        Describe when the session will end, for the session start message.
+        
+        Returns:
+            Description such as "for 1800 seconds"
+        """
+    
+    @abstractmethod
+    def check(self, sample: SessionSample) -> Optional[str]:
+        """
+        Decide whether to rotate now.
+        
+        Args:
+            sample: Traffic since the session started
+        
+        Returns:
+            Reason to rotate, or None to keep the session
+        """
+    
+    def start(self):
+        """
+        Start the background measurements of the policy, if any.
+        """
+    
+    def stop(self):
+        """
+        Stop the background measurements of the policy, if any.
+        """
+    
+    def check_max_session(self, sample: SessionSample) -> Optional[str]:
+        """
+        Enforce the max_session_seconds cap.
+        
+        Args:
+            sample: Traffic since the session started
+        
+        Returns:
+            ROTATE_MAX_SESSION if the cap is reached, None otherwise
+        """
+        if self.max_session_seconds and sample.elapsed >= self.max_session_seconds:
+            return ROTATE_MAX_SESSION
+        return None
+
+
+class FixedTimePolicy(RotationPolicy):
+    """
+    Rotates after cooldown_seconds, shifted by a random jitter.
+    """
+    
+    def __init__(self, rotation_config, cooldown_seconds: float, connectivity=None):
+        """
+        Initialize the policy.
+        
+        Args:
+            rotation_config: "rotation" configuration section
+            cooldown_seconds: Configured session length
+            connectivity: Optional ConnectivityClient bound to the tunnel
+        """
+        super().__init__(rotation_config, cooldown_seconds, connectivity)
+        jitter = rotation_config.get('jitter_seconds', 0)
+        self.duration = max(0.0, cooldown_seconds + random.uniform(-jitter, jitter))
+    
+    def describe(self) -> str:
+        """
+        Describe when the session will end.
+        
+        Returns:
+            Description for the session start message
+        """
+        return f"for {self.duration:.0f} seconds"
+    
+    def check(self, sample: SessionSample) -> Optional[str]:
+        """
+        Decide whether to rotate now.
+        
+        Args:
+            sample: Traffic since the session started
+        
+        Returns:
+            Reason to rotate, or None to keep the session
+        """
+        return ROTATE_TIMER if sample.elapsed >= self.duration else None
+
+
+class ByteBudgetPolicy(RotationPolicy):
+    """
+    Rotates once max_bytes have crossed the tun device in either direction.
+    """
+    
+    def __init__(self, rotation_config, cooldown_seconds: float, connectivity=None):
+        """
+        Initialize the policy.
+        
+        Args:
+            rotation_config: "rotation" configuration section
+            cooldown_seconds: Configured session length
+            connectivity: Optional ConnectivityClient bound to the tunnel
+        """
+        super().__init__(rotation_config, cooldown_seconds, connectivity)
+        self.max_bytes = rotation_config.get('max_bytes', 5000000000)
+    
+    def describe(self) -> str:
+        """
+        Describe when the session will end.
+        
+        Returns:
+            Description for the session start message
+        """
+        return f"until {format_bytes(self.max_bytes)} are transferred"
+    
+    def check(self, sample: SessionSample) -> Optional[str]:
+        """
+        Decide whether to rotate now.
+        
+        Args:
+            sample: Traffic since the session started
+        
+        Returns:
+            Reason to rotate, or None to keep the session
+        """
+        if sample.rx_bytes + sample.tx_bytes >= self.max_bytes:
+            return ROTATE_BYTES
+        return self.check_max_session(sample)
+
+
+class DegradedPolicy(RotationPolicy):
+    """
+    Rotates when throughput or RTT stays below its threshold for degraded_window seconds.
+    
+    Throughput is the received rate, only judged while the tunnel carries
+    traffic: an idle tunnel is not a slow one. RTT is measured with a small
+    request through the tunnel every rtt_interval seconds, in a thread of
+    its own so that a slow request never delays the health samples; check()
+    only reads the latest result. A failed request counts as degraded.
+    """
+    
+    def __init__(self, rotation_config, cooldown_seconds: float, connectivity=None):
+        """
+        Initialize the policy.
+        
+        Args:
+            rotation_config: "rotation" configuration section
+            cooldown_seconds: Configured session length
+            connectivity: Optional ConnectivityClient bound to the tunnel
+        """
+        super().__init__(rotation_config, cooldown_seconds, connectivity)
+        self.min_throughput = rotation_config.get('min_throughput', 0)
+        self.max_rtt = rotation_config.get('max_rtt', 0)
+        self.window = rotation_config.get('degraded_window', 60)
+        self.idle_threshold = rotation_config.get('idle_threshold', 2048)
+        self.degraded_since = None
+        self.rtt_degraded = False
+        self.rtt_thread = None
+        self.stop_event = threading.Event()
+    
+    def describe(self) -> str:
+        """
+        Describe when the session will end.
+        
+        Returns:
+            Description for the session start message
+        """
+        limits = []
+        if self.min_throughput:
+            limits.append(f"throughput below {format_bytes(self.min_throughput)}/s")
+        if self.max_rtt:
+            limits.append(f"RTT above {self.max_rtt * 1000:.0f} ms")
+        return f"until {' or '.join(limits) or 'degraded'} for {self.window} seconds"
+    
+    def measure_rtt(self) -> Optional[float]:
+        """
+        Time a small request through the tunnel.
+        
+        Returns:
+            Round-trip time in seconds, or None if the request failed
+        """
+        url = self.rotation_config.get('rtt_url', "https://speed.cloudflare.com/__down?bytes=0")
+        started_at = time.perf_counter()
+        try:
+            self.connectivity.get(url, self.rotation_config.get('rtt_timeout', 5), PATH_TUNNEL).raise_for_status()
+        except Exception:
+            return None
+        return time.perf_counter() - started_at
+    
+    def start(self):
+        """
+        Start measuring the RTT in a background thread, if max_rtt is set.
+        """
+        if not self.max_rtt or not self.connectivity or self.rtt_thread:
+            return
+        
+        self.stop_event.clear()
+        self.rtt_thread = threading.Thread(target=self.run_rtt_checks, name="rtt-check", daemon=True)
+        self.rtt_thread.start()
+    
+    def stop(self):
+        """
+        Stop the RTT measurements.
+        
+        A request in flight is not interrupted; the thread exits once it returns.
+        """
+        self.stop_event.set()
+        self.rtt_thread = None
+    
+    def run_rtt_checks(self):
+        """
+        Measure the RTT every rtt_interval seconds until stopped.
+        """
+        interval = self.rotation_config.get('rtt_interval', 15)
+        while not self.stop_event.is_set():
+            rtt = self.measure_rtt()
+            if self.stop_event.is_set():
+                return
+            self.rtt_degraded = rtt is None or rtt > self.max_rtt
+            self.stop_event.wait(interval)
+    
+    def check(self, sample: SessionSample) -> Optional[str]:
+        """
+        Decide whether to rotate now.
+        
+        Args:
+            sample: Traffic since the session started
+        
+        Returns:
+            Reason to rotate, or None to keep the session
+        """
+        busy = sample.rx_rate + sample.tx_rate >= self.idle_threshold
+        slow = self.min_throughput and busy and sample.rx_rate < self.min_throughput
+        degraded = self.rtt_degraded or slow
+        
+        if degraded:
+            if self.degraded_since is None:
+                self.degraded_since = sample.elapsed
+            if sample.elapsed - self.degraded_since >= self.window:
+                return ROTATE_DEGRADED
+        elif busy or self.max_rtt:
+            # Idle samples say nothing about throughput, keep the window running
+            self.degraded_since = None
+        
+        return self.check_max_session(sample)
+
+
+class IdlePolicy(RotationPolicy):
+    """
+    Rotates after cooldown_seconds, but only once the tunnel has been idle for idle_seconds.
+    
+    Active transfers keep the session open until they pause; set
+    max_session_seconds to force a rotation if they never do.
+    """
+    
+    def __init__(self, rotation_config, cooldown_seconds: float, connectivity=None):
+        """
+        Initialize the policy.
+        
+        Args:
+            rotation_config: "rotation" configuration section
+            cooldown_seconds: Configured session length
+            connectivity: Optional ConnectivityClient bound to the tunnel
+        """
+        super().__init__(rotation_config, cooldown_seconds, connectivity)
+        self.idle_threshold = rotation_config.get('idle_threshold', 2048)
+        self.idle_seconds = rotation_config.get('idle_seconds', 30)
+        self.idle_since = None
+    
+    def describe(self) -> str:
+        """
+        Describe when the session will end.
+        
+        Returns:
+            Description for the session start message
+        """
+        return f"for at least {self.cooldown_seconds} seconds, until traffic is idle"
+    
+    def check(self, sample: SessionSample) -> Optional[str]:
+        """
+        Decide whether to rotate now.
+        
+        Args:
+            sample: Traffic since the session started
+        
+        Returns:
+            Reason to rotate, or None to keep the session
+        """
+        if sample.rx_rate + sample.tx_rate >= self.idle_threshold:
+            self.idle_since = None
+        elif self.idle_since is None:
+            self.idle_since = sample.elapsed
+        
+        if (sample.elapsed >= self.cooldown_seconds and self.idle_since is not None
+                and sample.elapsed - self.idle_since >= self.idle_seconds):
+            return ROTATE_IDLE
+        return self.check_max_session(sample)
+
+
+POLICIES = {
+    "fixed": FixedTimePolicy,
+    "bytes": ByteBudgetPolicy,
+    "degraded": DegradedPolicy,
+    "idle": IdlePolicy,
+}
+
+
+def create_rotation_policy(config_manager, connectivity=None) -> RotationPolicy:
+    """
+    Create the configured rotation policy for a new session.
+    
+    Args:
+        config_manager: Instance of ConfigManager
+        connectivity: Optional ConnectivityClient bound to the tunnel, used for RTT checks
+    
+    Returns:
+        RotationPolicy instance
+    """
+    rotation_config = config_manager.get_rotation_config()
+    policy_class = POLICIES.get(rotation_config.get('policy', 'fixed'), FixedTimePolicy)
+    return policy_class(rotation_config, config_manager.get_cooldown_seconds(), connectivity)
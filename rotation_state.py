@@ -0,0 +1,242 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class RotationState:
+    """
+    Rotation progress kept on disk so that a restart resumes where it stopped.
+    
+    The state file records the servers already used in the current pass,
+    the consecutive connection failures of each server, the last server
+    that passed verification, the latest latency probes and the underlay
+    IP address, each with the wall-clock time it was measured. On the next
+    start the last good server is tried first and the pass continues with
+    the servers it had not reached yet; probes and the IP lookup are only
+    repeated once they are too old. The file is rewritten atomically after
+    every change and is only readable by its owner, since it contains the
+    real IP address.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the state and load the file left by the previous run.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.logger = logger_manager
+        self.warm_start_config = config_manager.get_warm_start_config()
+        paths_config = config_manager.get_paths_config()
+        self.state_path = Path(paths_config.get('state_file', '.cyclevpn_state.json'))
+        self.lock = threading.Lock()
+        
+        self.pass_servers: List[str] = []
+        self.failures: Dict[str, int] = {}
+        self.last_good = None
+        self.latencies: Dict[str, Optional[float]] = {}
+        self.probed_at = None
+        self.initial_ip = None
+        self.initial_ip_at = None
+        self.resume_pending = False
+        self.load()
+    
+    def is_enabled(self) -> bool:
+        """
+        Check whether the rotation state is persisted.
+        
+        Returns:
+            True if warm starts are enabled, False otherwise
+        """
+        return self.warm_start_config.get('enabled', True)
+    
+    def load(self):
+        """
+        Load the state file, discarding the rotation progress if it is too old.
+        """
+        if not self.is_enabled():
+            return
+        
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            self.pass_servers = [str(ovpn_file) for ovpn_file in data.get('pass', [])]
+            self.failures = {str(ovpn_file): int(count) for ovpn_file, count in data.get('failures', {}).items()}
+            self.last_good = data.get('last_good')
+            self.latencies = {
+                str(ovpn_file): None if rtt is None else float(rtt)
+                for ovpn_file, rtt in data.get('latencies', {}).items()
+            }
+            self.probed_at = data.get('probed_at')
+            self.initial_ip = data.get('initial_ip')
+            self.initial_ip_at = data.get('initial_ip_at')
+            saved_at = float(data.get('saved_at', 0))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            self.logger.warning(f"Ignoring unreadable rotation state {self.state_path}: {e}")
+            return
+        
+        if time.time() - saved_at > self.warm_start_config.get('resume_max_age', 86400):
+            self.logger.info("Saved rotation state is too old to resume, starting a new pass")
+            self.pass_servers = []
+            self.failures = {}
+            self.last_good = None
+        
+        self.resume_pending = self.last_good is not None
+    
+    def save(self):
+        """
+        Write the state file atomically, readable only by its owner.
+        """
+        if not self.is_enabled():
+            return
+        
+        temp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        with self.lock:
+            data = {
+                "saved_at": time.time(),
+                "pass": self.pass_servers,
+                "failures": self.failures,
+                "last_good": self.last_good,
+                "latencies": self.latencies,
+                "probed_at": self.probed_at,
+                "initial_ip": self.initial_ip,
+                "initial_ip_at": self.initial_ip_at,
+            }
+            try:
+                fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                    json.dump(data, file, indent=1)
+                os.replace(temp_path, self.state_path)
+            except OSError as e:
+                self.logger.warning(f"Failed to write rotation state {self.state_path}: {e}")
+    
+    def take_resume_server(self, ovpn_files: List[str]) -> Optional[str]:
+        """
+        Get the last good server of the previous run, once.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names available now
+        
+        Returns:
+            The server to reconnect to first, or None if there is nothing to resume
+        """
+        with self.lock:
+            if not self.resume_pending:
+                return None
+            self.resume_pending = False
+            ovpn_file = self.last_good
+        
+        if ovpn_file not in ovpn_files or self.failures.get(ovpn_file):
+            return None
+        return ovpn_file
+    
+    def get_pass_progress(self, ovpn_files: List[str]) -> List[str]:
+        """
+        Get the servers already used in the current pass.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names available now
+        
+        Returns:
+            Servers of the pass so far, in the order they were used
+        """
+        with self.lock:
+            return [ovpn_file for ovpn_file in self.pass_servers if ovpn_file in ovpn_files]
+    
+    def record_choice(self, ovpn_file: str):
+        """
+        Record that a server was chosen in the current pass.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+        """
+        with self.lock:
+            if ovpn_file in self.pass_servers:
+                return
+            self.pass_servers.append(ovpn_file)
+        self.save()
+    
+    def start_new_pass(self):
+        """
+        Forget the servers of the finished pass.
+        """
+        with self.lock:
+            self.pass_servers = []
+        self.save()
+    
+    def record_result(self, ovpn_file: str, verified: bool):
+        """
+        Record the outcome of a connection or session.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+            verified: Whether the server worked
+        """
+        with self.lock:
+            if verified:
+                self.failures.pop(ovpn_file, None)
+                self.last_good = ovpn_file
+            else:
+                self.failures[ovpn_file] = self.failures.get(ovpn_file, 0) + 1
+        self.save()
+    
+    def get_initial_ip(self) -> Optional[str]:
+        """
+        Get the saved underlay IP address while it is recent enough.
+        
+        Returns:
+            IP address, or None if unknown or older than initial_ip_max_age
+        """
+        max_age = self.warm_start_config.get('initial_ip_max_age', 3600)
+        if not self.initial_ip or self.initial_ip_at is None:
+            return None
+        if not 0 <= time.time() - self.initial_ip_at <= max_age:
+            return None
+        return self.initial_ip
+    
+    def set_initial_ip(self, initial_ip: str):
+        """
+        Save a freshly looked-up underlay IP address.
+        
+        Args:
+            initial_ip: IP address
+        """
+        with self.lock:
+            self.initial_ip = initial_ip
+            self.initial_ip_at = time.time()
+        self.save()
+    
+    def get_latencies(self, max_age: float) -> Optional[Tuple[Dict[str, Optional[float]], float]]:
+        """
+        Get the saved latency probes while they are recent enough.
+        
+        Args:
+            max_age: Maximum age of the probes in seconds
+        
+        Returns:
+            Tuple of (latencies, age in seconds), or None if missing or too old
+        """
+        if not self.latencies or self.probed_at is None:
+            return None
+        age = time.time() - self.probed_at
+        if not 0 <= age <= max_age:
+            return None
+        return dict(self.latencies), age
+    
+    def set_latencies(self, latencies: Dict[str, Optional[float]]):
+        """
+        Save the latest latency probes.
+        
+        Args:
+            latencies: Dictionary of file name to round-trip time (None if unreachable)
+        """
+        with self.lock:
+            self.latencies = dict(latencies)
+            self.probed_at = time.time()
+        self.save()
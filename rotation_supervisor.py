@@ -0,0 +1,361 @@
+import asyncio
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+
+
+class RotationSupervisor:
+    """
+    asyncio supervisor for the VPN rotation loop.
+    
+    The blocking building blocks of VPNManager run on two single-thread
+    lanes: one owns the tunnels and routes, the other controls services.
+    Work on different lanes overlaps, e.g. Transmission is stopped while
+    OpenVPN starts, and work on the same lane stays strictly ordered.
+    The session wait, deadlines and shutdown are handled by the event
+    loop, so a signal cancels the rotation task at its current await and
+    teardown runs once, from a known point, instead of inside whatever
+    call the signal interrupted.
+    """
+    
+    def __init__(self, config_manager, logger_manager, vpn_manager, on_shutdown: Optional[Callable] = None):
+        """
+        Initialize the rotation supervisor.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            vpn_manager: Instance of VPNManager
+            on_shutdown: Optional blocking callable run on the VPN lane during shutdown
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.vpn_manager = vpn_manager
+        self.kill_switch = vpn_manager.kill_switch
+        self.on_shutdown = on_shutdown
+        self.session_config = config_manager.get_session_config()
+        self.network_config = config_manager.get_network_config()
+        
+        self.vpn_lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vpn")
+        self.service_lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix="service")
+        self.transmission_running = False
+        self.exit_code = None
+    
+    async def call(self, lane: ThreadPoolExecutor, func: Callable, *args):
+        """
+        Run a blocking call on a lane.
+        
+        Args:
+            lane: Executor the call runs on
+            func: Blocking callable
+            *args: Arguments passed to the callable
+        
+        Returns:
+            The callable's return value
+        """
+        return await asyncio.get_running_loop().run_in_executor(lane, partial(func, *args))
+    
+    async def set_transmission(self, action: str):
+        """
+        Start or stop Transmission's traffic on the service lane.
+        
+        Args:
+            action: "start" or "stop"
+        """
+        await self.call(self.service_lane, self.vpn_manager.set_transmission, action)
+        self.transmission_running = action == "start"
+    
+    async def connect(self, func: Callable, ovpn_file: str, username: str, password: str) -> bool:
+        """
+        Bring up a tunnel with a connect or switch call, bounded by connect_deadline.
+        
+        When the deadline expires or the rotation is cancelled, the call is
+        cancelled and awaited, so that it has torn down its tunnel before
+        anything else runs.
+        
+        Args:
+            func: VPNManager.connect_to_vpn or VPNManager.switch_to_server
+            ovpn_file: OpenVPN configuration file name
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            True if the tunnel is up and verified, False otherwise
+        """
+        deadline = self.network_config.get('connect_deadline', 120)
+        self.vpn_manager.connect_cancelled.clear()
+        future = asyncio.get_running_loop().run_in_executor(
+            self.vpn_lane, partial(func, ovpn_file, username, password)
+        )
+        
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), deadline)
+        except asyncio.TimeoutError:
+            self.logger.error(f"Connection to {ovpn_file} exceeded its {deadline} second deadline, cancelling it")
+            self.vpn_manager.cancel_connect()
+            # A connect that finished just before the cancel stays up
+            return await future
+        except asyncio.CancelledError:
+            self.vpn_manager.cancel_connect()
+            await asyncio.shield(future)
+            raise
+    
+    async def wait_session(self, policy) -> Optional[str]:
+        """
+        Keep the session running while the health monitor watches the tunnel.
+        
+        Args:
+            policy: RotationPolicy deciding when the session ends
+        
+        Returns:
+            Failure reason if the tunnel failed before the end of the session, None otherwise
+        """
+        monitor = self.vpn_manager.health_monitor
+        loop = asyncio.get_running_loop()
+        
+        monitor.start(self.vpn_manager.tunnel, policy)
+        try:
+            # Wait in short slices so cancellation is never held up for long
+            while not await loop.run_in_executor(None, monitor.finished.wait, 1.0):
+                pass
+            return monitor.failure
+        finally:
+            await loop.run_in_executor(None, monitor.stop)
+    
+    async def run_session(self, ovpn_file: str, username: str, password: str) -> bool:
+        """
+        Run one break-before-make session.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            True if session completed successfully, False otherwise
+        """
+        try:
+            _, connected = await asyncio.gather(
+                self.set_transmission("stop"),
+                self.connect(self.vpn_manager.connect_to_vpn, ovpn_file, username, password)
+            )
+            
+            if not connected:
+                self.logger.error("Failed to establish VPN connection")
+                if self.config_manager.is_kill_switch_enabled():
+                    await self.call(self.vpn_lane, self.kill_switch.activate_kill_switch)
+                return False
+            
+            await self.set_transmission("start")
+            
+            failure = await self.wait_session(self.vpn_manager.create_rotation_policy())
+            
+            await self.set_transmission("stop")
+            
+            if failure:
+                await self.call(self.vpn_lane, self.vpn_manager.handle_tunnel_failure, failure)
+                return False
+            return True
+            
+        finally:
+            if self.transmission_running:
+                await self.set_transmission("stop")
+            await self.call(self.vpn_lane, self.vpn_manager.disconnect_vpn)
+    
+    async def run_switch(self, ovpn_file: str, username: str, password: str) -> bool:
+        """
+        Run one make-before-break session: switch to the server, then hold it.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            True if session completed successfully, False otherwise
+        """
+        if not await self.connect(self.vpn_manager.switch_to_server, ovpn_file, username, password):
+            self.logger.error(f"Rotation failed with {ovpn_file}")
+            if not self.vpn_manager.tunnel and self.config_manager.is_kill_switch_enabled():
+                await self.call(self.vpn_lane, self.kill_switch.activate_kill_switch)
+                self.transmission_running = False
+            return False
+        
+        if not self.transmission_running:
+            await self.set_transmission("start")
+        
+        failure = await self.wait_session(self.vpn_manager.create_rotation_policy())
+        
+        if failure:
+            await self.set_transmission("stop")
+            await self.call(self.vpn_lane, self.vpn_manager.handle_tunnel_failure, failure)
+            return False
+        return True
+    
+    async def keep_session(self) -> bool:
+        """
+        Hold the current tunnel for another session when a pass had no other server to use.
+        
+        Without a tunnel, wait one cooldown instead, so that passes never
+        follow each other without a pause.
+        
+        Returns:
+            True if the session completed, False if the tunnel failed
+        """
+        if not self.vpn_manager.tunnel:
+            await asyncio.sleep(self.config_manager.get_cooldown_seconds())
+            return True
+        
+        self.logger.info(f"No other server to rotate to, keeping {self.vpn_manager.current_ovpn_file}")
+        failure = await self.wait_session(self.vpn_manager.create_rotation_policy())
+        
+        if failure:
+            await self.set_transmission("stop")
+            await self.call(self.vpn_lane, self.vpn_manager.handle_tunnel_failure, failure)
+            await self.call(self.vpn_lane, self.vpn_manager.disconnect_vpn)
+            return False
+        return True
+    
+    async def rotate(self, username: str, password: str):
+        """
+        Rotate through the servers until cancelled.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+        """
+        ovpn_files = await self.call(self.vpn_lane, self.vpn_manager.discover_ovpn_files)
+        
+        if not ovpn_files:
+            self.logger.error("No OpenVPN files available for rotation")
+            return
+        
+        await self.call(self.vpn_lane, self.vpn_manager.bind_underlay_checks)
+        if not self.vpn_manager.warmed_up:
+            await asyncio.gather(
+                self.call(self.vpn_lane, self.vpn_manager.load_initial_ip),
+                self.call(self.service_lane, self.vpn_manager.warm_up, ovpn_files)
+            )
+        await self.call(self.vpn_lane, self.kill_switch.engage_firewall)
+        
+        make_before_break = self.session_config.get('rotation_mode') == "make-before-break"
+        if make_before_break and not self.network_config.get('management_interface', True):
+            self.logger.warning(
+                "Make-before-break rotation requires the OpenVPN management interface, "
+                "using standard rotation"
+            )
+            make_before_break = False
+        
+        run = self.run_switch if make_before_break else self.run_session
+        failure_count = 0
+        
+        while True:
+            passes = self.vpn_manager.server_selector.iterate_pass(ovpn_files)
+            runnable = False
+            while True:
+                ovpn_file = await self.call(self.vpn_lane, next, passes, None)
+                if ovpn_file is None:
+                    break
+                pinned = self.vpn_manager.control.pinned
+                if make_before_break and ovpn_file == self.vpn_manager.current_ovpn_file and ovpn_file != pinned:
+                    continue
+                
+                runnable = True
+                self.config_manager.apply_pending_changes()
+                max_failures = self.session_config['max_connection_failures']
+                
+                try:
+                    successful = await run(ovpn_file, username, password)
+                except asyncio.CancelledError:
+                    raise
+                except SystemExit as e:
+                    # Emergency shutdown after a tunnel failure with on_failure "kill_switch"
+                    self.exit_code = e.code
+                    return
+                except Exception as e:
+                    self.logger.error(f"Unexpected error with {ovpn_file}: {e}")
+                    successful = False
+                
+                if successful:
+                    failure_count = 0
+                    self.logger.success(f"Completed session with {ovpn_file}", server=ovpn_file, phase="session")
+                    continue
+                
+                failure_count += 1
+                self.logger.error(
+                    f"Session failed with {ovpn_file} (failure {failure_count})",
+                    server=ovpn_file,
+                    phase="session"
+                )
+                
+                if failure_count >= max_failures:
+                    self.logger.error("Maximum failures reached, activating kill switch")
+                    try:
+                        await self.call(self.vpn_lane, self.kill_switch.emergency_shutdown)
+                    except SystemExit as e:
+                        self.exit_code = e.code
+                        return
+            
+            if not runnable:
+                try:
+                    await self.keep_session()
+                except SystemExit as e:
+                    self.exit_code = e.code
+                    return
+    
+    async def shutdown(self):
+        """
+        Stop Transmission and tear down the tunnels after the rotation ended.
+        
+        After an emergency shutdown the kill switch stays in place and the
+        on_shutdown callback is skipped, as the application exits with an error.
+        """
+        if self.transmission_running:
+            await self.set_transmission("stop")
+        await self.call(self.vpn_lane, self.vpn_manager.disconnect_vpn)
+        if self.on_shutdown and self.exit_code is None:
+            await self.call(self.vpn_lane, self.on_shutdown)
+    
+    async def run(self, username: str, password: str):
+        """
+        Run the rotation until it ends or SIGINT/SIGTERM cancels it.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+        """
+        loop = asyncio.get_running_loop()
+        rotation = asyncio.ensure_future(self.rotate(username, password))
+        signals = (signal.SIGINT, signal.SIGTERM)
+        previous_handlers = {signum: signal.getsignal(signum) for signum in signals}
+        
+        def cancel_rotation(signum):
+            self.logger.warning("Received interrupt signal, shutting down...")
+            rotation.cancel()
+        
+        def ignore_signal(signum):
+            self.logger.warning("Shutdown already in progress")
+        
+        for signum in signals:
+            loop.add_signal_handler(signum, cancel_rotation, signum)
+        if self.vpn_manager.stop_requested.is_set():
+            # A signal arrived before the handlers above were installed
+            rotation.cancel()
+        
+        try:
+            await rotation
+        except asyncio.CancelledError:
+            self.logger.info("VPN rotation stopped by user")
+        finally:
+            # Keep the signals handled until teardown is done, then hand them back
+            for signum in signals:
+                loop.add_signal_handler(signum, ignore_signal, signum)
+            try:
+                await self.shutdown()
+            finally:
+                for signum in signals:
+                    loop.remove_signal_handler(signum)
+                    signal.signal(signum, previous_handlers[signum])
+                self.vpn_lane.shutdown(wait=False)
+                self.service_lane.shutdown(wait=False)
\ No newline at end of file
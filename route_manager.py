@@ -0,0 +1,235 @@
+import fcntl
+import re
+import socket
+import struct
+import subprocess
+from typing import List, Optional, Tuple
+
+
+def resolve_ipv4(host: str) -> Optional[str]:
+    """
+    Resolve a host name to its first IPv4 address.
+    
+    Args:
+        host: Host name or IPv4 address
+    
+    Returns:
+        IPv4 address, or None if resolution failed
+    """
+    try:
+        infos = socket.getaddrinfo(host, None, socket.AF_INET, socket.SOCK_DGRAM)
+    except socket.gaierror:
+        return None
+    return infos[0][4][0] if infos else None
+
+
+SIOCGIFADDR = 0x8915
+
+
+def get_interface_ipv4(device: str) -> Optional[str]:
+    """
+    Get the IPv4 address assigned to a network device.
+    
+    Args:
+        device: Network device name
+    
+    Returns:
+        IPv4 address, or None if the device has no address or does not exist
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        request = struct.pack('256s', device.encode()[:15])
+        return socket.inet_ntoa(fcntl.ioctl(sock.fileno(), SIOCGIFADDR, request)[20:24])
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+
+def get_route_device(address: str) -> Optional[str]:
+    """
+    Find the device the main routing table sends an address through.
+    
+    The longest matching prefix in /proc/net/route wins, lowest metric
+    breaking ties, which is what the kernel picks without policy rules.
+    
+    Args:
+        address: Destination IPv4 address
+    
+    Returns:
+        Device name, or None if no route matches
+    """
+    destination = struct.unpack('=I', socket.inet_aton(address))[0]
+    best = None
+    
+    try:
+        with open('/proc/net/route', 'r') as routes:
+            next(routes, None)
+            for line in routes:
+                fields = line.split()
+                if len(fields) < 8:
+                    continue
+                
+                device, network, metric, mask = fields[0], int(fields[1], 16), int(fields[6]), int(fields[7], 16)
+                if destination & mask != network:
+                    continue
+                
+                candidate = (bin(mask).count("1"), -metric, device)
+                if best is None or candidate[:2] > best[:2]:
+                    best = candidate
+    except (OSError, ValueError):
+        return None
+    
+    return best[2] if best else None
+
+
+class RouteManager:
+    """
+    Manages the routes that send traffic through the active tunnel.
+    
+    Routes are switched between tun devices with a single batched
+    "ip" invocation, so the new tunnel takes over without a window
+    where no tunnel route exists.
+    """
+    
+    TUNNEL_ROUTES = ["0.0.0.0/1", "128.0.0.0/1"]
+    
+    def __init__(self, logger_manager, netns: Optional[str] = None,
+                 underlay_gateway: Optional[Tuple[str, str]] = None):
+        """
+        Initialize the route manager.
+        
+        Args:
+            logger_manager: Instance of LoggerManager
+            netns: Optional network namespace whose routes are managed
+            underlay_gateway: Optional known (gateway, device) of the underlay
+        """
+        self.logger = logger_manager
+        self.netns = netns
+        self.underlay_gateway = underlay_gateway
+        self.active_device = None
+        self.host_routes = set()
+    
+    def get_underlay_gateway(self) -> Optional[Tuple[str, str]]:
+        """
+        Get the gateway and device of the underlying default route.
+        
+        Returns:
+            Tuple of (gateway, device), or None if no default route exists
+        """
+        if self.underlay_gateway:
+            return self.underlay_gateway
+        
+        try:
+            result = subprocess.run(
+                ["ip", "-4", "route", "show", "default"],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.logger.error(f"Failed to read default route: {e}")
+            return None
+        
+        match = re.search(r"default via (\S+) dev (\S+)", result.stdout)
+        if not match:
+            self.logger.error("No underlay default route found")
+            return None
+        
+        self.underlay_gateway = (match.group(1), match.group(2))
+        self.logger.debug(f"Underlay gateway: {self.underlay_gateway[0]} dev {self.underlay_gateway[1]}")
+        return self.underlay_gateway
+    
+    def run_batch(self, commands: List[str], force: bool = False) -> bool:
+        """
+        Apply several route commands in a single "ip -batch" invocation.
+        
+        Args:
+            commands: Commands in "ip -batch" syntax
+            force: Keep going after a failing command
+        
+        Returns:
+            True if all commands succeeded, False otherwise
+        """
+        command = ["ip", "-n", self.netns] if self.netns else ["ip"]
+        command += ["-force", "-batch", "-"] if force else ["-batch", "-"]
+        
+        try:
+            result = subprocess.run(
+                command,
+                input="\n".join(commands) + "\n",
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.logger.error(f"Failed to apply routes: {e}")
+            return False
+        
+        if result.returncode != 0:
+            self.logger.error(f"Failed to apply routes: {result.stderr.strip()}")
+            return False
+        return True
+    
+    def pin_host_route(self, address: str) -> bool:
+        """
+        Route a VPN server address through the underlay gateway.
+        
+        Args:
+            address: IPv4 address of the VPN server
+        
+        Returns:
+            True if the route was installed, False otherwise
+        """
+        underlay = self.get_underlay_gateway()
+        if not underlay:
+            return False
+        
+        gateway, device = underlay
+        if self.run_batch([f"route replace {address}/32 via {gateway} dev {device}"]):
+            self.host_routes.add(address)
+            return True
+        return False
+    
+    def release_host_route(self, address: str):
+        """
+        Remove a previously pinned VPN server route.
+        
+        Args:
+            address: IPv4 address of the VPN server
+        """
+        if address in self.host_routes:
+            self.run_batch([f"route del {address}/32"], force=True)
+            self.host_routes.discard(address)
+    
+    def switch_default_route(self, device: str) -> bool:
+        """
+        Point the tunnel routes at the given tun device in one batch.
+        
+        Args:
+            device: Name of the tun device that should carry traffic
+        
+        Returns:
+            True if the routes were switched, False otherwise
+        """
+        commands = [f"route replace {route} dev {device}" for route in self.TUNNEL_ROUTES]
+        if self.run_batch(commands):
+            self.active_device = device
+            self.logger.debug(f"Tunnel routes now point to {device}")
+            return True
+        return False
+    
+    def clear_routes(self):
+        """
+        Remove the tunnel routes and every pinned server route.
+        """
+        if not self.active_device and not self.host_routes:
+            return
+        
+        commands = []
+        if self.active_device:
+            commands += [f"route del {route} dev {self.active_device}" for route in self.TUNNEL_ROUTES]
+        commands += [f"route del {address}/32" for address in self.host_routes]
+        self.run_batch(commands, force=True)
+        self.active_device = None
+        self.host_routes.clear()
\ No newline at end of file
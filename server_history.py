@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    server TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    connect_latency REAL,
+    verified INTEGER NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    rx_bytes INTEGER NOT NULL DEFAULT 0,
+    tx_bytes INTEGER NOT NULL DEFAULT 0,
+    dropped INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_server ON sessions (server);
+"""
+
+
+class ServerHistory:
+    """
+    Persistent per-server performance history backed by SQLite.
+    
+    Every connection attempt is one row: its connect latency and
+    verification outcome are written when the tunnel comes up, and the
+    traffic counters and drop flag are filled in when the session ends.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the history store.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.paths_config = config_manager.get_paths_config()
+        self.database_path = self.paths_config.get('history_database', 'cyclevpn_history.db')
+        self.lock = threading.Lock()
+        
+        self.connection = sqlite3.connect(self.database_path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+    
+    def record_attempt(self, server: str, connect_latency: Optional[float], verified: bool) -> int:
+        """
+        Record the outcome of a connection attempt.
+        
+        Args:
+            server: OpenVPN configuration file name
+            connect_latency: Time until the tunnel was up, or None if it never came up
+            verified: Whether the connection passed verification
+        
+        Returns:
+            Identifier of the recorded session
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "INSERT INTO sessions (server, started_at, connect_latency, verified) VALUES (?, ?, ?, ?)",
+                (server, time.time(), connect_latency, int(verified))
+            )
+            self.connection.commit()
+            return cursor.lastrowid
+    
+    def record_session_end(self, session_id: int, duration: float, rx_bytes: int,
+                           tx_bytes: int, dropped: bool = False):
+        """
+        Complete a session with its duration, traffic and drop status.
+        
+        Args:
+            session_id: Identifier returned by record_attempt
+            duration: Session duration in seconds
+            rx_bytes: Bytes received through the tunnel
+            tx_bytes: Bytes sent through the tunnel
+            dropped: Whether the tunnel dropped during the session
+        """
+        with self.lock:
+            self.connection.execute(
+                "UPDATE sessions SET duration = ?, rx_bytes = ?, tx_bytes = ?, dropped = ? WHERE id = ?",
+                (duration, rx_bytes, tx_bytes, int(dropped), session_id)
+            )
+            self.connection.commit()
+    
+    def record_drop(self, session_id: int):
+        """
+        Flag a session as dropped.
+        
+        Args:
+            session_id: Identifier returned by record_attempt
+        """
+        with self.lock:
+            self.connection.execute("UPDATE sessions SET dropped = 1 WHERE id = ?", (session_id,))
+            self.connection.commit()
+    
+    def get_server_stats(self) -> Dict[str, dict]:
+        """
+        Aggregate the history per server.
+        
+        Returns:
+            Dictionary of server name to attempts, successes, mean connect
+            latency, verified duration, total bytes and drops
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                """
+                SELECT server,
+                       COUNT(*),
+                       SUM(verified),
+                       AVG(CASE WHEN verified THEN connect_latency END),
+                       SUM(CASE WHEN verified THEN duration ELSE 0 END),
+                       SUM(rx_bytes + tx_bytes),
+                       SUM(dropped)
+                FROM sessions
+                GROUP BY server
+                """
+            ).fetchall()
+        
+        return {
+            server: {
+                "attempts": attempts,
+                "successes": successes or 0,
+                "connect_latency": connect_latency,
+                "duration": duration or 0.0,
+                "bytes": total_bytes or 0,
+                "drops": drops or 0,
+            }
+            for server, attempts, successes, connect_latency, duration, total_bytes, drops in rows
+        }
+    
+    def get_rewards(self) -> Dict[str, tuple]:
+        """
+        Compute a mean reward in [0, 1] and the number of trials per server.
+        
+        The reward is the verification success rate weighted by how the
+        server's throughput compares to the best server's and by how often
+        its sessions dropped.
+        
+        Returns:
+            Dictionary of server name to (mean reward, attempts)
+        """
+        stats = self.get_server_stats()
+        throughputs = {
+            server: entry["bytes"] / entry["duration"]
+            for server, entry in stats.items() if entry["duration"] > 0
+        }
+        best_throughput = max(throughputs.values(), default=0.0)
+        
+        rewards = {}
+        for server, entry in stats.items():
+            success_rate = entry["successes"] / entry["attempts"]
+            drop_rate = entry["drops"] / entry["successes"] if entry["successes"] else 0.0
+            throughput_score = throughputs.get(server, 0.0) / best_throughput if best_throughput else 1.0
+            mean = success_rate * (0.6 * throughput_score + 0.4 * (1.0 - min(drop_rate, 1.0)))
+            rewards[server] = (mean, entry["attempts"])
+        return rewards
+    
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self.lock:
+            self.connection.close()
\ No newline at end of file
@@ -0,0 +1,405 @@
+import math
+import os
+import random
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from connectivity_client import PATH_UNDERLAY, SO_BINDTODEVICE
+from route_manager import resolve_ipv4
+
+
+OPENVPN_HARD_RESET_CLIENT_V2 = 7
+OPENVPN_HARD_RESET_SERVER_V2 = 8
+
+BANDIT_STRATEGIES = ("ucb", "thompson")
+
+
+def build_hard_reset_packet() -> bytes:
+    """
+    Build an OpenVPN P_CONTROL_HARD_RESET_CLIENT_V2 packet.
+    
+    Servers without tls-auth answer it with a HARD_RESET_SERVER_V2 packet,
+    which makes it a cheap round-trip probe of the real OpenVPN endpoint.
+    
+    Returns:
+        Raw packet bytes
+    """
+    opcode = bytes([OPENVPN_HARD_RESET_CLIENT_V2 << 3])
+    session_id = os.urandom(8)
+    ack_count = b"\x00"
+    packet_id = b"\x00\x00\x00\x00"
+    return opcode + session_id + ack_count + packet_id
+
+
+class ServerSelector:
+    """
+    Chooses the next VPN server from measured round-trip times.
+    
+    All candidates are probed in parallel, UDP profiles with an OpenVPN
+    handshake packet and TCP profiles with a TCP connect, and the next
+    server is drawn at random with a weight of (1 / rtt) ** latency_exponent.
+    An exponent of 0 gives a uniform draw, larger values favour nearby servers.
+    
+    The "ucb" and "thompson" strategies instead schedule servers from their
+    recorded history, trying never-used servers first by latency.
+    """
+    
+    def __init__(self, config_manager, logger_manager, catalog, connectivity=None, history=None, resolver=None,
+                 control=None, state=None):
+        """
+        Initialize the server selector.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            catalog: Instance of OVPNCatalog
+            connectivity: Optional ConnectivityClient whose underlay binding probes use
+            history: Optional ServerHistory used by the bandit strategies
+            resolver: Optional RemoteResolver providing cached remote addresses
+            control: Optional RotationControl whose pinned server overrides the selection
+            state: Optional RotationState that saves probes and pass progress across restarts
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.catalog = catalog
+        self.connectivity = connectivity
+        self.history = history
+        self.resolver = resolver
+        self.control = control
+        self.state = state
+        self.selection_config = config_manager.get_selection_config()
+        
+        self.latencies = {}
+        self.probed_at = None
+        self.restore_latencies()
+    
+    def restore_latencies(self):
+        """
+        Reuse the probes saved by the previous run while they are not stale.
+        """
+        if not self.state:
+            return
+        
+        saved = self.state.get_latencies(self.selection_config.get('probe_max_age', 900))
+        if saved:
+            self.latencies, age = saved
+            self.probed_at = time.monotonic() - age
+            self.logger.debug(f"Restored latencies of {len(self.latencies)} servers probed {age:.0f} seconds ago")
+    
+    def get_strategy(self) -> str:
+        """
+        Get the configured selection strategy.
+        
+        Returns:
+            "latency", "random", "ucb" or "thompson"
+        """
+        return self.selection_config.get('strategy', 'latency')
+    
+    def create_probe_socket(self, kind: int) -> socket.socket:
+        """
+        Create a probe socket, bound to the underlay interface when known.
+        
+        Args:
+            kind: socket.SOCK_DGRAM or socket.SOCK_STREAM
+        
+        Returns:
+            New socket
+        """
+        sock = socket.socket(socket.AF_INET, kind)
+        interface = self.connectivity.get_interface(PATH_UNDERLAY) if self.connectivity else None
+        if interface:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_BINDTODEVICE, interface.encode())
+            except OSError as e:
+                self.logger.debug(f"Cannot bind probe to {interface}: {e}")
+        return sock
+    
+    def probe_udp(self, address: str, port: int, timeout: float) -> Optional[float]:
+        """
+        Measure the round-trip time of an OpenVPN UDP handshake packet.
+        
+        Args:
+            address: Server IPv4 address
+            port: Server UDP port
+            timeout: Probe timeout in seconds
+        
+        Returns:
+            Round-trip time in seconds, or None if the server did not answer
+        """
+        sock = self.create_probe_socket(socket.SOCK_DGRAM)
+        try:
+            sock.settimeout(timeout)
+            sock.connect((address, port))
+            started_at = time.monotonic()
+            sock.send(build_hard_reset_packet())
+            reply = sock.recv(2048)
+            if reply and reply[0] >> 3 == OPENVPN_HARD_RESET_SERVER_V2:
+                return time.monotonic() - started_at
+        except OSError:
+            pass
+        finally:
+            sock.close()
+        return None
+    
+    def probe_tcp(self, address: str, port: int, timeout: float) -> Optional[float]:
+        """
+        Measure the TCP connect time to a server.
+        
+        Args:
+            address: Server IPv4 address
+            port: Server TCP port
+            timeout: Probe timeout in seconds
+        
+        Returns:
+            Connect time in seconds, or None if the server is unreachable
+        """
+        sock = self.create_probe_socket(socket.SOCK_STREAM)
+        try:
+            sock.settimeout(timeout)
+            started_at = time.monotonic()
+            sock.connect((address, port))
+            return time.monotonic() - started_at
+        except OSError:
+            return None
+        finally:
+            sock.close()
+    
+    def probe_server(self, ovpn_file: str) -> Optional[float]:
+        """
+        Probe one server several times and keep the best round-trip time.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+        
+        Returns:
+            Best round-trip time in seconds, or None if unreachable
+        """
+        profile = self.catalog.get(ovpn_file)
+        if not profile or not profile.remote_host:
+            return None
+        
+        if self.resolver:
+            address = self.resolver.get_address(profile.remote_host)
+        else:
+            address = resolve_ipv4(profile.remote_host)
+        if not address:
+            return None
+        
+        timeout = self.selection_config.get('probe_timeout', 2.0)
+        samples = max(1, self.selection_config.get('probe_samples', 2))
+        probe = self.probe_tcp if profile.proto == "tcp" else self.probe_udp
+        
+        results = [rtt for rtt in (probe(address, profile.remote_port, timeout) for _ in range(samples)) if rtt]
+        return min(results) if results else None
+    
+    def probe_servers(self, ovpn_files: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Probe all servers in parallel.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names
+        
+        Returns:
+            Dictionary of file name to round-trip time (None if unreachable)
+        """
+        if self.resolver:
+            profiles = (self.catalog.get(ovpn_file) for ovpn_file in ovpn_files)
+            self.resolver.prefetch([profile.remote_host for profile in profiles if profile and profile.remote_host])
+        
+        workers = max(1, min(self.selection_config.get('probe_workers', 32), len(ovpn_files)))
+        started_at = time.monotonic()
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe") as executor:
+            latencies = dict(zip(ovpn_files, executor.map(self.probe_server, ovpn_files)))
+        
+        reachable = sum(1 for rtt in latencies.values() if rtt is not None)
+        self.logger.info(
+            f"Probed {len(ovpn_files)} servers in {time.monotonic() - started_at:.1f} seconds, "
+            f"{reachable} reachable"
+        )
+        
+        self.latencies = latencies
+        self.probed_at = time.monotonic()
+        if self.state:
+            self.state.set_latencies(latencies)
+        return latencies
+    
+    def refresh_latencies(self, ovpn_files: List[str]):
+        """
+        Re-probe the servers when the measurements are missing or stale.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names
+        """
+        max_age = self.selection_config.get('probe_max_age', 900)
+        stale = self.probed_at is None or time.monotonic() - self.probed_at > max_age
+        
+        if stale or any(ovpn_file not in self.latencies for ovpn_file in ovpn_files):
+            self.probe_servers(ovpn_files)
+    
+    def pick(self, candidates: List[str]) -> str:
+        """
+        Pick one server among the candidates.
+        
+        Args:
+            candidates: OpenVPN configuration file names to choose from
+        
+        Returns:
+            The chosen file name
+        """
+        strategy = self.get_strategy()
+        
+        if strategy in BANDIT_STRATEGIES and self.history:
+            return self.pick_bandit(candidates, strategy)
+        
+        if strategy != "latency":
+            return random.choice(candidates)
+        
+        return self.pick_by_latency(candidates)
+    
+    def pick_bandit(self, candidates: List[str], strategy: str) -> str:
+        """
+        Pick a server with UCB1 or Thompson sampling over the recorded rewards.
+        
+        Args:
+            candidates: OpenVPN configuration file names to choose from
+            strategy: "ucb" or "thompson"
+        
+        Returns:
+            The chosen file name
+        """
+        rewards = self.history.get_rewards()
+        
+        untried = [ovpn_file for ovpn_file in candidates if ovpn_file not in rewards]
+        if untried:
+            return self.pick_by_latency(untried)
+        
+        total_trials = sum(trials for _, trials in rewards.values())
+        exploration = self.selection_config.get('ucb_exploration', 1.0)
+        scores = {}
+        
+        for ovpn_file in candidates:
+            mean, trials = rewards[ovpn_file]
+            if strategy == "ucb":
+                scores[ovpn_file] = mean + exploration * math.sqrt(2 * math.log(total_trials) / trials)
+            else:
+                scores[ovpn_file] = random.betavariate(1 + mean * trials, 1 + (1 - mean) * trials)
+        
+        choice = max(candidates, key=lambda ovpn_file: scores[ovpn_file])
+        mean, trials = rewards[choice]
+        self.logger.debug(f"Scheduled {choice} ({strategy}: mean reward {mean:.2f} over {trials} sessions)")
+        return choice
+    
+    def pick_by_latency(self, candidates: List[str]) -> str:
+        """
+        Draw a server weighted by its probed round-trip time.
+        
+        Args:
+            candidates: OpenVPN configuration file names to choose from
+        
+        Returns:
+            The chosen file name
+        """
+        self.refresh_latencies(candidates)
+        
+        reachable = [
+            (ovpn_file, self.latencies[ovpn_file]) for ovpn_file in candidates
+            if self.latencies.get(ovpn_file) is not None
+        ]
+        
+        if not reachable:
+            self.logger.warning("No server answered the latency probe, choosing at random")
+            return random.choice(candidates)
+        
+        exponent = self.selection_config.get('latency_exponent', 2.0)
+        weights = [(1.0 / max(rtt, 0.001)) ** exponent for _, rtt in reachable]
+        choice, rtt = random.choices(reachable, weights=weights)[0]
+        
+        self.logger.debug(f"Selected {choice} with probed RTT {rtt * 1000:.0f} ms")
+        return choice
+    
+    def iterate_pass(self, ovpn_files: List[str]) -> Iterator[str]:
+        """
+        Yield each server of one rotation pass, choosing the next one lazily.
+        
+        While a server is pinned it is yielded every time and the pass does
+        not advance. After a restart, the last server that worked is yielded
+        first, unless it has failed since.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names
+        
+        Yields:
+            OpenVPN configuration file names in rotation order
+        """
+        resume = self.state.take_resume_server(ovpn_files) if self.state else None
+        if resume:
+            self.state.record_choice(resume)
+        
+        choices = self.choose_pass(ovpn_files)
+        while True:
+            pinned = self.control.pinned if self.control else None
+            if pinned:
+                yield pinned
+                continue
+            
+            if resume:
+                self.logger.info(f"Resuming with last good server {resume}")
+                choice, resume = resume, None
+                yield choice
+                continue
+            
+            choice = next(choices, None)
+            if choice is None:
+                return
+            yield choice
+    
+    def choose_pass(self, ovpn_files: List[str]) -> Iterator[str]:
+        """
+        Choose the servers of one rotation pass.
+        
+        Unreachable servers are left out of the pass when skip_unreachable is
+        set, unless no server at all is reachable. With a bandit strategy the
+        pass may revisit good servers; only back-to-back repeats are avoided.
+        Otherwise the pass is saved as it goes, and a pass interrupted by a
+        restart continues with the servers it had not reached.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names
+        
+        Yields:
+            OpenVPN configuration file names in rotation order
+        """
+        if self.get_strategy() in BANDIT_STRATEGIES and self.history:
+            previous = None
+            for _ in range(len(ovpn_files)):
+                candidates = [ovpn_file for ovpn_file in ovpn_files if ovpn_file != previous]
+                previous = self.pick(candidates or list(ovpn_files))
+                yield previous
+            return
+        
+        done = self.state.get_pass_progress(ovpn_files) if self.state else []
+        remaining = [ovpn_file for ovpn_file in ovpn_files if ovpn_file not in done]
+        if not remaining:
+            remaining = list(ovpn_files)
+            if self.state:
+                self.state.start_new_pass()
+        elif done:
+            self.logger.info(f"Resuming rotation pass after {len(done)} of {len(ovpn_files)} servers")
+        
+        while remaining:
+            choice = self.pick(remaining)
+            remaining.remove(choice)
+            if self.state:
+                self.state.record_choice(choice)
+            yield choice
+            
+            if self.get_strategy() == "latency" and self.selection_config.get('skip_unreachable', True):
+                reachable = [f for f in remaining if self.latencies.get(f) is not None]
+                if reachable:
+                    remaining = reachable
+        
+        if self.state:
+            self.state.start_new_pass()
\ No newline at end of file
@@ -0,0 +1,355 @@
+import os
+import subprocess
+import threading
+import time
+from typing import Optional
+
+from jeepney import AuthenticationError, DBusAddress, DBusErrorResponse, MatchRule, new_method_call
+from jeepney.bus_messages import message_bus
+from jeepney.io.blocking import open_dbus_connection
+from jeepney.wrappers import unwrap_msg
+
+
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_PATH = "/org/freedesktop/systemd1"
+MANAGER_INTERFACE = "org.freedesktop.systemd1.Manager"
+UNIT_INTERFACE = "org.freedesktop.systemd1.Unit"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+
+MANAGER = DBusAddress(SYSTEMD_PATH, bus_name=SYSTEMD_BUS_NAME, interface=MANAGER_INTERFACE)
+
+JOB_REMOVED_RULE = MatchRule(
+    type="signal",
+    sender=SYSTEMD_BUS_NAME,
+    path=SYSTEMD_PATH,
+    interface=MANAGER_INTERFACE,
+    member="JobRemoved"
+)
+
+ACTION_METHODS = {"start": "StartUnit", "stop": "StopUnit", "restart": "RestartUnit"}
+ACTION_DONE = {"start": "started", "stop": "stopped", "restart": "restarted"}
+
+
+def get_unit_name(service_name: str) -> str:
+    """
+    Get the systemd unit name of a service.
+    
+    Args:
+        service_name: Service name, with or without a unit suffix
+    
+    Returns:
+        Unit name, e.g. "transmission.service"
+    """
+    return service_name if "." in service_name else f"{service_name}.service"
+
+
+class ServiceController:
+    """
+    Starts and stops system services.
+    
+    On systemd hosts the units are controlled through the systemd D-Bus
+    API, using jeepney: each action is a single method call, completion is
+    reported by the JobRemoved signal of its job, and the unit state is
+    read as properties instead of being guessed from command output.
+    Without a reachable systemd, the "service" command is used as before.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the service controller.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.logger = logger_manager
+        self.services_config = config_manager.get_services_config()
+        self.backend = self.services_config.get('control_backend', 'auto')
+        self.bus = None
+        self.lock = threading.RLock()
+    
+    def connect(self) -> bool:
+        """
+        Connect to systemd over the system bus and subscribe to job notifications.
+        
+        Returns:
+            True if systemd is reachable, False otherwise
+        """
+        if self.bus:
+            return True
+        
+        if self.backend == "command":
+            return False
+        if self.backend == "auto" and not os.path.isdir("/run/systemd/system"):
+            return False
+        
+        try:
+            bus = open_dbus_connection(bus="SYSTEM")
+        except (OSError, ConnectionError, ValueError, KeyError, AuthenticationError) as e:
+            self.logger.debug(f"systemd D-Bus API unavailable, using the service command: {e}")
+            return False
+        
+        self.bus = bus
+        try:
+            self.call(MANAGER, "Subscribe")
+            self.call(message_bus, "AddMatch", "s", (JOB_REMOVED_RULE.serialise(),))
+        except (OSError, ConnectionError, DBusErrorResponse) as e:
+            self.close()
+            self.logger.debug(f"systemd D-Bus API unavailable, using the service command: {e}")
+            return False
+        
+        self.logger.debug("Controlling services through the systemd D-Bus API")
+        return True
+    
+    def call(self, address: DBusAddress, method: str, signature: Optional[str] = None, body: tuple = ()) -> tuple:
+        """
+        Call a D-Bus method and wait for its reply.
+        
+        Args:
+            address: Object path, bus name and interface of the method
+            method: Method name
+            signature: D-Bus signature of the arguments
+            body: Method arguments
+        
+        Returns:
+            Reply arguments
+        
+        Raises:
+            DBusErrorResponse: If the call returned an error
+            ConnectionError: If the bus connection is lost
+            TimeoutError: If no reply arrived within control_timeout
+        """
+        message = new_method_call(address, method, signature, body)
+        reply = self.bus.send_and_get_reply(message, timeout=self.services_config.get('control_timeout', 30))
+        return unwrap_msg(reply)
+    
+    def close(self):
+        """
+        Close the system bus connection.
+        """
+        with self.lock:
+            if self.bus:
+                self.bus.close()
+                self.bus = None
+    
+    def get_state(self, service_name: str) -> Optional[dict]:
+        """
+        Get the state of a service.
+        
+        Args:
+            service_name: Name of the service
+        
+        Returns:
+            Dictionary with unit, load_state, active_state and sub_state,
+            or None if unavailable
+        """
+        with self.lock:
+            if self.connect():
+                try:
+                    return self.query_unit(get_unit_name(service_name))
+                except DBusErrorResponse as e:
+                    self.logger.debug(f"Failed to query service {service_name}: {e}")
+                    return None
+                except (OSError, ConnectionError) as e:
+                    self.logger.debug(f"Lost systemd D-Bus connection: {e}")
+                    self.close()
+            return self.show_unit(service_name)
+    
+    def control(self, service_name: str, action: str) -> bool:
+        """
+        Start, stop or restart a service and wait until the action completes.
+        
+        A stop on a stopped service and a start on a running one succeed
+        without doing anything.
+        
+        Args:
+            service_name: Name of the service
+            action: Action to perform (start, stop, restart)
+        
+        Returns:
+            True if the service ended up in the requested state, False otherwise
+        """
+        with self.lock:
+            if self.connect():
+                try:
+                    return self.control_unit(service_name, action)
+                except (OSError, ConnectionError) as e:
+                    self.logger.warning(f"Lost systemd D-Bus connection, using the service command: {e}")
+                    self.close()
+            return self.run_service_command(service_name, action)
+    
+    def query_unit(self, unit: str) -> dict:
+        """
+        Read the state properties of a unit over D-Bus, loading it if needed.
+        
+        Args:
+            unit: Unit name
+        
+        Returns:
+            Unit state dictionary, see get_state
+        
+        Raises:
+            DBusErrorResponse: If systemd rejects the request
+            ConnectionError: If the bus connection is lost
+        """
+        path = self.call(MANAGER, "LoadUnit", "s", (unit,))[0]
+        unit_address = DBusAddress(path, bus_name=SYSTEMD_BUS_NAME, interface=PROPERTIES_INTERFACE)
+        properties = self.call(unit_address, "GetAll", "s", (UNIT_INTERFACE,))[0]
+        return {
+            "unit": unit,
+            "load_state": properties.get("LoadState", ("s", ""))[1],
+            "active_state": properties.get("ActiveState", ("s", ""))[1],
+            "sub_state": properties.get("SubState", ("s", ""))[1],
+        }
+    
+    def control_unit(self, service_name: str, action: str) -> bool:
+        """
+        Run an action as a systemd job and wait for the job to finish.
+        
+        Args:
+            service_name: Name of the service
+            action: Action to perform (start, stop, restart)
+        
+        Returns:
+            True if the job completed, False otherwise
+        
+        Raises:
+            ConnectionError: If the bus connection is lost
+        """
+        unit = get_unit_name(service_name)
+        try:
+            state = self.query_unit(unit)
+            if state["load_state"] == "not-found":
+                self.logger.error(f"Failed to {action} service {service_name}: unit {unit} not found")
+                return False
+            if action == "stop" and state["active_state"] in ("inactive", "failed"):
+                self.logger.info(f"Service {service_name} was already stopped")
+                return True
+            if action == "start" and state["active_state"] == "active":
+                self.logger.info(f"Service {service_name} was already running")
+                return True
+            
+            # Listen before queueing the job, its JobRemoved signal may come right after the reply
+            with self.bus.filter(JOB_REMOVED_RULE, bufsize=64) as signals:
+                job = self.call(MANAGER, ACTION_METHODS[action], "ss", (unit, "replace"))[0]
+                result = self.wait_for_job(signals, job)
+        except DBusErrorResponse as e:
+            self.logger.error(f"Failed to {action} service {service_name}: {e.data[0] if e.data else e.name}")
+            return False
+        
+        if result is None:
+            self.logger.error(f"Timeout while trying to {action} service {service_name}")
+            return False
+        
+        if result == "done":
+            self.logger.success(f"Service {service_name} {ACTION_DONE[action]} successfully")
+            return True
+        
+        try:
+            state = self.query_unit(unit)
+            detail = f"{state['active_state']} ({state['sub_state']})"
+        except DBusErrorResponse:
+            detail = "unknown state"
+        self.logger.error(f"Failed to {action} service {service_name}: job {result}, unit {detail}")
+        return False
+    
+    def wait_for_job(self, signals, job: str) -> Optional[str]:
+        """
+        Wait for the JobRemoved signal of a job.
+        
+        Args:
+            signals: Queue of JobRemoved signals from a bus filter
+            job: Object path of the job
+        
+        Returns:
+            Job result, e.g. "done" or "failed", or None on timeout
+        
+        Raises:
+            ConnectionError: If the bus connection is lost
+        """
+        deadline = time.monotonic() + self.services_config.get('control_timeout', 30)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                signal = self.bus.recv_until_filtered(signals, timeout=remaining)
+            except TimeoutError:
+                return None
+            
+            # JobRemoved(id, job, unit, result)
+            if signal.body[1] == job:
+                return signal.body[3]
+    
+    def show_unit(self, service_name: str) -> Optional[dict]:
+        """
+        Read the state of a unit with systemctl show.
+        
+        Args:
+            service_name: Name of the service
+        
+        Returns:
+            Unit state dictionary, see get_state, or None if unavailable
+        """
+        unit = get_unit_name(service_name)
+        try:
+            result = subprocess.run(
+                ["systemctl", "show", "--property=LoadState,ActiveState,SubState", unit],
+                capture_output=True,
+                text=True,
+                timeout=self.services_config.get('control_timeout', 30)
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.logger.debug(f"Failed to query service {service_name}: {e}")
+            return None
+        
+        if result.returncode != 0:
+            return None
+        
+        properties = dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+        return {
+            "unit": unit,
+            "load_state": properties.get("LoadState", ""),
+            "active_state": properties.get("ActiveState", ""),
+            "sub_state": properties.get("SubState", ""),
+        }
+    
+    def run_service_command(self, service_name: str, action: str) -> bool:
+        """
+        Run an action with the service command.
+        
+        Args:
+            service_name: Name of the service
+            action: Action to perform (start, stop, restart)
+        
+        Returns:
+            True if the service ended up in the requested state, False otherwise
+        """
+        try:
+            result = subprocess.run(
+                ["service", service_name, action],
+                capture_output=True,
+                text=True,
+                timeout=self.services_config.get('control_timeout', 30)
+            )
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"Timeout while trying to {action} service {service_name}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Error managing service {service_name}: {e}")
+            return False
+        
+        if result.returncode == 0:
+            self.logger.success(f"Service {service_name} {ACTION_DONE[action]} successfully")
+            return True
+        
+        stderr_msg = result.stderr.strip()
+        if action == "stop" and ("not running" in stderr_msg.lower() or "inactive" in stderr_msg.lower()):
+            self.logger.info(f"Service {service_name} was already stopped")
+            return True
+        if action == "start" and ("already running" in stderr_msg.lower() or "active" in stderr_msg.lower()):
+            self.logger.info(f"Service {service_name} was already running")
+            return True
+        
+        self.logger.error(f"Failed to {action} service {service_name}: {stderr_msg}")
+        return False
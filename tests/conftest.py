@@ -0,0 +1,111 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from config_manager import ConfigManager
+from server_history import ServerHistory
+
+
+class RecordingLogger:
+    """
+    Logger stand-in keeping the messages in memory.
+    """
+    
+    def __init__(self):
+        """
+        Initialize an empty record.
+        """
+        self.messages = []
+    
+    def log(self, level: str, message: str, **fields):
+        """
+        Record a message.
+        
+        Args:
+            level: Level name
+            message: Message text
+            **fields: Structured fields, ignored
+        """
+        self.messages.append((level, message))
+    
+    def debug(self, message: str, **fields):
+        self.log("debug", message)
+    
+    def info(self, message: str, **fields):
+        self.log("info", message)
+    
+    def success(self, message: str, **fields):
+        self.log("success", message)
+    
+    def warning(self, message: str, **fields):
+        self.log("warning", message)
+    
+    def error(self, message: str, **fields):
+        self.log("error", message)
+
+
+def merge(base: dict, overrides: dict) -> dict:
+    """
+    Merge configuration overrides into a copy of a configuration, section by section.
+    
+    Args:
+        base: Configuration
+        overrides: Sections with the values to replace
+    
+    Returns:
+        Merged configuration
+    """
+    merged = dict(base)
+    for section, values in overrides.items():
+        merged[section] = {**base.get(section, {}), **values}
+    return merged
+
+
+@pytest.fixture
+def logger():
+    """
+    Logger recording the messages of the code under test.
+    """
+    return RecordingLogger()
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """
+    Build a ConfigManager from the shipped config.json, with its files in a scratch directory.
+    
+    Returns:
+        Callable taking the section overrides and returning a ConfigManager
+    """
+    def build(overrides: dict = None) -> ConfigManager:
+        with open(REPO_ROOT / "config.json", 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        scratch_paths = {
+            key: str(tmp_path / Path(value).name)
+            for key, value in data["paths"].items()
+            if key not in ("ovpn_directory", "temp_directory")
+        }
+        data = merge(data, {"paths": scratch_paths})
+        data = merge(data, overrides or {})
+        
+        config_path = tmp_path / "config.json"
+        with open(config_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        return ConfigManager(str(config_path))
+    
+    return build
+
+
+@pytest.fixture
+def history(make_config, logger):
+    """
+    Server history kept in an in-memory database.
+    """
+    history = ServerHistory(make_config({"paths": {"history_database": ":memory:"}}), logger)
+    yield history
+    history.close()
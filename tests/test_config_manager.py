@@ -0,0 +1,80 @@
+import json
+
+from loguru import logger as loguru_logger
+
+from config_schema import find_restart_changes
+from logger_manager import LEVELS, LoggerManager
+
+
+def rewrite(config, section: str, **values):
+    """
+    Change values of one section in the configuration file on disk.
+    """
+    with open(config.config_path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    data[section].update(values)
+    with open(config.config_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+
+
+def test_invalid_file_is_rejected_and_the_snapshot_kept(make_config):
+    config = make_config({"session": {"max_connection_failures": 3}})
+    snapshot = config.config_data
+    
+    rewrite(config, "session", max_connection_failures=0)
+    
+    assert not config.request_reload()
+    assert not config.apply_pending_changes()
+    assert config.config_data is snapshot
+    assert config.get_session_config()['max_connection_failures'] == 3
+
+
+def test_inconsistent_values_are_rejected_on_reload(make_config):
+    config = make_config({"rotation": {"policy": "fixed", "min_throughput": 0, "max_rtt": 0}})
+    
+    rewrite(config, "rotation", policy="degraded")
+    
+    assert not config.request_reload()
+    assert config.get_rotation_config()['policy'] == "fixed"
+
+
+def test_sections_see_new_values_only_once_applied(make_config):
+    config = make_config({"session": {"cooldown_seconds": 600}})
+    session = config.get_session_config()
+    
+    rewrite(config, "session", cooldown_seconds=900)
+    
+    assert config.request_reload()
+    assert session['cooldown_seconds'] == 600
+    assert config.apply_pending_changes()
+    assert session['cooldown_seconds'] == 900
+    assert config.version == 1
+
+
+def test_listeners_fire_once_per_applied_reload(make_config):
+    config = make_config({"logging": {"level": "INFO"}})
+    logger_manager = LoggerManager(config)
+    calls = []
+    config.add_reload_listener(lambda: calls.append(config.version))
+    
+    try:
+        rewrite(config, "logging", level="ERROR")
+        
+        assert config.request_reload()
+        assert not config.request_reload()
+        assert config.apply_pending_changes()
+        assert not config.apply_pending_changes()
+        
+        assert calls == [1]
+        assert logger_manager.level_no == LEVELS["error"]
+    finally:
+        logger_manager.writer.close()
+        loguru_logger.remove()
+
+
+def test_restart_only_changes_are_listed(make_config):
+    config = make_config()
+    old = config.config_data
+    new = {**old, "logging": {**old["logging"], "level": "DEBUG", "rotation": "1 MB"}}
+    
+    assert find_restart_changes(old, new) == ["logging.rotation"]
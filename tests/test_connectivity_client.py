@@ -0,0 +1,125 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from connectivity_client import (
+    NAMESPACE_HELPER_SCRIPT,
+    PATH_DEFAULT,
+    PATH_TUNNEL,
+    ConnectivityClient,
+    NamespaceClient,
+)
+
+
+class EchoPortHandler(BaseHTTPRequestHandler):
+    """
+    Keep-alive handler answering with the client port, so the tests can tell connections apart.
+    """
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        body = str(self.client_address[1]).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    """
+    URL of a local HTTP stand-in for the IP providers.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoPortHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/ip"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(make_config, logger):
+    client = ConnectivityClient(make_config(), logger)
+    yield client
+    client.reset()
+
+
+def test_session_is_reused_across_calls(client, url):
+    first = client.get(url, 2).text
+    second = client.get(url, 2).text
+    
+    assert first == second
+    assert client.get_session(PATH_DEFAULT) is client.get_session(PATH_DEFAULT)
+
+
+def test_paths_have_separate_sessions(client, url):
+    client.bind_tunnel("lo", "127.0.0.1")
+    
+    assert client.get(url, 2, PATH_TUNNEL).text != client.get(url, 2, PATH_DEFAULT).text
+    assert client.get_session(PATH_TUNNEL) is not client.get_session(PATH_DEFAULT)
+
+
+def test_tunnel_path_needs_a_binding(client, url):
+    with pytest.raises(ValueError):
+        client.get(url, 2, PATH_TUNNEL)
+
+
+def test_bind_and_unbind_tunnel_reset_the_pool(client, url):
+    port = client.get(url, 2).text
+    session = client.get_session(PATH_DEFAULT)
+    
+    client.bind_tunnel("lo", "127.0.0.1")
+    assert client.get_session(PATH_DEFAULT) is not session
+    rebound_port = client.get(url, 2).text
+    assert rebound_port != port
+    
+    session = client.get_session(PATH_DEFAULT)
+    client.unbind_tunnel()
+    assert client.get_session(PATH_DEFAULT) is not session
+    assert client.get(url, 2).text != rebound_port
+    assert not client.has_tunnel()
+
+
+@pytest.fixture
+def namespace_client(monkeypatch):
+    """
+    NamespaceClient whose helper runs in the current namespace.
+    """
+    client = NamespaceClient("test")
+    monkeypatch.setattr(client, "get_helper_command", lambda: [sys.executable, "-c", NAMESPACE_HELPER_SCRIPT])
+    yield client
+    client.reset()
+
+
+def test_namespace_client_keeps_one_helper(namespace_client, url):
+    first = namespace_client.get(url, 2)
+    helper = namespace_client.process
+    second = namespace_client.get(url, 2)
+    
+    assert first.status_code == 200
+    assert first.text == second.text
+    assert namespace_client.process is helper
+
+
+def test_namespace_client_reset_restarts_the_helper(namespace_client, url):
+    port = namespace_client.get(url, 2).text
+    helper = namespace_client.process
+    
+    namespace_client.reset()
+    
+    assert helper.poll() is not None
+    assert namespace_client.get(url, 2).text != port
+
+
+def test_namespace_client_reports_failures(namespace_client):
+    with pytest.raises(requests.ConnectionError):
+        namespace_client.get("http://127.0.0.1:1/ip", 1)
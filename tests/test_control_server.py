@@ -0,0 +1,37 @@
+import socket
+from types import SimpleNamespace
+
+from control_server import ControlServer
+
+
+class NoCredentialsSocket:
+    """
+    Accepted connection whose peer credentials cannot be read.
+    """
+    
+    def getsockopt(self, *args):
+        raise OSError("Protocol not available")
+
+
+def make_server(make_config, logger) -> ControlServer:
+    """
+    Build a control server that is not listening.
+    """
+    return ControlServer(make_config(), logger, SimpleNamespace(control=None))
+
+
+def test_peer_with_same_uid_is_allowed(make_config, logger):
+    server = make_server(make_config, logger)
+    client, peer = socket.socketpair()
+    try:
+        assert server.is_peer_allowed(peer)
+    finally:
+        client.close()
+        peer.close()
+
+
+def test_peer_without_credentials_is_denied(make_config, logger):
+    server = make_server(make_config, logger)
+    
+    assert not server.is_peer_allowed(NoCredentialsSocket())
+    assert logger.messages[-1][0] == "warning"
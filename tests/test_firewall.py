@@ -0,0 +1,54 @@
+from firewall import FirewallManager, LAN_NETWORKS
+
+
+ENDPOINTS = [("198.51.100.7", 1194, "udp"), ("203.0.113.9", 443, "tcp")]
+
+
+def make_firewall(make_config, logger, **firewall_overrides) -> FirewallManager:
+    """
+    Build a firewall manager that never runs nft.
+    """
+    config_manager = make_config({"firewall": firewall_overrides})
+    return FirewallManager(config_manager, logger, executor=lambda command, stdin=None: (0, ""))
+
+
+def test_render_ruleset_allows_only_endpoints(make_config, logger):
+    ruleset = make_firewall(make_config, logger, allow_lan=False, allow_dhcp=False).render_ruleset(ENDPOINTS)
+    lines = [line.strip() for line in ruleset.splitlines()]
+    
+    assert lines[:3] == ["table inet cyclevpn", "delete table inet cyclevpn", "table inet cyclevpn {"]
+    assert lines.count("type filter hook output priority 0; policy drop;") == 1
+    assert lines.count("type filter hook input priority 0; policy drop;") == 1
+    assert 'oifname "cvpn*" accept' in lines
+    assert "ip daddr 198.51.100.7 udp dport 1194 accept" in lines
+    assert "ip saddr 203.0.113.9 tcp sport 443 accept" in lines
+    assert not any("dport 53" in line or "dport 67" in line for line in lines)
+    assert not any(network in ruleset for network in LAN_NETWORKS)
+
+
+def test_render_ruleset_lan_and_dhcp(make_config, logger):
+    ruleset = make_firewall(make_config, logger, allow_lan=True, allow_dhcp=True).render_ruleset([])
+    
+    assert f"ip daddr {{ {', '.join(LAN_NETWORKS)} }} accept" in ruleset
+    assert "udp sport 68 udp dport 67 accept" in ruleset
+
+
+def test_render_ruleset_dns_limited_to_resolvers(make_config, logger, tmp_path):
+    resolv_conf = tmp_path / "resolv.conf"
+    resolv_conf.write_text("nameserver 127.0.0.53\nnameserver 9.9.9.9\nnameserver ::1\n")
+    firewall = make_firewall(make_config, logger, allow_dns=True)
+    firewall.resolv_conf = str(resolv_conf)
+    
+    ruleset = firewall.render_ruleset(ENDPOINTS)
+    
+    assert "ip daddr { 9.9.9.9 } udp dport 53 accept" in ruleset
+    assert "ip saddr { 9.9.9.9 } tcp sport 53 ct state established accept" in ruleset
+    assert "127.0.0.53" not in ruleset
+    assert [line for line in ruleset.splitlines() if "dport 53" in line] == [
+        "        ip daddr { 9.9.9.9 } udp dport 53 accept",
+        "        ip daddr { 9.9.9.9 } tcp dport 53 accept",
+    ]
+
+
+def test_render_ruleset_dns_disabled_by_default(make_config, logger):
+    assert "53" not in make_firewall(make_config, logger).render_ruleset([])
@@ -0,0 +1,134 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from management_interface import (
+    CONNECTION_AUTH_FAILED,
+    CONNECTION_ESTABLISHED,
+    CONNECTION_FAILED,
+    CONNECTION_TIMEOUT,
+    ManagementInterface,
+    parse_state_line,
+)
+
+
+CONNECTED_LINE = ">STATE:1700000000,CONNECTED,SUCCESS,10.8.0.6,198.51.100.7,1194,,\r\n"
+
+
+@pytest.fixture
+def management(logger):
+    """
+    ManagementInterface attached to one end of a socket pair; the test plays OpenVPN on the other.
+    """
+    client, server = socket.socketpair()
+    interface = ManagementInterface("unused", logger)
+    interface.connection = client
+    yield interface, server
+    interface.close()
+    server.close()
+
+
+def received(server: socket.socket) -> bytes:
+    """
+    Read what the client has sent so far.
+    """
+    server.settimeout(1)
+    return server.recv(4096)
+
+
+def test_parse_state_line():
+    state = parse_state_line(CONNECTED_LINE.strip())
+    assert state["state"] == "CONNECTED"
+    assert state["description"] == "SUCCESS"
+    assert state["local_ip"] == "10.8.0.6"
+    assert state["remote_port"] == "1194"
+    assert parse_state_line("garbage") is None
+
+
+def test_send_command_queues_notifications(management):
+    interface, server = management
+    server.sendall(b">STATE:1700000000,WAIT,,,,,,\r\nSUCCESS: real-time state notification set to ON\r\n")
+    
+    assert interface.send_command("state on") == ["SUCCESS: real-time state notification set to ON"]
+    assert received(server) == b"state on\n"
+    assert interface.notifications == [">STATE:1700000000,WAIT,,,,,,"]
+
+
+def test_send_command_multi_line_response(management):
+    interface, server = management
+    server.sendall(b"1700000000,CONNECTED,SUCCESS,10.8.0.6,198.51.100.7,1194,,\r\nEND\r\n")
+    
+    state = interface.get_state()
+    assert state["state"] == "CONNECTED"
+    assert interface.last_state is state
+
+
+def test_send_command_timeout(management):
+    interface, _ = management
+    with pytest.raises(ConnectionError):
+        interface.send_command("pid", timeout=0.1)
+
+
+def test_wait_for_connection_established(management):
+    interface, server = management
+    server.sendall(b">STATE:1700000000,AUTH,,,,,,\r\n" + CONNECTED_LINE.encode())
+    
+    assert interface.wait_for_connection(1) == CONNECTION_ESTABLISHED
+    assert interface.last_state["remote_ip"] == "198.51.100.7"
+
+
+def test_wait_for_connection_answers_credentials(management):
+    interface, server = management
+    interface.set_credentials("user", 'pa"ss')
+    server.sendall(
+        b">PASSWORD:Need 'Auth' username/password\r\n"
+        b"SUCCESS: 'Auth' username entered, but not yet verified\r\n"
+        b"SUCCESS: 'Auth' password entered, but not yet verified\r\n"
+        + CONNECTED_LINE.encode()
+    )
+    
+    assert interface.wait_for_connection(1) == CONNECTION_ESTABLISHED
+    assert received(server) == b'username "Auth" "user"\npassword "Auth" "pa\\"ss"\n'
+
+
+def test_wait_for_connection_auth_failed(management):
+    interface, server = management
+    server.sendall(b">PASSWORD:Verification Failed: 'Auth'\r\n")
+    
+    assert interface.wait_for_connection(1) == CONNECTION_AUTH_FAILED
+
+
+def test_wait_for_connection_reconnecting(management):
+    interface, server = management
+    server.sendall(b">STATE:1700000000,RECONNECTING,tls-error,,,,,\r\n")
+    
+    assert interface.wait_for_connection(1) == CONNECTION_FAILED
+
+
+def test_wait_for_connection_closed_socket(management):
+    interface, server = management
+    server.close()
+    
+    assert interface.wait_for_connection(1) == CONNECTION_FAILED
+
+
+def test_wait_for_connection_timeout(management):
+    interface, _ = management
+    assert interface.wait_for_connection(0.1) == CONNECTION_TIMEOUT
+
+
+def test_interrupt_wakes_blocked_reader(management):
+    interface, _ = management
+    results = []
+    reader = threading.Thread(target=lambda: results.append(interface.wait_for_connection(5)))
+    reader.start()
+    time.sleep(0.1)
+    
+    started_at = time.monotonic()
+    interface.interrupt()
+    reader.join(2)
+    
+    assert results == [CONNECTION_FAILED]
+    assert time.monotonic() - started_at < 1
@@ -0,0 +1,34 @@
+import pytest
+
+from public_ip_resolver import PublicIPResolver, parse_httpbin_ip, parse_plain_ip
+
+
+class FailingClient:
+    """
+    Connectivity client that must not be used.
+    """
+    
+    def get(self, url, timeout, path):
+        raise AssertionError(f"unexpected request to {url}")
+
+
+def test_providers_from_configuration(make_config, logger):
+    config_manager = make_config({"network": {"ip_check_providers": ["https://httpbin.org/ip", "https://ip.example"]}})
+    resolver = PublicIPResolver(config_manager, logger, FailingClient())
+    
+    assert resolver.providers == [("https://httpbin.org/ip", parse_httpbin_ip), ("https://ip.example", parse_plain_ip)]
+
+
+def test_empty_provider_list_is_rejected(make_config, logger):
+    with pytest.raises(ValueError):
+        PublicIPResolver(make_config(), logger, FailingClient(), providers=[])
+
+
+def test_quorum_above_provider_count_fails_without_requests(make_config, logger):
+    config_manager = make_config({"network": {"ip_check_quorum": 3}})
+    resolver = PublicIPResolver(
+        config_manager, logger, FailingClient(), providers=[("https://ip.example", parse_plain_ip)]
+    )
+    
+    assert resolver.resolve_once() is None
+    assert ("error", "ip_check_quorum 3 exceeds the 1 IP providers") in logger.messages
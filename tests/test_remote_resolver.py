@@ -0,0 +1,94 @@
+import socket
+import struct
+import time
+
+from remote_resolver import (
+    FLAG_RESPONSE,
+    FLAG_TRUNCATED,
+    RCODE_NAME_ERROR,
+    CacheEntry,
+    RemoteResolver,
+    build_query,
+    parse_response,
+)
+
+
+QUERY_ID = 0x1234
+
+
+def answer(record_type: int, ttl: int, data: bytes) -> bytes:
+    """
+    Encode an answer record whose name points back to the question.
+    """
+    return struct.pack("!HHHIH", 0xC00C, record_type, 1, ttl, len(data)) + data
+
+
+def response(answers, flags: int = FLAG_RESPONSE, query_id: int = QUERY_ID) -> bytes:
+    """
+    Build the response to the query of vpn.example.com.
+    """
+    query = build_query("vpn.example.com", query_id)
+    header = struct.pack("!HHHHHH", query_id, flags, 1, len(answers), 0, 0)
+    return header + query[12:] + b"".join(answers)
+
+
+def test_build_query():
+    query = build_query("vpn.example.com.", QUERY_ID)
+    assert query[:12] == struct.pack("!HHHHHH", QUERY_ID, 0x0100, 1, 0, 0, 0)
+    assert query[12:] == b"\x03vpn\x07example\x03com\x00\x00\x01\x00\x01"
+
+
+def test_parse_response_lowest_ttl():
+    data = response([
+        answer(5, 30, b"\x03cdn\xc0\x10"),
+        answer(1, 600, socket.inet_aton("198.51.100.7")),
+        answer(1, 120, socket.inet_aton("198.51.100.8")),
+    ])
+    assert parse_response(data, QUERY_ID) == (["198.51.100.7", "198.51.100.8"], 120)
+
+
+def test_parse_response_rejects_unusable():
+    data = response([answer(1, 60, socket.inet_aton("198.51.100.7"))])
+    assert parse_response(data, QUERY_ID + 1) is None
+    assert parse_response(data[:11], QUERY_ID) is None
+    assert parse_response(response([], flags=FLAG_RESPONSE | FLAG_TRUNCATED), QUERY_ID) is None
+    assert parse_response(response([], flags=0), QUERY_ID) is None
+
+
+def test_parse_response_name_error():
+    assert parse_response(response([], flags=FLAG_RESPONSE | RCODE_NAME_ERROR), QUERY_ID) == ([], 0)
+
+
+def test_cache_entry_expiry():
+    assert CacheEntry(["198.51.100.7"], time.time() + 60).is_fresh()
+    assert not CacheEntry(["198.51.100.7"], time.time() - 1).is_fresh()
+
+
+def test_prefetch_only_resolves_expired_hosts(make_config, logger):
+    resolver = RemoteResolver(make_config({"dns": {"min_ttl": 30, "max_ttl": 3600}}), logger)
+    resolver.entries["fresh.example.com"] = CacheEntry(["198.51.100.1"], time.time() + 60)
+    resolver.entries["expired.example.com"] = CacheEntry(["198.51.100.2"], time.time() - 1)
+    looked_up = []
+    
+    def lookup(host):
+        looked_up.append(host)
+        return ["198.51.100.3"], 5
+    
+    resolver.lookup = lookup
+    resolver.prefetch(["fresh.example.com", "expired.example.com", "new.example.com"])
+    
+    assert sorted(looked_up) == ["expired.example.com", "new.example.com"]
+    assert resolver.get_addresses("expired.example.com") == ["198.51.100.3"]
+    # TTLs below min_ttl are raised to it
+    assert resolver.entries["new.example.com"].expires_at >= time.time() + 29
+    assert resolver.cache_path.exists()
+
+
+def test_refresh_failure_keeps_last_addresses(make_config, logger):
+    resolver = RemoteResolver(make_config(), logger)
+    resolver.entries["vpn.example.com"] = CacheEntry(["198.51.100.7"], time.time() - 1)
+    resolver.lookup = lambda host: None
+    
+    assert not resolver.refresh("vpn.example.com")
+    assert resolver.get_addresses("vpn.example.com") == ["198.51.100.7"]
+    assert not resolver.entries["vpn.example.com"].is_fresh()
@@ -0,0 +1,25 @@
+from rotation_benchmark import find_regressions
+
+
+def test_find_regressions():
+    baseline = {
+        "launch": {"median": 0.100},
+        "readiness": {"median": 1.000},
+        "teardown": {"median": 0.001},
+    }
+    summary = {
+        "launch": {"median": 0.200},
+        "readiness": {"median": 1.100},
+        "teardown": {"median": 0.004},
+        "verification": {"median": 5.000},
+    }
+    
+    regressions = find_regressions(summary, baseline, tolerance=0.25, min_delta=0.005)
+    
+    # readiness is within the tolerance, teardown within min_delta, verification has no baseline
+    assert regressions == ["launch: median 200.00 ms, baseline 100.00 ms"]
+
+
+def test_find_regressions_none_when_faster():
+    baseline = {"launch": {"median": 0.100}}
+    assert find_regressions({"launch": {"median": 0.050}}, baseline, 0.0, 0.0) == []
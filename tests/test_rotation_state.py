@@ -0,0 +1,82 @@
+import json
+import os
+import stat
+import time
+
+from rotation_state import RotationState
+from server_selector import ServerSelector
+
+OVPN_FILES = ["a.ovpn", "b.ovpn", "c.ovpn"]
+
+
+def age_state_file(state: RotationState, **fields_age):
+    """
+    Move timestamps of the state file on disk into the past.
+    
+    Args:
+        state: RotationState whose file is rewritten
+        **fields_age: Timestamp field names and the number of seconds to go back
+    """
+    with open(state.state_path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    for field, age in fields_age.items():
+        data[field] = time.time() - age
+    with open(state.state_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+
+
+def test_state_file_is_only_readable_by_its_owner(make_config, logger):
+    state = RotationState(make_config(), logger)
+    
+    state.set_initial_ip("203.0.113.5")
+    
+    assert stat.S_IMODE(os.stat(state.state_path).st_mode) == 0o600
+
+
+def test_resume_server_is_yielded_once(make_config, logger):
+    config = make_config({"selection": {"strategy": "random"}})
+    state = RotationState(config, logger)
+    state.record_choice("a.ovpn")
+    state.record_result("a.ovpn", True)
+    
+    selector = ServerSelector(config, logger, catalog=None, state=RotationState(config, logger))
+    first_pass = list(selector.iterate_pass(OVPN_FILES))
+    second_pass = list(selector.iterate_pass(OVPN_FILES))
+    
+    assert first_pass[0] == "a.ovpn"
+    assert sorted(first_pass) == OVPN_FILES
+    assert sorted(second_pass) == OVPN_FILES
+
+
+def test_failed_resume_server_is_not_resumed(make_config, logger):
+    config = make_config()
+    state = RotationState(config, logger)
+    state.record_result("a.ovpn", True)
+    state.record_result("a.ovpn", False)
+    
+    assert RotationState(config, logger).take_resume_server(OVPN_FILES) is None
+
+
+def test_old_rotation_progress_is_discarded(make_config, logger):
+    config = make_config({"warm_start": {"resume_max_age": 600}})
+    state = RotationState(config, logger)
+    state.record_choice("a.ovpn")
+    state.record_result("a.ovpn", True)
+    age_state_file(state, saved_at=1200)
+    
+    restarted = RotationState(config, logger)
+    
+    assert restarted.take_resume_server(OVPN_FILES) is None
+    assert restarted.get_pass_progress(OVPN_FILES) == []
+
+
+def test_old_initial_ip_is_looked_up_again(make_config, logger):
+    config = make_config({"warm_start": {"initial_ip_max_age": 600}})
+    state = RotationState(config, logger)
+    state.set_initial_ip("203.0.113.5")
+    
+    assert RotationState(config, logger).get_initial_ip() == "203.0.113.5"
+    
+    age_state_file(state, initial_ip_at=1200)
+    
+    assert RotationState(config, logger).get_initial_ip() is None
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+from rotation_supervisor import RotationSupervisor
+
+
+class SingleServerManager:
+    """
+    VPNManager stand-in already connected to the only server of the pool.
+    """
+    
+    def __init__(self):
+        """
+        Initialize the manager with one server and its tunnel up.
+        """
+        self.kill_switch = SimpleNamespace(engage_firewall=lambda: None)
+        self.control = SimpleNamespace(pinned=None)
+        self.server_selector = SimpleNamespace(iterate_pass=self.iterate_pass)
+        self.current_ovpn_file = "only.ovpn"
+        self.tunnel = object()
+        self.warmed_up = True
+        self.passes = 0
+    
+    def iterate_pass(self, ovpn_files):
+        self.passes += 1
+        return iter(ovpn_files)
+    
+    def discover_ovpn_files(self):
+        return ["only.ovpn"]
+    
+    def bind_underlay_checks(self):
+        pass
+
+
+def test_make_before_break_keeps_the_only_server_between_passes(make_config, logger):
+    config = make_config({"session": {"rotation_mode": "make-before-break"}})
+    manager = SingleServerManager()
+    supervisor = RotationSupervisor(config, logger, manager)
+    kept = []
+    
+    async def keep_session():
+        kept.append(manager.current_ovpn_file)
+        if len(kept) == 3:
+            raise asyncio.CancelledError()
+        return True
+    
+    async def run_switch(ovpn_file, username, password):
+        raise AssertionError("the current server must not be switched to")
+    
+    supervisor.keep_session = keep_session
+    supervisor.run_switch = run_switch
+    try:
+        asyncio.run(supervisor.rotate("user", "password"))
+    except asyncio.CancelledError:
+        pass
+    finally:
+        supervisor.vpn_lane.shutdown(wait=False)
+        supervisor.service_lane.shutdown(wait=False)
+    
+    assert kept == ["only.ovpn"] * 3
+    assert manager.passes == 3
+
+
+def test_emergency_shutdown_during_a_session_ends_the_rotation(make_config, logger):
+    config = make_config({"session": {"rotation_mode": "make-before-break"}})
+    manager = SingleServerManager()
+    manager.current_ovpn_file = None
+    supervisor = RotationSupervisor(config, logger, manager)
+    
+    async def run_switch(ovpn_file, username, password):
+        raise SystemExit(1)
+    
+    supervisor.run_switch = run_switch
+    try:
+        asyncio.run(supervisor.rotate("user", "password"))
+    finally:
+        supervisor.vpn_lane.shutdown(wait=False)
+        supervisor.service_lane.shutdown(wait=False)
+    
+    assert supervisor.exit_code == 1
+    assert manager.passes == 1
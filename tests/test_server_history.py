@@ -0,0 +1,24 @@
+import pytest
+
+
+def test_rewards_weigh_success_throughput_and_drops(history):
+    fast = history.record_attempt("fast.ovpn", 1.0, True)
+    history.record_session_end(fast, 100, 1_000_000, 0)
+    slow = history.record_attempt("slow.ovpn", 1.0, True)
+    history.record_session_end(slow, 100, 500_000, 0, dropped=True)
+    history.record_attempt("slow.ovpn", None, False)
+    
+    rewards = history.get_rewards()
+    
+    assert rewards["fast.ovpn"] == pytest.approx((1.0, 1))
+    # Half the attempts verified, half the best throughput, every session dropped
+    assert rewards["slow.ovpn"] == pytest.approx((0.5 * (0.6 * 0.5 + 0.4 * 0.0), 2))
+
+
+def test_rewards_without_traffic_only_count_successes(history):
+    history.record_attempt("a.ovpn", 1.0, True)
+    history.record_attempt("b.ovpn", None, False)
+    
+    rewards = history.get_rewards()
+    
+    assert rewards == {"a.ovpn": (1.0, 1), "b.ovpn": (0.0, 1)}
@@ -0,0 +1,98 @@
+import random
+import time
+from collections import Counter
+
+import pytest
+
+from server_history import ServerHistory
+from server_selector import ServerSelector
+
+
+def record(history: ServerHistory, server: str, verified: bool, duration: float = 0.0, total_bytes: int = 0):
+    """
+    Record one finished session.
+    """
+    session_id = history.record_attempt(server, 1.0 if verified else None, verified)
+    if verified:
+        history.record_session_end(session_id, duration, total_bytes, 0)
+
+
+@pytest.fixture
+def make_selector(make_config, logger):
+    """
+    Build a selector whose latencies are already known, so nothing is probed.
+    
+    Returns:
+        Callable taking the latencies, an optional ServerHistory and the selection overrides
+    """
+    def build(latencies: dict, history=None, **selection) -> ServerSelector:
+        selector = ServerSelector(make_config({"selection": selection}), logger, catalog=None, history=history)
+        selector.latencies = dict(latencies)
+        selector.probed_at = time.monotonic()
+        return selector
+    
+    return build
+
+
+def test_latency_weighting_favours_nearby_servers(make_selector):
+    selector = make_selector({"near.ovpn": 0.01, "far.ovpn": 0.1}, latency_exponent=2.0)
+    random.seed(7)
+    
+    picks = Counter(selector.pick_by_latency(["near.ovpn", "far.ovpn"]) for _ in range(1000))
+    
+    assert picks["near.ovpn"] > 950
+
+
+def test_zero_exponent_draws_uniformly(make_selector):
+    selector = make_selector({"near.ovpn": 0.01, "far.ovpn": 0.1}, latency_exponent=0.0)
+    random.seed(7)
+    
+    picks = Counter(selector.pick_by_latency(["near.ovpn", "far.ovpn"]) for _ in range(1000))
+    
+    assert 400 < picks["near.ovpn"] < 600
+
+
+def test_unreachable_servers_are_left_out_of_the_pass(make_selector):
+    selector = make_selector({"a.ovpn": 0.02, "b.ovpn": None, "c.ovpn": 0.05}, skip_unreachable=True)
+    random.seed(7)
+    
+    assert sorted(selector.choose_pass(["a.ovpn", "b.ovpn", "c.ovpn"])) == ["a.ovpn", "c.ovpn"]
+
+
+def test_pass_falls_back_to_every_server_when_none_is_reachable(make_selector, logger):
+    ovpn_files = ["a.ovpn", "b.ovpn", "c.ovpn"]
+    selector = make_selector(dict.fromkeys(ovpn_files), skip_unreachable=True)
+    random.seed(7)
+    
+    assert sorted(selector.choose_pass(ovpn_files)) == ovpn_files
+    assert ("warning", "No server answered the latency probe, choosing at random") in logger.messages
+
+
+def test_ucb_tries_untried_servers_first(make_selector, history):
+    record(history, "known.ovpn", True, 600, 600_000)
+    selector = make_selector({"known.ovpn": 0.01, "new.ovpn": 0.2}, history=history, strategy="ucb")
+    
+    assert selector.pick(["known.ovpn", "new.ovpn"]) == "new.ovpn"
+
+
+def test_ucb_prefers_the_higher_reward_at_equal_trials(make_selector, history):
+    for _ in range(5):
+        record(history, "fast.ovpn", True, 600, 6_000_000)
+        record(history, "flaky.ovpn", False)
+    selector = make_selector({"fast.ovpn": 0.05, "flaky.ovpn": 0.01}, history=history, strategy="ucb")
+    
+    assert selector.pick(["fast.ovpn", "flaky.ovpn"]) == "fast.ovpn"
+
+
+def test_bandit_pass_never_repeats_a_server_back_to_back(make_selector, history):
+    record(history, "best.ovpn", True, 600, 6_000_000)
+    record(history, "good.ovpn", True, 600, 3_000_000)
+    record(history, "poor.ovpn", False)
+    ovpn_files = ["best.ovpn", "good.ovpn", "poor.ovpn"]
+    selector = make_selector(dict.fromkeys(ovpn_files, 0.01), history=history, strategy="thompson")
+    random.seed(7)
+    
+    for _ in range(20):
+        chosen = list(selector.choose_pass(ovpn_files))
+        assert len(chosen) == len(ovpn_files)
+        assert all(first != second for first, second in zip(chosen, chosen[1:]))
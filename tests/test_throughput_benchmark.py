@@ -0,0 +1,12 @@
+import pytest
+
+from throughput_benchmark import compute_jitter
+
+
+def test_compute_jitter():
+    assert compute_jitter([0.010, 0.030, 0.020, 0.020]) == pytest.approx(0.010)
+
+
+def test_compute_jitter_needs_two_samples():
+    assert compute_jitter([]) == 0.0
+    assert compute_jitter([0.5]) == 0.0
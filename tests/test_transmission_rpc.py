@@ -0,0 +1,59 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from rotation_benchmark import MockTransmissionHandler
+from transmission_rpc import TransmissionRPC, TransmissionRPCError
+
+
+@pytest.fixture
+def rpc(make_config, logger):
+    """
+    TransmissionRPC client talking to the benchmark's mock RPC server.
+    """
+    MockTransmissionHandler.reset(torrent_count=3)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockTransmissionHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    url = f"http://127.0.0.1:{server.server_address[1]}/transmission/rpc"
+    yield TransmissionRPC(make_config({"transmission": {"rpc_url": url, "timeout": 2}}), logger)
+    
+    server.shutdown()
+    server.server_close()
+    MockTransmissionHandler.session_id = "cyclevpn-benchmark"
+
+
+def test_call_retries_with_session_id(rpc):
+    assert rpc.session_id is None
+    
+    stats = rpc.get_session_stats()
+    
+    assert stats["torrentCount"] == 3
+    assert rpc.session_id == MockTransmissionHandler.session_id
+
+
+def test_call_renews_expired_session_id(rpc):
+    rpc.get_session_stats()
+    MockTransmissionHandler.session_id = "renewed"
+    
+    assert rpc.get_session_stats()["activeTorrentCount"] == 3
+    assert rpc.session_id == "renewed"
+
+
+def test_call_gives_up_after_one_retry(rpc, monkeypatch):
+    renewals = iter(range(100))
+    monkeypatch.setattr(
+        MockTransmissionHandler, "session_id", property(lambda handler: f"id-{next(renewals)}")
+    )
+    
+    with pytest.raises(TransmissionRPCError):
+        rpc.get_session_stats()
+
+
+def test_pause_unbinds_and_stops_torrents(rpc):
+    assert rpc.pause()
+    assert MockTransmissionHandler.settings["bind-address-ipv4"] == "127.0.0.1"
+    assert rpc.get_session_stats()["activeTorrentCount"] == 0
+    assert rpc.paused_ids == [1, 2, 3]
@@ -0,0 +1,71 @@
+import stat
+from pathlib import Path
+
+from vpn_tunnel import VPNTunnel, pin_remote
+
+
+PROFILE = """client
+dev tun
+proto udp
+remote us-newyork.privacy.network 1198
+remote-random
+resolv-retry infinite
+<connection>
+remote us-backup.privacy.network 1198
+</connection>
+<ca>
+-----BEGIN CERTIFICATE-----
+remote-looking line inside a certificate is kept as data
+-----END CERTIFICATE-----
+</ca>
+"""
+
+
+def remote_lines(text: str) -> list:
+    """
+    Get the directives that add a server to OpenVPN's connection list.
+    """
+    return [line.strip() for line in text.splitlines() if line.split()[:1] == ["remote"]]
+
+
+def make_tunnel(make_config, logger, tmp_path, remote=None) -> VPNTunnel:
+    """
+    Build a tunnel on a sample profile, with its files in the scratch directory.
+    """
+    profile_path = tmp_path / "us_new_york.ovpn"
+    profile_path.write_text(PROFILE)
+    config_manager = make_config({"paths": {"temp_directory": str(tmp_path)}})
+    return VPNTunnel(config_manager, logger, profile_path, "cvpn0", remote=remote)
+
+
+def test_pin_remote_keeps_a_single_remote():
+    pinned = pin_remote(PROFILE, "198.51.100.7", 1198)
+    
+    assert remote_lines(pinned) == ["remote 198.51.100.7 1198"]
+    assert "resolv-retry" not in pinned
+    assert "<connection>" not in pinned
+    assert "remote-looking line inside a certificate is kept as data" in pinned
+    assert "proto udp" in pinned
+
+
+def test_command_uses_the_resolved_address_only(make_config, logger, tmp_path):
+    tunnel = make_tunnel(make_config, logger, tmp_path, remote=("198.51.100.7", 1198))
+    
+    command = tunnel.build_command(None)
+    
+    assert "--remote" not in command
+    config_path = Path(command[command.index("--config") + 1])
+    assert config_path != tunnel.ovpn_file_path
+    assert remote_lines(config_path.read_text()) == ["remote 198.51.100.7 1198"]
+    assert stat.S_IMODE(config_path.stat().st_mode) == 0o600
+    
+    tunnel.stop()
+    assert not config_path.exists()
+
+
+def test_command_without_pinned_remote_uses_the_profile(make_config, logger, tmp_path):
+    tunnel = make_tunnel(make_config, logger, tmp_path)
+    
+    command = tunnel.build_command(None)
+    
+    assert command[command.index("--config") + 1] == str(tunnel.ovpn_file_path)
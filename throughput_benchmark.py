@@ -0,0 +1,337 @@
+import csv
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from connectivity_client import PATH_DEFAULT
+
+
+RESULT_FIELDS = [
+    "server", "connected", "connect_time", "rtt", "jitter",
+    "download_bps", "upload_bps", "measured_at",
+]
+
+CHUNK_SIZE = 64 * 1024
+
+
+def compute_jitter(samples: List[float]) -> float:
+    """
+    Compute the jitter of a series of round-trip times.
+    
+    Jitter is the mean absolute difference between consecutive samples,
+    as in RFC 3550.
+    
+    Args:
+        samples: Round-trip times in seconds
+    
+    Returns:
+        Jitter in seconds, 0 with fewer than two samples
+    """
+    if len(samples) < 2:
+        return 0.0
+    return statistics.mean(abs(current - previous) for previous, current in zip(samples, samples[1:]))
+
+
+class SinkRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of the local benchmark sink.
+    
+    It serves the same paths as the default speed test endpoints:
+    GET /__down?bytes=N returns N bytes and POST /__up discards the body.
+    """
+    
+    protocol_version = "HTTP/1.1"
+    payload = b"\0" * CHUNK_SIZE
+    
+    def do_GET(self):
+        """
+        Stream the requested number of bytes.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        remaining = int(query.get("bytes", ["0"])[0])
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(remaining))
+        self.end_headers()
+        
+        while remaining > 0:
+            chunk = self.payload[:min(remaining, CHUNK_SIZE)]
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+    
+    def do_POST(self):
+        """
+        Read and discard the request body.
+        """
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, CHUNK_SIZE))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        """
+        Keep the sink quiet.
+        """
+
+
+class LocalSink:
+    """
+    Loopback HTTP server standing in for the speed test endpoints.
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the sink.
+        
+        Args:
+            host: Address to listen on
+            port: Port to listen on, 0 for any free port
+        """
+        self.server = ThreadingHTTPServer((host, port), SinkRequestHandler)
+        self.server.daemon_threads = True
+        self.thread = None
+    
+    def get_base_url(self) -> str:
+        """
+        Get the base URL of the sink.
+        
+        Returns:
+            URL such as "http://127.0.0.1:41234"
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "LocalSink":
+        """
+        Serve requests in a background thread.
+        
+        Returns:
+            The sink itself
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, name="benchmark-sink", daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """
+        Stop serving and close the listening socket.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class BenchmarkRunner:
+    """
+    Measures what a VPN exit delivers: connect time, RTT, jitter and throughput.
+    
+    Measurements go through the ConnectivityClient, so they use the same
+    pooled, interface-bound sessions as the connectivity checks. Connecting
+    and disconnecting are passed in as callables, which lets the runner
+    work against real tunnels or against a local stand-in. With real
+    tunnels, VPNManager records the connect time and the measured traffic
+    in the server history, which is what the server selector learns from.
+    """
+    
+    def __init__(self, config_manager, logger_manager, connectivity):
+        """
+        Initialize the benchmark runner.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            connectivity: Instance of ConnectivityClient
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.connectivity = connectivity
+        self.benchmark_config = dict(config_manager.get_benchmark_config())
+    
+    def use_base_url(self, base_url: str):
+        """
+        Point every measurement at a sink serving /__down and /__up.
+        
+        Args:
+            base_url: Base URL of the sink
+        """
+        self.benchmark_config['download_url'] = f"{base_url}/__down"
+        self.benchmark_config['upload_url'] = f"{base_url}/__up"
+    
+    def measure_rtt(self, path: str) -> tuple:
+        """
+        Measure the HTTP round-trip time over a kept-alive connection.
+        
+        The first request opens the connection and is not counted.
+        
+        Args:
+            path: Network path to measure
+        
+        Returns:
+            Tuple of (median RTT, jitter) in seconds, or (None, None) on failure
+        """
+        url = f"{self.benchmark_config.get('download_url')}?bytes=0"
+        timeout = self.benchmark_config.get('timeout', 30)
+        samples = []
+        
+        for attempt in range(self.benchmark_config.get('rtt_samples', 10) + 1):
+            started_at = time.perf_counter()
+            try:
+                self.connectivity.get(url, timeout, path).raise_for_status()
+            except Exception as e:
+                self.logger.debug(f"RTT sample failed: {e}")
+                continue
+            if attempt > 0:
+                samples.append(time.perf_counter() - started_at)
+        
+        if not samples:
+            return None, None
+        return statistics.median(samples), compute_jitter(samples)
+    
+    def measure_download(self, path: str) -> Optional[float]:
+        """
+        Measure the download throughput.
+        
+        Args:
+            path: Network path to measure
+        
+        Returns:
+            Throughput in bytes per second, or None on failure
+        """
+        size = self.benchmark_config.get('download_bytes', 25_000_000)
+        url = f"{self.benchmark_config.get('download_url')}?bytes={size}"
+        received = 0
+        
+        started_at = time.perf_counter()
+        try:
+            session = self.connectivity.get_session(path)
+            with session.get(url, timeout=self.benchmark_config.get('timeout', 30), stream=True) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    received += len(chunk)
+        except Exception as e:
+            self.logger.error(f"Download measurement failed: {e}")
+            return None
+        
+        return received / max(time.perf_counter() - started_at, 1e-6)
+    
+    def measure_upload(self, path: str) -> Optional[float]:
+        """
+        Measure the upload throughput.
+        
+        Args:
+            path: Network path to measure
+        
+        Returns:
+            Throughput in bytes per second, or None on failure
+        """
+        size = self.benchmark_config.get('upload_bytes', 10_000_000)
+        payload = b"\0" * size
+        
+        started_at = time.perf_counter()
+        try:
+            session = self.connectivity.get_session(path)
+            session.post(
+                self.benchmark_config.get('upload_url'),
+                data=payload,
+                timeout=self.benchmark_config.get('timeout', 30)
+            ).raise_for_status()
+        except Exception as e:
+            self.logger.error(f"Upload measurement failed: {e}")
+            return None
+        
+        return size / max(time.perf_counter() - started_at, 1e-6)
+    
+    def run_profile(self, server: str, connect: Callable[[], Optional[float]],
+                    disconnect: Callable[[], None], path: str = PATH_DEFAULT) -> Dict:
+        """
+        Connect to one server, measure it and disconnect.
+        
+        Args:
+            server: OpenVPN configuration file name
+            connect: Callable bringing the exit up, returning the connect time or None on failure
+            disconnect: Callable tearing the exit down
+            path: Network path the measurements use
+        
+        Returns:
+            Result dictionary with the RESULT_FIELDS keys
+        """
+        result = dict.fromkeys(RESULT_FIELDS)
+        result.update(server=server, connected=False, measured_at=time.time())
+        
+        self.logger.info(f"Benchmarking {server}...")
+        connect_time = connect()
+        if connect_time is None:
+            self.logger.error(f"Benchmark of {server} skipped, connection failed")
+            return result
+        
+        try:
+            rtt, jitter = self.measure_rtt(path)
+            result.update(
+                connected=True,
+                connect_time=connect_time,
+                rtt=rtt,
+                jitter=jitter,
+                download_bps=self.measure_download(path),
+                upload_bps=self.measure_upload(path)
+            )
+        finally:
+            disconnect()
+        
+        self.logger.success(
+            f"{server}: connect {connect_time:.1f} s, RTT {(rtt or 0) * 1000:.0f} ms, "
+            f"down {(result['download_bps'] or 0) * 8 / 1e6:.1f} Mbit/s, "
+            f"up {(result['upload_bps'] or 0) * 8 / 1e6:.1f} Mbit/s"
+        )
+        return result
+    
+    def run(self, servers: List[str], connect: Callable[[str], Optional[float]],
+            disconnect: Callable[[], None], path: str = PATH_DEFAULT) -> List[Dict]:
+        """
+        Benchmark several servers one after the other.
+        
+        Args:
+            servers: OpenVPN configuration file names
+            connect: Callable taking a server name, returning the connect time or None on failure
+            disconnect: Callable tearing the exit down
+            path: Network path the measurements use
+        
+        Returns:
+            List of result dictionaries
+        """
+        return [self.run_profile(server, lambda: connect(server), disconnect, path) for server in servers]
+    
+    def save_json(self, results: List[Dict], output_path: str):
+        """
+        Write the results as a JSON array.
+        
+        Args:
+            results: Result dictionaries
+            output_path: Destination file
+        """
+        with open(output_path, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        self.logger.info(f"Benchmark results written to {output_path}")
+    
+    def save_csv(self, results: List[Dict], output_path: str):
+        """
+        Write the results as CSV.
+        
+        Args:
+            results: Result dictionaries
+            output_path: Destination file
+        """
+        with open(output_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+        self.logger.info(f"Benchmark results written to {output_path}")
\ No newline at end of file
@@ -0,0 +1,310 @@
+import threading
+from typing import List, Optional
+
+import requests
+
+
+SESSION_ID_HEADER = "X-Transmission-Session-Id"
+
+STATUS_STOPPED = 0
+
+# Sockets bound to loopback cannot reach the underlay while the torrents are held back
+PAUSED_BIND_ADDRESS = "127.0.0.1"
+
+
+class TransmissionRPCError(Exception):
+    """
+    Error raised when a Transmission RPC call fails.
+    """
+
+
+class TransmissionRPC:
+    """
+    Client for the Transmission RPC interface.
+    
+    Instead of stopping the daemon around each rotation, the torrents
+    are paused (or alt-speed limits are set to zero) while no tunnel is
+    up, and resumed once the next one is verified. While paused the daemon
+    is bound to the loopback address, and before resuming it is rebound to
+    the new tunnel address and peer port. Each change is confirmed from
+    session-stats. The daemon keeps its sockets open between tunnels, so
+    this mode is only used while the nftables firewall blocks the underlay.
+    """
+    
+    def __init__(self, config_manager, logger_manager):
+        """
+        Initialize the RPC client.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+        """
+        self.logger = logger_manager
+        self.transmission_config = config_manager.get_transmission_config()
+        self.url = self.transmission_config.get('rpc_url', "http://127.0.0.1:9091/transmission/rpc")
+        self.session = requests.Session()
+        self.session.trust_env = False
+        username = self.transmission_config.get('rpc_username')
+        if username:
+            self.session.auth = (username, self.transmission_config.get('rpc_password', ''))
+        self.session_id = None
+        self.paused_ids = None
+        self.saved_speed_settings = None
+        self.saved_bind_address = None
+        self.bind_address_supported = True
+        self.lock = threading.Lock()
+    
+    def is_enabled(self) -> bool:
+        """
+        Check whether Transmission is controlled over RPC.
+        
+        Returns:
+            True if the control mode is "rpc", False otherwise
+        """
+        return self.transmission_config.get('control', 'service') == "rpc"
+    
+    def call(self, method: str, arguments: Optional[dict] = None) -> dict:
+        """
+        Call an RPC method, renewing the CSRF session id when the daemon asks for it.
+        
+        Args:
+            method: RPC method name
+            arguments: Method arguments
+        
+        Returns:
+            The "arguments" object of the response
+        
+        Raises:
+            TransmissionRPCError: If the daemon is unreachable or the call fails
+        """
+        payload = {"method": method, "arguments": arguments or {}}
+        timeout = self.transmission_config.get('timeout', 10)
+        
+        try:
+            for _ in range(2):
+                headers = {SESSION_ID_HEADER: self.session_id} if self.session_id else {}
+                response = self.session.post(self.url, json=payload, headers=headers, timeout=timeout)
+                if response.status_code == 409 and SESSION_ID_HEADER in response.headers:
+                    self.session_id = response.headers[SESSION_ID_HEADER]
+                    continue
+                break
+            response.raise_for_status()
+            body = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise TransmissionRPCError(f"{method} failed: {e}") from e
+        
+        if body.get("result") != "success":
+            raise TransmissionRPCError(f"{method} failed: {body.get('result')}")
+        return body.get("arguments", {})
+    
+    def get_session_stats(self) -> dict:
+        """
+        Get the daemon's session statistics.
+        
+        Returns:
+            session-stats arguments (activeTorrentCount, pausedTorrentCount, speeds...)
+        
+        Raises:
+            TransmissionRPCError: If the call fails
+        """
+        return self.call("session-stats")
+    
+    def pause(self) -> bool:
+        """
+        Stop all traffic without stopping the daemon.
+        
+        Returns:
+            True if session-stats confirms the pause, False otherwise
+        """
+        with self.lock:
+            try:
+                self.unbind()
+                if self.transmission_config.get('pause_mode', 'stop') == "alt-speed":
+                    return self.pause_with_alt_speed()
+                return self.pause_torrents()
+            except TransmissionRPCError as e:
+                self.logger.error(f"Failed to pause Transmission: {e}")
+                return False
+    
+    def pause_torrents(self) -> bool:
+        """
+        Stop the running torrents and remember them for resume.
+        
+        Returns:
+            True if no torrent is left running, False otherwise
+        """
+        torrents = self.call("torrent-get", {"fields": ["id", "status"]}).get("torrents", [])
+        running = [torrent["id"] for torrent in torrents if torrent["status"] != STATUS_STOPPED]
+        if running:
+            self.call("torrent-stop", {"ids": running})
+        if self.paused_ids is None:
+            self.paused_ids = running
+        else:
+            self.paused_ids = sorted(set(self.paused_ids) | set(running))
+        
+        stats = self.get_session_stats()
+        if stats.get("activeTorrentCount", 0) != 0:
+            self.logger.error(f"Transmission still reports {stats['activeTorrentCount']} running torrents")
+            return False
+        
+        self.logger.success(f"Paused {len(running)} Transmission torrents", phase="transmission_pause")
+        return True
+    
+    def pause_with_alt_speed(self) -> bool:
+        """
+        Enable alt-speed limits of zero, keeping the previous settings for resume.
+        
+        Returns:
+            True if the limits are in place, False otherwise
+        """
+        fields = ["alt-speed-enabled", "alt-speed-down", "alt-speed-up"]
+        if self.saved_speed_settings is None:
+            current = self.call("session-get", {"fields": fields})
+            self.saved_speed_settings = {field: current[field] for field in fields if field in current}
+        
+        self.call("session-set", {"alt-speed-enabled": True, "alt-speed-down": 0, "alt-speed-up": 0})
+        
+        current = self.call("session-get", {"fields": fields})
+        if not current.get("alt-speed-enabled") or current.get("alt-speed-down") or current.get("alt-speed-up"):
+            self.logger.error("Transmission did not apply the zero alt-speed limits")
+            return False
+        
+        stats = self.get_session_stats()
+        self.logger.success(
+            "Transmission throttled to zero",
+            phase="transmission_pause",
+            download_speed=stats.get("downloadSpeed"),
+            upload_speed=stats.get("uploadSpeed")
+        )
+        return True
+    
+    def unbind(self):
+        """
+        Bind the daemon to the loopback address, remembering the previous address for resume.
+        
+        Raises:
+            TransmissionRPCError: If the call fails
+        """
+        if not self.transmission_config.get('bind_to_tunnel', True) or not self.bind_address_supported:
+            return
+        
+        if self.saved_bind_address is None:
+            current = self.call("session-get", {"fields": ["bind-address-ipv4"]})
+            self.saved_bind_address = current.get("bind-address-ipv4", "0.0.0.0")
+        
+        self.call("session-set", {"bind-address-ipv4": PAUSED_BIND_ADDRESS})
+        current = self.call("session-get", {"fields": ["bind-address-ipv4"]})
+        if current.get("bind-address-ipv4") != PAUSED_BIND_ADDRESS:
+            self.bind_address_supported = False
+            self.saved_bind_address = None
+            self.logger.warning(
+                "Transmission does not accept bind-address-ipv4 over RPC, "
+                "only the firewall keeps it off the underlay while paused"
+            )
+    
+    def resume(self, bind_address: Optional[str] = None) -> bool:
+        """
+        Rebind the daemon to the current tunnel and resume the paused traffic.
+        
+        Args:
+            bind_address: IPv4 address of the tunnel device, if known
+        
+        Returns:
+            True if session-stats confirms the resume, False otherwise
+        """
+        with self.lock:
+            try:
+                self.bind(bind_address)
+                # Undo whatever pause did, even if pause_mode was reloaded since
+                if self.saved_speed_settings is not None and not self.resume_speed_settings():
+                    return False
+                if self.paused_ids is not None:
+                    return self.resume_torrents()
+                return True
+            except TransmissionRPCError as e:
+                self.logger.error(f"Failed to resume Transmission: {e}")
+                return False
+    
+    def bind(self, bind_address: Optional[str]):
+        """
+        Point bind-address-ipv4 and the peer port at the new tunnel.
+        
+        Without a tunnel address, the address used before the pause is restored.
+        
+        Args:
+            bind_address: IPv4 address of the tunnel device, if known
+        
+        Raises:
+            TransmissionRPCError: If the call fails
+        """
+        settings = {}
+        bind_address = bind_address or self.saved_bind_address
+        if bind_address and self.transmission_config.get('bind_to_tunnel', True) and self.bind_address_supported:
+            settings["bind-address-ipv4"] = bind_address
+        peer_port = self.transmission_config.get('peer_port')
+        if peer_port:
+            settings["peer-port"] = peer_port
+        if not settings:
+            return
+        
+        self.call("session-set", settings)
+        current = self.call("session-get", {"fields": list(settings)})
+        
+        if "bind-address-ipv4" in settings and current.get("bind-address-ipv4") != bind_address:
+            self.bind_address_supported = False
+            self.logger.warning(
+                "Transmission does not accept bind-address-ipv4 over RPC, "
+                "set it in settings.json or rely on the tunnel routes"
+            )
+        if peer_port and current.get("peer-port") != peer_port:
+            self.logger.warning(f"Transmission kept peer port {current.get('peer-port')} instead of {peer_port}")
+        
+        self.saved_bind_address = None
+        self.logger.debug(f"Transmission session updated for the new tunnel: {settings}")
+    
+    def resume_torrents(self) -> bool:
+        """
+        Start the torrents stopped by pause.
+        
+        Returns:
+            True if session-stats reports them running, False otherwise
+        """
+        ids: List[int] = self.paused_ids or []
+        if ids:
+            self.call("torrent-start", {"ids": ids})
+        
+        stats = self.get_session_stats()
+        if stats.get("activeTorrentCount", 0) < len(ids):
+            self.logger.error(
+                f"Transmission reports {stats.get('activeTorrentCount', 0)} running torrents, "
+                f"{len(ids)} were resumed"
+            )
+            return False
+        
+        self.paused_ids = None
+        self.logger.success(f"Resumed {len(ids)} Transmission torrents", phase="transmission_resume")
+        return True
+    
+    def resume_speed_settings(self) -> bool:
+        """
+        Restore the alt-speed settings saved by pause.
+        
+        Returns:
+            True if the settings are restored, False otherwise
+        """
+        settings = self.saved_speed_settings
+        self.call("session-set", settings)
+        
+        current = self.call("session-get", {"fields": list(settings)})
+        if any(current.get(field) != value for field, value in settings.items()):
+            self.logger.error("Transmission did not restore its speed settings")
+            return False
+        
+        self.saved_speed_settings = None
+        stats = self.get_session_stats()
+        self.logger.success(
+            "Transmission speed limits restored",
+            phase="transmission_resume",
+            active_torrents=stats.get("activeTorrentCount")
+        )
+        return True
@@ -1,13 +1,23 @@
-import os
-import random
-import subprocess
-import tempfile
+import sqlite3
+import threading
 import time
 from pathlib import Path
 from typing import List, Optional, Tuple
 import getpass
 from colorama import Fore
 
+from health_monitor import HealthMonitor
+from ovpn_catalog import OVPNCatalog
+from remote_resolver import RemoteResolver
+from rotation_control import RotationControl
+from rotation_policy import RotationPolicy, create_rotation_policy
+from rotation_state import RotationState
+from route_manager import RouteManager, get_interface_ipv4
+from server_history import ServerHistory
+from server_selector import ServerSelector
+from transmission_rpc import TransmissionRPC
+from vpn_tunnel import VPNTunnel
+
 
 class VPNManager:
     """
@@ -34,9 +44,35 @@ class VPNManager:
         self.network_config = config_manager.get_network_config()
         self.session_config = config_manager.get_session_config()
         
-        self.vpn_process = None
+        self.route_manager = RouteManager(logger_manager)
+        self.catalog = OVPNCatalog(config_manager, logger_manager)
+        self.history = ServerHistory(config_manager, logger_manager)
+        self.resolver = RemoteResolver(config_manager, logger_manager)
+        self.control = RotationControl()
+        self.state = RotationState(config_manager, logger_manager)
+        self.server_selector = ServerSelector(
+            config_manager,
+            logger_manager,
+            self.catalog,
+            kill_switch.connectivity,
+            self.history,
+            self.resolver,
+            self.control,
+            self.state
+        )
+        self.health_monitor = HealthMonitor(config_manager, logger_manager, kill_switch, self.control)
+        self.transmission = TransmissionRPC(config_manager, logger_manager)
+        self.tunnel = None
         self.current_ovpn_file = None
-        self.temp_credentials_file = None
+        self.current_endpoint = None
+        self.remote_hosts = []
+        self.warmed_up = False
+        self.device_slot = 0
+        self.pending_tunnel = None
+        self.connect_cancelled = threading.Event()
+        self.stop_requested = threading.Event()
+        self.history_session_id = None
+        self.session_started_at = None
     
     def discover_ovpn_files(self) -> List[str]:
         """
@@ -51,10 +87,7 @@ class VPNManager:
             self.logger.error(f"OpenVPN directory not found: {ovpn_directory}")
             return []
         
-        ovpn_files = [
-            file.name for file in ovpn_directory.glob("*.ovpn")
-            if file.is_file()
-        ]
+        ovpn_files = [profile.name for profile in self.catalog.scan()]
         
         if not ovpn_files:
             self.logger.error("No OpenVPN configuration files found")
@@ -62,8 +95,9 @@ class VPNManager:
         
         self.logger.info(f"Found {len(ovpn_files)} OpenVPN configuration files")
         
-        for file in ovpn_files:
-            self.logger.debug(f"Discovered OpenVPN file: {file}")
+        if self.logger.is_enabled("debug"):
+            for file in ovpn_files:
+                self.logger.debug(f"Discovered OpenVPN file: {file}")
         
         return ovpn_files
     
@@ -75,6 +109,7 @@ class VPNManager:
             Tuple of (username, password)
         """
         self.logger.info("Please enter your VPN credentials:")
+        self.logger.flush()
         username = input("Username: ")
         password = getpass.getpass("Password: ")
         
@@ -85,93 +120,126 @@ class VPNManager:
         self.logger.info("Credentials obtained successfully")
         return username, password
     
-    def create_secure_temporary_credentials_file(self, username: str, password: str) -> str:
+    def secure_cleanup_credentials(self):
+        """
+        Release the credentials handed to the active tunnel.
+        """
+        if self.tunnel:
+            self.tunnel.cleanup_credentials()
+    
+    def manage_system_service(self, service_name: str, action: str) -> bool:
         """
-        Create a secure temporary file with VPN credentials.
+        Manage system services (start/stop/restart).
         
         Args:
-            username: VPN username
-            password: VPN password
-            
+            service_name: Name of the service
+            action: Action to perform (start, stop, restart)
+        
+        Returns:
+            True if the service ended up in the requested state, False otherwise
+        """
+        self.logger.info(f"Managing service: {service_name} - {action}")
+        return self.kill_switch.services.control(service_name, action)
+    
+    def set_transmission(self, action: str) -> bool:
+        """
+        Let Transmission's traffic through or hold it back.
+        
+        With RPC control the daemon keeps running: "stop" pauses its torrents
+        and "start" rebinds it to the current tunnel before resuming them.
+        If the RPC call fails, or the firewall is not blocking the underlay,
+        the service is stopped or started instead.
+        
+        Args:
+            action: "start" or "stop"
+        
         Returns:
-            Path to temporary credentials file
+            True if Transmission ended up in the requested state, False otherwise
         """
-        temp_dir = self.paths_config['temp_directory']
+        if self.transmission.is_enabled() and not self.kill_switch.firewall.active:
+            # A paused daemon keeps its DHT and tracker sockets, which would leak onto the underlay
+            self.logger.debug("Transmission RPC control requires the active firewall, using the service instead")
+        elif self.transmission.is_enabled():
+            if action == "stop":
+                if self.transmission.pause():
+                    return True
+            else:
+                bind_address = get_interface_ipv4(self.tunnel.device) if self.tunnel else None
+                if self.transmission.resume(bind_address):
+                    return True
+            self.logger.warning(f"Transmission RPC unavailable, falling back to a service {action}")
         
-        fd, temp_file_path = tempfile.mkstemp(
-            dir=temp_dir,
-            prefix='cyclevpn_',
-            suffix='.auth'
-        )
+        return self.manage_system_service(self.services_config['transmission_service'], action)
+    
+    def create_tunnel(self, ovpn_file_path: Path, route_noexec: bool = False,
+                      remote: Optional[tuple] = None) -> VPNTunnel:
+        """
+        Create a tunnel on the next free tun device slot.
         
-        try:
-            os.fchmod(fd, 0o600)
-            
-            with os.fdopen(fd, 'w') as temp_file:
-                temp_file.write(f"{username}\n{password}")
-            
-            self.temp_credentials_file = temp_file_path
-            self.logger.debug("Secure temporary credentials file created")
-            return temp_file_path
+        Args:
+            ovpn_file_path: Path to the OpenVPN configuration file
+            route_noexec: Leave routing to the route manager
+            remote: Optional (host, port) overriding the profile's remote
             
-        except Exception as e:
-            os.close(fd)
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
-            raise e
+        Returns:
+            New, not yet started VPNTunnel
+        """
+        prefix = self.network_config.get('tun_device_prefix', 'cvpn')
+        device = f"{prefix}{self.device_slot}"
+        self.device_slot = 1 - self.device_slot
+        
+        return VPNTunnel(
+            self.config_manager,
+            self.logger,
+            ovpn_file_path,
+            device,
+            route_noexec=route_noexec,
+            remote=remote,
+            process_registry=self.kill_switch.process_registry
+        )
     
-    def secure_cleanup_credentials(self):
+    def cancel_connect(self):
         """
-        Securely remove temporary credentials file with overwrite.
+        Abandon the connect or switch running on another thread.
+        
+        The running call stops waiting for OpenVPN, tears down the tunnel it
+        was bringing up and returns False. The flag stays set until the
+        caller clears connect_cancelled before its next connect.
         """
-        if self.temp_credentials_file and os.path.exists(self.temp_credentials_file):
-            try:
-                file_size = os.path.getsize(self.temp_credentials_file)
-                
-                with open(self.temp_credentials_file, 'r+b') as f:
-                    f.write(os.urandom(file_size))
-                    f.flush()
-                    os.fsync(f.fileno())
-                
-                os.remove(self.temp_credentials_file)
-                self.logger.debug("Temporary credentials file securely removed")
-                self.temp_credentials_file = None
-                
-            except OSError as e:
-                self.logger.error(f"Failed to securely remove credentials file: {e}")
+        self.connect_cancelled.set()
+        tunnel = self.pending_tunnel
+        if tunnel:
+            tunnel.cancel()
     
-    def manage_system_service(self, service_name: str, action: str):
+    def request_stop(self):
         """
-        Manage system services (start/stop/restart).
+        Ask the rotation loop to end its current session and return.
         
-        Args:
-            service_name: Name of the service
-            action: Action to perform (start, stop, restart)
+        Safe to call from a signal handler: it only sets flags, and teardown
+        is left to the code running the rotation.
         """
-        self.logger.info(f"Managing service: {service_name} - {action}")
+        self.stop_requested.set()
+        self.cancel_connect()
+    
+    def start_tunnel(self, tunnel: VPNTunnel, username: str, password: str) -> bool:
+        """
+        Start a tunnel so that cancel_connect can interrupt it.
         
+        Args:
+            tunnel: Tunnel to start
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            True if the tunnel came up and the connect was not cancelled, False otherwise
+        """
+        self.pending_tunnel = tunnel
         try:
-            result = subprocess.run(
-                ["service", service_name, action],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                self.logger.success(f"Service {service_name} {action}ed successfully")
-            else:
-                stderr_msg = result.stderr.strip()
-                if action == "stop" and ("not running" in stderr_msg.lower() or "inactive" in stderr_msg.lower()):
-                    self.logger.info(f"Service {service_name} was already stopped")
-                elif action == "start" and ("already running" in stderr_msg.lower() or "active" in stderr_msg.lower()):
-                    self.logger.info(f"Service {service_name} was already running")
-                else:
-                    self.logger.error(f"Failed to {action} service {service_name}: {stderr_msg}")
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"Timeout while trying to {action} service {service_name}")
-        except Exception as e:
-            self.logger.error(f"Error managing service {service_name}: {e}")
+            if self.connect_cancelled.is_set():
+                tunnel.cancel()
+            return tunnel.start(username, password)
+        finally:
+            self.pending_tunnel = None
     
     def connect_to_vpn(self, ovpn_file: str, username: str, password: str) -> bool:
         """
@@ -194,61 +262,378 @@ class VPNManager:
         self.current_ovpn_file = ovpn_file
         self.logger.info(f"Connecting to VPN server using: {ovpn_file}")
         
-        credentials_file = None
-        try:
-            credentials_file = self.create_secure_temporary_credentials_file(username, password)
-            
-            command = [
-                "openvpn",
-                "--config", str(ovpn_file_path),
-                "--auth-user-pass", credentials_file,
-                "--mute-replay-warnings",
-                "--daemon"
-            ]
-            
-            self.vpn_process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+        remote = None
+        if self.kill_switch.firewall.is_enabled():
+            endpoint = self.resolve_endpoint(ovpn_file)
+            if not endpoint or not self.kill_switch.apply_firewall([endpoint]):
+                self.current_ovpn_file = None
+                return False
+            self.current_endpoint = endpoint
+            remote = endpoint[:2]
+        elif self.resolver.is_enabled():
+            # Without the firewall a failed lookup is not fatal: OpenVPN resolves the name itself
+            endpoint = self.resolve_endpoint(ovpn_file)
+            if endpoint:
+                self.current_endpoint = endpoint
+                remote = endpoint[:2]
+        
+        started_at = time.monotonic()
+        self.tunnel = self.create_tunnel(ovpn_file_path, remote=remote)
+        if not self.start_tunnel(self.tunnel, username, password):
+            self.logger.error("Failed to establish VPN connection", server=ovpn_file, phase="connect")
+            self.record_connection_attempt(ovpn_file, None, False)
+            self.disconnect_vpn()
+            return False
+        
+        connect_latency = time.monotonic() - started_at
+        self.kill_switch.connectivity.bind_tunnel(self.tunnel.device, self.tunnel.get_local_ip())
+        
+        verified = self.kill_switch.verify_vpn_connection(self.tunnel)
+        if verified and not self.connect_cancelled.is_set():
+            self.record_connection_attempt(ovpn_file, connect_latency, True)
+            self.logger.success(
+                f"VPN connection established successfully using {ovpn_file}",
+                server=ovpn_file,
+                phase="connect",
+                duration=round(connect_latency, 3)
             )
-            
-            self.logger.info("OpenVPN process started, waiting for connection...")
-            time.sleep(self.network_config['vpn_establish_wait'])
-            
-            if self.kill_switch.verify_vpn_connection():
-                self.logger.success(f"VPN connection established successfully using {ovpn_file}")
-                return True
+            return True
+        else:
+            if verified:
+                self.logger.warning(f"Connection to {ovpn_file} cancelled", server=ovpn_file, phase="connect")
             else:
-                self.logger.error("VPN connection verification failed")
-                self.disconnect_vpn()
-                return False
-                
-        except Exception as e:
-            self.logger.error(f"Failed to establish VPN connection: {e}")
-            if credentials_file:
-                self.secure_cleanup_credentials()
+                self.logger.error("VPN connection verification failed", server=ovpn_file, phase="verification")
+            self.record_connection_attempt(ovpn_file, connect_latency, False)
+            self.disconnect_vpn()
             return False
     
+    def record_connection_attempt(self, ovpn_file: str, connect_latency: Optional[float], verified: bool):
+        """
+        Record a connection attempt in the server history.
+        
+        Args:
+            ovpn_file: OpenVPN configuration file name
+            connect_latency: Time until the tunnel was up, or None if it never came up
+            verified: Whether the connection passed verification
+        """
+        self.kill_switch.metrics.record_connection(ovpn_file, connect_latency, verified)
+        self.state.record_result(ovpn_file, verified)
+        
+        try:
+            session_id = self.history.record_attempt(ovpn_file, connect_latency, verified)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to record server history: {e}")
+            return
+        
+        if verified:
+            self.history_session_id = session_id
+            self.session_started_at = time.monotonic()
+            self.resolver.prefetch_in_background(self.remote_hosts)
+    
+    def finish_session_history(self):
+        """
+        Record the traffic and drop status of the active session before teardown.
+        """
+        if self.history_session_id is None or not self.tunnel:
+            return
+        
+        rx_bytes, tx_bytes = self.tunnel.get_traffic_counters()
+        dropped = not self.tunnel.is_connected()
+        duration = time.monotonic() - self.session_started_at
+        
+        try:
+            self.history.record_session_end(self.history_session_id, duration, rx_bytes, tx_bytes, dropped)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to record server history: {e}")
+        
+        self.history_session_id = None
+    
+    def create_rotation_policy(self) -> RotationPolicy:
+        """
+        Create the rotation policy of a new session from the current configuration.
+        
+        Returns:
+            RotationPolicy instance
+        """
+        policy = create_rotation_policy(self.config_manager, self.kill_switch.connectivity)
+        self.logger.info(f"VPN session active {policy.describe()}...")
+        return policy
+    
+    def monitor_session(self, policy: RotationPolicy) -> Optional[str]:
+        """
+        Keep the session running while watching the tunnel health.
+        
+        Args:
+            policy: Rotation policy deciding when the session ends
+            
+        Returns:
+            Failure reason if the tunnel failed before the end of the session,
+            None otherwise or when a stop was requested
+        """
+        self.health_monitor.start(self.tunnel, policy)
+        try:
+            while not self.stop_requested.is_set():
+                if self.health_monitor.finished.wait(1.0):
+                    return self.health_monitor.failure
+            return None
+        finally:
+            self.health_monitor.stop()
+    
+    def get_status(self) -> dict:
+        """
+        Describe the active session for the control socket.
+        
+        Returns:
+            Dictionary with the server, endpoint, tun device, session age and traffic
+        """
+        tunnel = self.tunnel
+        status = {"server": self.current_ovpn_file, "endpoint": None, "device": None}
+        if self.current_endpoint:
+            address, port, proto = self.current_endpoint
+            status["endpoint"] = f"{address}:{port}/{proto}"
+        if tunnel:
+            rx_bytes, tx_bytes = tunnel.get_traffic_counters()
+            status.update(device=tunnel.device, rx_bytes=rx_bytes, tx_bytes=tx_bytes)
+        if tunnel and self.history_session_id is not None:
+            status["session_seconds"] = round(time.monotonic() - self.session_started_at, 1)
+        return status
+    
+    def handle_tunnel_failure(self, failure: str):
+        """
+        React to a tunnel that failed its health checks mid-session.
+        
+        With on_failure "rotate" the caller rotates early. With "kill_switch"
+        the tunnel and its routes are torn down and the application stops
+        through an emergency shutdown, leaving the kill switch in place.
+        
+        Args:
+            failure: Failure reason reported by the health monitor
+        
+        Raises:
+            SystemExit: If on_failure is "kill_switch"
+        """
+        self.kill_switch.metrics.record_tunnel_failure(self.current_ovpn_file)
+        self.state.record_result(self.current_ovpn_file, False)
+        
+        if self.history_session_id is not None:
+            try:
+                self.history.record_drop(self.history_session_id)
+            except sqlite3.Error as e:
+                self.logger.warning(f"Failed to record server history: {e}")
+        
+        if self.config_manager.get_health_config().get('on_failure', 'rotate') == "kill_switch":
+            self.logger.error(f"Tunnel failure: {failure}", server=self.current_ovpn_file, phase="health")
+            self.disconnect_vpn()
+            self.kill_switch.emergency_shutdown()
+        else:
+            self.logger.warning(
+                f"Rotating early after tunnel failure: {failure}",
+                server=self.current_ovpn_file,
+                phase="health"
+            )
+    
     def disconnect_vpn(self):
         """
         Disconnect from VPN and cleanup processes.
         """
-        if self.vpn_process:
-            try:
-                self.vpn_process.terminate()
-                self.vpn_process.wait(timeout=10)
-                self.logger.info("VPN connection terminated")
-            except subprocess.TimeoutExpired:
-                self.vpn_process.kill()
-                self.logger.warning("VPN process force killed")
-            except Exception as e:
-                self.logger.error(f"Error disconnecting VPN: {e}")
-            
-            self.vpn_process = None
+        if self.tunnel:
+            self.finish_session_history()
+            self.tunnel.stop()
+            self.tunnel = None
         
+        self.kill_switch.metrics.end_session()
         self.kill_switch.kill_vpn_processes()
-        self.secure_cleanup_credentials()
+        self.kill_switch.connectivity.unbind_tunnel()
+        self.route_manager.clear_routes()
+        if self.kill_switch.firewall.active:
+            self.kill_switch.apply_firewall([])
         self.current_ovpn_file = None
+        self.current_endpoint = None
+    
+    def prefetch_remotes(self, ovpn_files: List[str]):
+        """
+        Resolve the remote hosts of all profiles in parallel before the rotation starts.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names
+        """
+        profiles = (self.catalog.get(ovpn_file) for ovpn_file in ovpn_files)
+        self.remote_hosts = sorted({profile.remote_host for profile in profiles if profile and profile.remote_host})
+        self.resolver.prefetch(self.remote_hosts)
+    
+    def warm_up(self, ovpn_files: List[str]):
+        """
+        Pre-resolve the remotes and probe the servers while the underlay is still open.
+        
+        Probes saved by the previous run are reused while they are fresh.
+        This runs once at startup; during the rotation the resolver and the
+        server selector only refresh what has expired.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names
+        """
+        self.prefetch_remotes(ovpn_files)
+        if self.server_selector.get_strategy() != "random":
+            self.server_selector.refresh_latencies(ovpn_files)
+        self.warmed_up = True
+    
+    def load_initial_ip(self):
+        """
+        Store the underlay IP address, reusing the one saved by the previous run while it is recent.
+        
+        The address is looked up again only once it is older than
+        initial_ip_max_age and the firewall does not block the underlay.
+        """
+        initial_ip = self.state.get_initial_ip()
+        if initial_ip:
+            if self.kill_switch.initial_ip != initial_ip:
+                self.kill_switch.initial_ip = initial_ip
+                self.logger.info(f"Using saved initial IP address: {initial_ip}")
+            return
+        
+        if self.kill_switch.initial_ip and self.kill_switch.firewall.active:
+            self.logger.debug(f"Using stored initial IP address: {self.kill_switch.initial_ip}")
+            return
+        
+        self.kill_switch.store_initial_ip(refresh=True)
+        if self.kill_switch.initial_ip:
+            self.state.set_initial_ip(self.kill_switch.initial_ip)
+    
+    def resolve_endpoint(self, ovpn_file: str) -> Optional[tuple]:
+        """
+        Resolve the server endpoint of a profile.
+        
+        Successive calls rotate among the cached A records of the remote host.
+        
+        Args:
+            ovpn_file: Name of the OpenVPN configuration file
+            
+        Returns:
+            Tuple of (address, port, proto), or None if it cannot be resolved
+        """
+        profile = self.catalog.get(ovpn_file)
+        if not profile:
+            self.logger.error(f"OpenVPN configuration file not found: {ovpn_file}")
+            return None
+        
+        if not profile.remote_host:
+            self.logger.error(f"No remote server declared in {ovpn_file}")
+            return None
+        
+        address = self.resolver.next_address(profile.remote_host)
+        if not address:
+            self.logger.error(f"Unable to resolve VPN server {profile.remote_host}")
+            return None
+        
+        return address, profile.remote_port, profile.proto
+    
+    def switch_to_server(self, ovpn_file: str, username: str, password: str) -> bool:
+        """
+        Bring up a tunnel to the given server next to the current one and move traffic to it.
+        
+        The new tunnel is started on the other tun device with routing left to
+        CycleVPN. Once OpenVPN reports it as connected, the tunnel routes are
+        switched over in one batch, the public IP is verified, and only then is
+        the previous tunnel torn down. A failed verification rolls the routes back.
+        
+        Args:
+            ovpn_file: Name of the OpenVPN configuration file
+            username: VPN username
+            password: VPN password
+            
+        Returns:
+            True if traffic now flows through the new tunnel, False otherwise
+        """
+        endpoint = self.resolve_endpoint(ovpn_file)
+        if not endpoint:
+            return False
+        
+        address, port, _ = endpoint
+        current_endpoints = [self.current_endpoint] if self.current_endpoint else []
+        
+        if not self.kill_switch.apply_firewall(current_endpoints + [endpoint]):
+            return False
+        
+        if not self.route_manager.pin_host_route(address):
+            self.kill_switch.apply_firewall(current_endpoints)
+            return False
+        
+        self.logger.info(f"Preparing next VPN tunnel using: {ovpn_file}")
+        standby = self.create_tunnel(
+            Path(self.catalog.get(ovpn_file).path),
+            route_noexec=True,
+            remote=(address, port)
+        )
+        
+        def abandon_standby():
+            standby.stop()
+            if not self.current_endpoint or address != self.current_endpoint[0]:
+                self.route_manager.release_host_route(address)
+            self.kill_switch.apply_firewall(current_endpoints)
+        
+        started_at = time.monotonic()
+        if not self.start_tunnel(standby, username, password):
+            self.logger.error(f"Next VPN tunnel using {ovpn_file} failed to come up")
+            self.record_connection_attempt(ovpn_file, None, False)
+            abandon_standby()
+            return False
+        
+        connect_latency = time.monotonic() - started_at
+        switch_started = time.monotonic()
+        if not self.route_manager.switch_default_route(standby.device):
+            abandon_standby()
+            return False
+        
+        self.kill_switch.connectivity.bind_tunnel(standby.device, standby.get_local_ip())
+        verified = self.kill_switch.verify_vpn_connection(standby)
+        if not verified or self.connect_cancelled.is_set():
+            if verified:
+                self.logger.warning(f"Switch to {ovpn_file} cancelled, rolling back")
+            else:
+                self.logger.error(f"VPN connection verification failed for {ovpn_file}, rolling back")
+            if self.tunnel:
+                self.route_manager.switch_default_route(self.tunnel.device)
+                self.kill_switch.connectivity.bind_tunnel(self.tunnel.device, self.tunnel.get_local_ip())
+            else:
+                self.kill_switch.connectivity.unbind_tunnel()
+            self.record_connection_attempt(ovpn_file, connect_latency, False)
+            abandon_standby()
+            return False
+        
+        switch_duration = time.monotonic() - switch_started
+        self.finish_session_history()
+        self.record_connection_attempt(ovpn_file, connect_latency, True)
+        previous_tunnel = self.tunnel
+        previous_endpoint = self.current_endpoint
+        
+        self.tunnel = standby
+        self.current_ovpn_file = ovpn_file
+        self.current_endpoint = endpoint
+        
+        if previous_tunnel:
+            previous_tunnel.stop()
+        if previous_endpoint and previous_endpoint[0] != address:
+            self.route_manager.release_host_route(previous_endpoint[0])
+        self.kill_switch.apply_firewall([endpoint])
+        
+        self.logger.success(
+            f"Traffic switched to {ovpn_file} on {standby.device} in {switch_duration:.2f} seconds",
+            server=ovpn_file,
+            phase="switch",
+            duration=round(switch_duration, 3)
+        )
+        return True
+    
+    def bind_underlay_checks(self):
+        """
+        Bind underlay connectivity checks to the physical default route interface.
+        """
+        if self.network_config.get('underlay_interface'):
+            return
+        
+        underlay = self.route_manager.get_underlay_gateway()
+        if underlay:
+            self.kill_switch.connectivity.bind_underlay(underlay[1])
     
     def run_vpn_session(self, ovpn_file: str, username: str, password: str) -> bool:
         """
@@ -265,29 +650,21 @@ class VPNManager:
         session_successful = False
         
         try:
-            self.kill_switch.store_initial_ip()
+            self.load_initial_ip()
             
-            self.manage_system_service(
-                self.services_config['transmission_service'],
-                "stop"
-            )
+            self.set_transmission("stop")
             
             if self.connect_to_vpn(ovpn_file, username, password):
-                self.manage_system_service(
-                    self.services_config['transmission_service'],
-                    "start"
-                )
+                self.set_transmission("start")
                 
-                cooldown_seconds = self.config_manager.get_cooldown_seconds()
-                self.logger.info(f"VPN session active for {cooldown_seconds} seconds...")
-                time.sleep(cooldown_seconds)
+                failure = self.monitor_session(self.create_rotation_policy())
                 
-                self.manage_system_service(
-                    self.services_config['transmission_service'],
-                    "stop"
-                )
+                self.set_transmission("stop")
                 
-                session_successful = True
+                if failure:
+                    self.handle_tunnel_failure(failure)
+                else:
+                    session_successful = True
             else:
                 self.logger.error("Failed to establish VPN connection")
                 if self.config_manager.is_kill_switch_enabled():
@@ -315,25 +692,130 @@ class VPNManager:
             self.logger.error("No OpenVPN files available for rotation")
             return
         
+        self.bind_underlay_checks()
+        if not self.warmed_up:
+            self.warm_up(ovpn_files)
+            self.load_initial_ip()
+        self.kill_switch.engage_firewall()
+        
+        if self.session_config.get('rotation_mode') == "make-before-break":
+            if self.network_config.get('management_interface', True):
+                self.run_make_before_break_rotation(ovpn_files, username, password)
+                return
+            self.logger.warning(
+                "Make-before-break rotation requires the OpenVPN management interface, "
+                "using standard rotation"
+            )
+        
         failure_count = 0
-        max_failures = self.session_config['max_connection_failures']
         
         try:
-            while True:
-                random.shuffle(ovpn_files)
-                
-                for ovpn_file in ovpn_files:
+            while not self.stop_requested.is_set():
+                for ovpn_file in self.server_selector.iterate_pass(ovpn_files):
+                    if self.stop_requested.is_set():
+                        break
+                    self.config_manager.apply_pending_changes()
+                    max_failures = self.session_config['max_connection_failures']
+                    
                     try:
                         if self.run_vpn_session(ovpn_file, username, password):
                             failure_count = 0
-                            self.logger.success(f"Completed session with {ovpn_file}")
-                        else:
+                            self.logger.success(f"Completed session with {ovpn_file}", server=ovpn_file, phase="session")
+                        elif not self.stop_requested.is_set():
+                            failure_count += 1
+                            self.logger.error(
+                                f"Session failed with {ovpn_file} (failure {failure_count})",
+                                server=ovpn_file,
+                                phase="session"
+                            )
+                            
+                            if failure_count >= max_failures:
+                                self.logger.error("Maximum failures reached, activating kill switch")
+                                self.kill_switch.emergency_shutdown()
+                    
+                    except KeyboardInterrupt:
+                        raise
+                    except Exception as e:
+                        failure_count += 1
+                        self.logger.error(f"Unexpected error with {ovpn_file}: {e}")
+                        
+                        if failure_count >= max_failures:
+                            self.kill_switch.emergency_shutdown()
+            
+            self.logger.info("VPN rotation stopped by user")
+        
+        except KeyboardInterrupt:
+            self.logger.info("VPN rotation stopped by user")
+        
+        finally:
+            self.disconnect_vpn()
+    
+    def run_make_before_break_rotation(self, ovpn_files: List[str], username: str, password: str):
+        """
+        Run continuous VPN server rotation without tearing down the active tunnel first.
+        
+        Transmission keeps running across rotations; only the tunnel routes
+        move from one tun device to the next.
+        
+        Args:
+            ovpn_files: OpenVPN configuration file names to rotate through
+            username: VPN username
+            password: VPN password
+        """
+        failure_count = 0
+        transmission_running = False
+        
+        self.logger.info("Using make-before-break rotation")
+        
+        try:
+            while not self.stop_requested.is_set():
+                runnable = False
+                for ovpn_file in self.server_selector.iterate_pass(ovpn_files):
+                    if self.stop_requested.is_set():
+                        break
+                    if ovpn_file == self.current_ovpn_file and ovpn_file != self.control.pinned:
+                        continue
+                    
+                    runnable = True
+                    self.config_manager.apply_pending_changes()
+                    max_failures = self.session_config['max_connection_failures']
+                    
+                    try:
+                        if not self.switch_to_server(ovpn_file, username, password):
+                            if self.stop_requested.is_set():
+                                break
                             failure_count += 1
-                            self.logger.error(f"Session failed with {ovpn_file} (failure {failure_count})")
+                            self.logger.error(f"Rotation failed with {ovpn_file} (failure {failure_count})")
+                            
+                            if not self.tunnel and self.config_manager.is_kill_switch_enabled():
+                                self.kill_switch.activate_kill_switch()
+                                transmission_running = False
                             
                             if failure_count >= max_failures:
                                 self.logger.error("Maximum failures reached, activating kill switch")
                                 self.kill_switch.emergency_shutdown()
+                            continue
+                        
+                        failure_count = 0
+                        
+                        if not transmission_running:
+                            self.set_transmission("start")
+                            transmission_running = True
+                        
+                        failure = self.monitor_session(self.create_rotation_policy())
+                        
+                        if failure:
+                            self.set_transmission("stop")
+                            transmission_running = False
+                            self.handle_tunnel_failure(failure)
+                            failure_count += 1
+                            
+                            if failure_count >= max_failures:
+                                self.logger.error("Maximum failures reached, activating kill switch")
+                                self.kill_switch.emergency_shutdown()
+                            continue
+                        
+                        self.logger.success(f"Completed session with {ovpn_file}", server=ovpn_file, phase="session")
                     
                     except KeyboardInterrupt:
                         raise
@@ -343,9 +825,29 @@ class VPNManager:
                         
                         if failure_count >= max_failures:
                             self.kill_switch.emergency_shutdown()
+                
+                if runnable or self.stop_requested.is_set():
+                    continue
+                
+                # No other server to switch to: keep the current one instead of starting a new pass at once
+                if not self.tunnel:
+                    self.stop_requested.wait(self.config_manager.get_cooldown_seconds())
+                    continue
+                
+                self.logger.info(f"No other server to rotate to, keeping {self.current_ovpn_file}")
+                failure = self.monitor_session(self.create_rotation_policy())
+                if failure:
+                    self.set_transmission("stop")
+                    transmission_running = False
+                    self.handle_tunnel_failure(failure)
+                    self.disconnect_vpn()
+            
+            self.logger.info("VPN rotation stopped by user")
         
         except KeyboardInterrupt:
             self.logger.info("VPN rotation stopped by user")
         
         finally:
-            self.disconnect_vpn() 
\ No newline at end of file
+            if transmission_running:
+                self.set_transmission("stop")
+            self.disconnect_vpn()
\ No newline at end of file
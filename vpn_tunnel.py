@@ -0,0 +1,581 @@
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from management_interface import (
+    ManagementInterface,
+    CONNECTION_ESTABLISHED,
+    CONNECTION_AUTH_FAILED,
+    CONNECTION_TIMEOUT,
+)
+from process_registry import ProcessRegistry
+
+
+IFF_UP = 0x1
+
+# Profile directives that add or resolve servers; dropped when the remote is pinned
+REMOTE_DIRECTIVES = ("remote", "remote-random", "remote-random-hostname", "resolv-retry")
+
+
+def pin_remote(profile_text: str, address: str, port: int) -> str:
+    """
+    Rewrite a profile so that OpenVPN can only connect to one resolved address.
+    
+    OpenVPN appends every remote it reads to its connection list, so the
+    profile's own remotes and <connection> blocks are removed rather than
+    overridden; otherwise a failed attempt on the address would fall back
+    to the host name and a DNS lookup.
+    
+    Args:
+        profile_text: OpenVPN profile
+        address: Resolved server address
+        port: Server port
+    
+    Returns:
+        Profile with a single remote line
+    """
+    lines = []
+    in_connection = False
+    for line in profile_text.splitlines():
+        stripped = line.strip()
+        if stripped.lower().startswith("<connection>"):
+            in_connection = True
+            continue
+        if in_connection:
+            in_connection = not stripped.lower().startswith("</connection>")
+            continue
+        words = stripped.split(None, 1)
+        if words and words[0].lower() in REMOTE_DIRECTIVES:
+            continue
+        lines.append(line)
+    
+    lines.append(f"remote {address} {port}")
+    return "\n".join(lines) + "\n"
+
+
+class VPNTunnel:
+    """
+    A single OpenVPN instance bound to its own tun device.
+    
+    This class owns everything tied to one tunnel: the launched process,
+    its credentials file and its management connection. Several tunnels
+    can coexist, which allows the next server to be brought up before
+    the current one is torn down.
+    """
+    
+    def __init__(self, config_manager, logger_manager, ovpn_file_path: Path,
+                 device: str, route_noexec: bool = False,
+                 remote: Optional[tuple] = None, process_registry=None,
+                 netns: Optional[str] = None):
+        """
+        Initialize the tunnel.
+        
+        Args:
+            config_manager: Instance of ConfigManager
+            logger_manager: Instance of LoggerManager
+            ovpn_file_path: Path to the OpenVPN configuration file
+            device: Name of the tun device to create
+            route_noexec: Leave routing to CycleVPN instead of OpenVPN
+            remote: Optional (address, port) replacing the profile's remotes
+            process_registry: Optional shared ProcessRegistry tracking the daemon
+            netns: Optional network namespace OpenVPN runs in
+        """
+        self.config_manager = config_manager
+        self.logger = logger_manager
+        self.paths_config = config_manager.get_paths_config()
+        self.network_config = config_manager.get_network_config()
+        
+        self.ovpn_file_path = Path(ovpn_file_path)
+        self.device = device
+        self.route_noexec = route_noexec
+        self.remote = remote
+        self.netns = netns
+        self.process_registry = process_registry or ProcessRegistry(logger_manager)
+        
+        self.process = None
+        self.pid = None
+        self.management = None
+        self.credentials_file = None
+        self.credentials_fd = None
+        self.connection_config = None
+        self.cancelled = threading.Event()
+    
+    def cancel(self):
+        """
+        Abandon a start in progress, from another thread.
+        
+        start() then returns False as soon as it notices; the caller still
+        stops the tunnel to terminate OpenVPN.
+        """
+        self.cancelled.set()
+        if self.management:
+            self.management.interrupt()
+    
+    def create_credentials_memfd(self, username: str, password: str) -> Optional[str]:
+        """
+        Put the VPN credentials in an anonymous in-memory file.
+        
+        OpenVPN inherits the descriptor and opens it through /proc/self/fd,
+        so the credentials never reach a filesystem. The file disappears
+        with the last process holding it.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            Path OpenVPN reads the credentials from, or None if memfd is unavailable
+        """
+        if not hasattr(os, 'memfd_create'):
+            return None
+        
+        try:
+            fd = os.memfd_create("cyclevpn_auth", os.MFD_CLOEXEC)
+        except OSError:
+            return None
+        
+        os.write(fd, f"{username}\n{password}\n".encode("utf-8"))
+        self.credentials_fd = fd
+        return f"/proc/self/fd/{fd}"
+    
+    def create_credentials_file(self, username: str, password: str) -> str:
+        """
+        Create a secure temporary file with VPN credentials.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            Path to temporary credentials file
+        """
+        temp_dir = self.paths_config['temp_directory']
+        
+        fd, temp_file_path = tempfile.mkstemp(
+            dir=temp_dir,
+            prefix='cyclevpn_',
+            suffix='.auth'
+        )
+        
+        try:
+            os.fchmod(fd, 0o600)
+            
+            with os.fdopen(fd, 'w') as temp_file:
+                temp_file.write(f"{username}\n{password}")
+            
+            self.credentials_file = temp_file_path
+            self.logger.debug("Secure temporary credentials file created")
+            return temp_file_path
+            
+        except Exception as e:
+            os.close(fd)
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+            raise e
+    
+    def cleanup_credentials(self):
+        """
+        Release the credentials handed to OpenVPN.
+        
+        Closes the in-memory credentials file, makes the management
+        interface forget the credentials and, if the temporary file
+        fallback was used, overwrites and removes that file.
+        """
+        if self.credentials_fd is not None:
+            os.close(self.credentials_fd)
+            self.credentials_fd = None
+        
+        if self.management:
+            self.management.clear_credentials()
+        
+        if self.credentials_file and os.path.exists(self.credentials_file):
+            try:
+                file_size = os.path.getsize(self.credentials_file)
+                
+                with open(self.credentials_file, 'r+b') as f:
+                    f.write(os.urandom(file_size))
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                os.remove(self.credentials_file)
+                self.logger.debug("Temporary credentials file securely removed")
+                self.credentials_file = None
+                
+            except OSError as e:
+                self.logger.error(f"Failed to securely remove credentials file: {e}")
+    
+    def get_management_socket_path(self) -> str:
+        """
+        Get the path of the management socket for this tunnel.
+        
+        Returns:
+            Path to the management Unix socket
+        """
+        temp_dir = self.paths_config['temp_directory']
+        return str(Path(temp_dir) / f"cyclevpn_{os.getpid()}_{self.device}.mgmt")
+    
+    def write_connection_config(self) -> str:
+        """
+        Write the profile with its remotes replaced by the pinned address.
+        
+        The file may carry inline keys, so it is only readable by its owner.
+        
+        Returns:
+            Path of the configuration OpenVPN is started with
+        """
+        profile_text = self.ovpn_file_path.read_text(encoding="utf-8", errors="replace")
+        temp_dir = self.paths_config['temp_directory']
+        path = Path(temp_dir) / f"cyclevpn_{os.getpid()}_{self.device}.conf"
+        
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(pin_remote(profile_text, self.remote[0], self.remote[1]))
+        self.connection_config = str(path)
+        return self.connection_config
+    
+    def remove_connection_config(self):
+        """
+        Remove the configuration written by write_connection_config.
+        """
+        if self.connection_config:
+            try:
+                os.remove(self.connection_config)
+            except OSError:
+                pass
+            self.connection_config = None
+    
+    def get_pid_file_path(self) -> str:
+        """
+        Get the path of the file OpenVPN writes its daemon PID to.
+        
+        Returns:
+            Path to the PID file
+        """
+        temp_dir = self.paths_config['temp_directory']
+        return str(Path(temp_dir) / f"cyclevpn_{os.getpid()}_{self.device}.pid")
+    
+    def read_pid_file(self, timeout: float) -> Optional[int]:
+        """
+        Wait for OpenVPN to write its PID file and read it.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+        
+        Returns:
+            Daemon process identifier, or None if the file never appeared
+        """
+        deadline = time.monotonic() + timeout
+        
+        while True:
+            try:
+                with open(self.get_pid_file_path(), 'r') as pid_file:
+                    return int(pid_file.read().strip())
+            except (OSError, ValueError):
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(0.05)
+    
+    def track_daemon(self, timeout: float):
+        """
+        Find the PID of the daemonized OpenVPN process and register it.
+        
+        The launched process only forks the daemon and exits, so the real
+        PID is asked from the management interface or read from --writepid.
+        
+        Args:
+            timeout: Maximum time to wait for the PID file in seconds
+        """
+        pid = self.management.get_pid() if self.management else None
+        if pid is None:
+            pid = self.read_pid_file(timeout)
+        
+        if pid is None:
+            self.logger.warning(f"Could not determine the OpenVPN PID on {self.device}")
+            return
+        
+        self.pid = pid
+        self.process_registry.register(pid, f"openvpn:{self.device}")
+    
+    def build_command(self, credentials_file: Optional[str]) -> List[str]:
+        """
+        Build the OpenVPN command line for this tunnel.
+        
+        With a pinned remote, OpenVPN is started from a copy of the profile
+        whose only remote is that address.
+        
+        Args:
+            credentials_file: Path to the credentials file, or None to query
+                them through the management interface
+        
+        Returns:
+            OpenVPN command as a list of arguments
+        """
+        command = ["ip", "netns", "exec", self.netns, "openvpn"] if self.netns else ["openvpn"]
+        config_path = self.write_connection_config() if self.remote else str(self.ovpn_file_path)
+        
+        command += [
+            "--config", config_path,
+            "--dev", self.device,
+            "--dev-type", "tun",
+            "--mute-replay-warnings",
+            "--writepid", self.get_pid_file_path(),
+            "--daemon",
+            "--auth-user-pass"
+        ]
+        
+        if credentials_file:
+            command.append(credentials_file)
+        
+        if self.route_noexec:
+            command.append("--route-noexec")
+        
+        if self.network_config.get('management_interface', True):
+            command += ["--management", self.get_management_socket_path(), "unix", "--management-hold"]
+            if not credentials_file:
+                command.append("--management-query-passwords")
+        
+        return command
+    
+    def start(self, username: str, password: str) -> bool:
+        """
+        Launch OpenVPN and wait until the tunnel is up.
+        
+        Args:
+            username: VPN username
+            password: VPN password
+        
+        Returns:
+            True if OpenVPN reported the tunnel as established, False otherwise
+        """
+        if not self.ovpn_file_path.exists():
+            self.logger.error(f"OpenVPN configuration file not found: {self.ovpn_file_path}")
+            return False
+        
+        try:
+            use_management = self.network_config.get('management_interface', True)
+            if use_management:
+                credentials_file = None
+            else:
+                credentials_file = (
+                    self.create_credentials_memfd(username, password)
+                    or self.create_credentials_file(username, password)
+                )
+            
+            socket_path = self.get_management_socket_path()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            
+            self.process = subprocess.Popen(
+                self.build_command(credentials_file),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                pass_fds=() if self.credentials_fd is None else (self.credentials_fd,)
+            )
+            
+            if self.credentials_fd is not None:
+                os.close(self.credentials_fd)
+                self.credentials_fd = None
+            
+            self.logger.info(f"OpenVPN process started on {self.device}, waiting for connection...")
+            
+            if use_management:
+                return self.wait_until_ready(socket_path, (username, password))
+            
+            self.track_daemon(self.network_config.get('management_connect_timeout', 5))
+            time.sleep(self.network_config['vpn_establish_wait'])
+            return not self.cancelled.is_set()
+            
+        except Exception as e:
+            self.logger.error(f"Failed to start OpenVPN on {self.device}: {e}")
+            self.cleanup_credentials()
+            self.remove_connection_config()
+            return False
+    
+    def wait_until_ready(self, socket_path: str, credentials: tuple) -> bool:
+        """
+        Wait for OpenVPN to report the tunnel state through its management interface.
+        
+        The credentials are answered to OpenVPN's password query on the
+        management socket rather than written to a file.
+        
+        Args:
+            socket_path: Path to the management Unix socket
+            credentials: Tuple of (username, password)
+        
+        Returns:
+            True if OpenVPN reported CONNECTED,SUCCESS before the deadline, False otherwise
+        """
+        establish_wait = self.network_config['vpn_establish_wait']
+        started_at = time.monotonic()
+        
+        self.management = ManagementInterface(socket_path, self.logger)
+        self.management.set_credentials(*credentials)
+        connect_timeout = self.network_config.get('management_connect_timeout', 5)
+        if not self.management.connect(min(connect_timeout, establish_wait)):
+            return False
+        
+        self.track_daemon(connect_timeout)
+        if self.cancelled.is_set():
+            self.logger.warning(f"OpenVPN start on {self.device} cancelled")
+            return False
+        
+        try:
+            self.management.release_hold()
+        except (ConnectionError, OSError) as e:
+            self.logger.error(f"Failed to release OpenVPN management hold: {e}")
+            return False
+        
+        remaining = establish_wait - (time.monotonic() - started_at)
+        outcome = self.management.wait_for_connection(max(remaining, 0))
+        elapsed = time.monotonic() - started_at
+        
+        if self.cancelled.is_set():
+            self.logger.warning(f"OpenVPN start on {self.device} cancelled after {elapsed:.1f} seconds")
+            return False
+        
+        if outcome == CONNECTION_ESTABLISHED:
+            self.logger.info(f"OpenVPN tunnel up on {self.device} after {elapsed:.1f} seconds")
+            return True
+        
+        if outcome == CONNECTION_AUTH_FAILED:
+            self.logger.error("VPN server rejected the credentials")
+        elif outcome == CONNECTION_TIMEOUT:
+            self.logger.error(f"OpenVPN did not connect within {establish_wait} seconds")
+        else:
+            self.logger.error(f"OpenVPN connection failed after {elapsed:.1f} seconds")
+        return False
+    
+    def get_remote_ip(self) -> Optional[str]:
+        """
+        Get the server address reported by OpenVPN.
+        
+        Returns:
+            Remote server IP address, or None if unknown
+        """
+        if self.management and self.management.last_state:
+            return self.management.last_state.get('remote_ip') or None
+        return None
+    
+    def get_local_ip(self) -> Optional[str]:
+        """
+        Get the tunnel address pushed by the server.
+        
+        Returns:
+            Local tun IP address, or None if unknown
+        """
+        if self.management and self.management.last_state:
+            return self.management.last_state.get('local_ip') or None
+        return None
+    
+    def is_connected(self) -> bool:
+        """
+        Check whether OpenVPN still reports the tunnel as connected.
+        
+        Returns:
+            True if connected (or if no management interface is available), False otherwise
+        """
+        if not self.management:
+            return self.process is not None
+        
+        state = self.management.get_state()
+        return bool(state) and state['state'] == "CONNECTED"
+    
+    def read_namespace_counters(self) -> Optional[tuple]:
+        """
+        Read the tun device counters from /proc/<pid>/net/dev of the daemon.
+        
+        The host's /sys/class/net does not show devices of other network
+        namespaces, but the daemon's /proc entry always sees its own.
+        
+        Returns:
+            Tuple of (rx_bytes, tx_bytes), or None if the device is gone
+        """
+        if not self.pid:
+            return None
+        
+        try:
+            with open(f"/proc/{self.pid}/net/dev", 'r') as net_dev:
+                for line in net_dev:
+                    name, _, counters = line.partition(":")
+                    if name.strip() == self.device:
+                        fields = counters.split()
+                        return int(fields[0]), int(fields[8])
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+    
+    def is_link_up(self) -> bool:
+        """
+        Check that the tun device exists and is administratively up.
+        
+        Returns:
+            True if the device is up, False otherwise
+        """
+        if self.netns:
+            return self.read_namespace_counters() is not None
+        
+        try:
+            flags = int((Path("/sys/class/net") / self.device / "flags").read_text(), 16)
+        except (OSError, ValueError):
+            return False
+        return bool(flags & IFF_UP)
+    
+    def get_traffic_counters(self) -> tuple:
+        """
+        Read the byte counters of the tun device.
+        
+        Returns:
+            Tuple of (rx_bytes, tx_bytes), zeros if the device is gone
+        """
+        if self.netns:
+            return self.read_namespace_counters() or (0, 0)
+        
+        statistics = Path("/sys/class/net") / self.device / "statistics"
+        try:
+            rx_bytes = int((statistics / "rx_bytes").read_text())
+            tx_bytes = int((statistics / "tx_bytes").read_text())
+            return rx_bytes, tx_bytes
+        except (OSError, ValueError):
+            return 0, 0
+    
+    def stop(self):
+        """
+        Stop the OpenVPN instance and release its resources.
+        """
+        if self.management:
+            try:
+                self.management.send_command("signal SIGTERM")
+            except (ConnectionError, OSError):
+                pass
+            self.management.close()
+            self.management = None
+        
+        if self.pid:
+            if self.process_registry.stop(self.pid, self.network_config.get('process_stop_timeout', 5)):
+                self.logger.info(f"VPN connection on {self.device} terminated")
+            self.pid = None
+        
+        if self.process:
+            try:
+                if self.process.poll() is None:
+                    self.process.terminate()
+                self.process.wait(timeout=self.network_config.get('process_stop_timeout', 5))
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.logger.warning(f"VPN process on {self.device} force killed")
+            except Exception as e:
+                self.logger.error(f"Error disconnecting VPN on {self.device}: {e}")
+            
+            self.process = None
+        
+        try:
+            os.remove(self.get_pid_file_path())
+        except OSError:
+            pass
+        
+        self.cleanup_credentials()
+        self.remove_connection_config()
\ No newline at end of file